@@ -1,19 +1,51 @@
+import asyncio
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
 from api.routers.v1.v1_router import v1_router
+from core.browser_manager import browser_manager
 from core.config import settings
 from core.cors_middleware import get_cors_middleware_config
 from core.logging_config import get_logger, setup_logging
+from services.runs.run_queue import InMemoryRunQueue, run_queue
 
 setup_logging(log_level=settings.LOG_LEVEL)
 
 logger = get_logger(__name__)
 
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """
+    Launch the shared browser on startup and close it on shutdown. With the
+    in-memory run queue, the runs can only be processed by a worker in this
+    process, so one is started alongside the API.
+    """
+    await browser_manager.start()
+
+    worker_task = None
+    if settings.AGENT_EXECUTOR == "queue" and isinstance(run_queue, InMemoryRunQueue):
+        # Imported here so the API only loads the agent when it runs it itself
+        from services.agent.run_worker import RunWorker
+
+        worker = RunWorker(run_queue, browser_manager)
+        worker_task = asyncio.create_task(worker.run())
+
+    yield
+
+    if worker_task is not None:
+        worker.stop()
+        await worker_task
+    await browser_manager.stop()
+
+
 app = FastAPI(
     title="Event Finder API",
     description="API for finding events based on user preferences",
     version="1.0.0",
+    lifespan=lifespan,
 )
 
 app.add_middleware(CORSMiddleware, **get_cors_middleware_config())
@@ -29,6 +61,7 @@ async def health_check():
             "status": "healthy",
             "service": "event-finder-api",
             "version": "1.0.0",
+            "browser": "connected" if browser_manager.is_connected() else "down",
         }
     except Exception as e:
         logger.error(f"Health check failed: {str(e)}")
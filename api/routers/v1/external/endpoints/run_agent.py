@@ -1,13 +1,11 @@
 from fastapi import APIRouter, Body, Depends, HTTPException, Query
 
+from schemas.agent_run_model import AgentRun
 from schemas.user_profile_model import AcceptableTimes, UserProfile
 from services.auth.supabase_auth import get_current_user, get_current_user_profile
-from services.cloud_run_jobs import cloud_run_service
+from services.runs.run_executor import run_executor
 from services.runs.user_runs_service import user_run_service
-from utils.user_profile_utils import (
-    apply_custom_overrides_to_profile,
-    serialize_user_profile,
-)
+from utils.user_profile_utils import apply_custom_overrides_to_profile
 
 from ..schemas.post_run_agent import ErrorResponse, PostRunAgentResponse
 
@@ -28,15 +26,18 @@ async def run_agent(
     only_highly_relevant: bool = Query(
         False, description="Event only highly relevant to the user or not"
     ),
-    custom_location: str | None = Body(
+    custom_location: str
+    | None = Body(
         default=None,
         description="Custom location to use for the agent (overwrites user's location)",
     ),
-    custom_dates: list[str] | None = Body(
+    custom_dates: list[str]
+    | None = Body(
         default=None,
         description="Custom set of acceptable dates",
     ),
-    custom_times: AcceptableTimes | None = Body(
+    custom_times: AcceptableTimes
+    | None = Body(
         default=None,
         description=(
             "Custom set of acceptable times (overwrites user's acceptable times)"
@@ -77,22 +78,22 @@ async def run_agent(
                 custom_dates=custom_dates,
             )
 
-            parameters = {
-                "only_highly_relevant": str(only_highly_relevant),
-                "user_profile": serialize_user_profile(modified_profile),
-                "user_id": user_id,
-            }
+            run = AgentRun(
+                user_id=user_id,
+                user_profile=modified_profile,
+                only_highly_relevant=only_highly_relevant,
+            )
 
-            task_id = await cloud_run_service.execute_job(parameters=parameters)
+            task_id = await run_executor.submit(run)
 
             return PostRunAgentResponse(
                 task_id=task_id,
-                status="Task submitted to Cloud Run Jobs successfully",
+                status="Task submitted successfully",
             )
         except Exception as e:
             raise HTTPException(
                 status_code=500,
-                detail=f"Failed to submit job to Cloud Run Jobs: {str(e)}",
+                detail=f"Failed to submit run: {str(e)}",
             )
 
     except ValueError as e:
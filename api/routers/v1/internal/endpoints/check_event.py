@@ -1,5 +1,7 @@
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, Depends, HTTPException
+from playwright.async_api import Browser
 
+from core.browser_manager import get_shared_browser
 from core.llm import gemma_3_27b
 from schemas.user_profile_model import UserProfile
 from services.event_processing.check_event import check_event as check_event_service
@@ -17,9 +19,15 @@ router = APIRouter()
         500: {"model": ErrorResponse, "description": "Internal Server Error"},
     },
 )
-async def check_event(event_link: str, user_profile: UserProfile):
+async def check_event(
+    event_link: str,
+    user_profile: UserProfile,
+    browser: Browser = Depends(get_shared_browser),
+):
     try:
-        event_result = await check_event_service(event_link, user_profile, gemma_3_27b)
+        event_result = await check_event_service(
+            event_link, user_profile, gemma_3_27b, browser
+        )
         return PostCheckEventResponse(event_result=event_result)
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
@@ -1,6 +1,6 @@
 from fastapi import APIRouter, HTTPException
 
-from utils.address_utils import get_location_from_query
+from utils.address_utils import get_location_from_query_cached
 
 from ..schemas.get_address_details import AddressDetailsResponse, ErrorResponse
 
@@ -18,7 +18,7 @@ router = APIRouter()
 )
 async def get_address_details(postcode: str) -> AddressDetailsResponse:
     try:
-        location = get_location_from_query(postcode)
+        location = await get_location_from_query_cached(postcode)
         if location is None:
             raise HTTPException(status_code=404, detail="Postcode not found")
 
@@ -0,0 +1,46 @@
+from fastapi import APIRouter, HTTPException
+
+from core.cache import cache
+from core.cache_metrics import cache_metrics
+from core.logging_config import get_logger
+
+from ..schemas.get_cache_stats import CacheStatsResponse, ErrorResponse
+
+logger = get_logger(__name__)
+
+router = APIRouter()
+
+
+@router.get(
+    "/cache-stats",
+    response_model=CacheStatsResponse,
+    responses={
+        500: {"model": ErrorResponse, "description": "Internal Server Error"},
+    },
+)
+async def get_cache_stats() -> CacheStatsResponse:
+    """
+    Get cache hit, miss, error and latency counters of this process, with the
+    number of keys and the memory used by the keyspace where the backend
+    reports them
+    """
+    try:
+        try:
+            key_count = await cache.count_keys()
+        except Exception as e:
+            logger.error(f"Error counting cache keys: {e}")
+            key_count = None
+
+        try:
+            memory_bytes = await cache.get_memory_bytes()
+        except Exception as e:
+            logger.error(f"Error getting cache memory usage: {e}")
+            memory_bytes = None
+
+        return CacheStatsResponse(
+            namespaces=cache_metrics.snapshot(),
+            key_count=key_count,
+            memory_bytes=memory_bytes,
+        )
+    except Exception:
+        raise HTTPException(status_code=500, detail="Failed to get cache stats")
@@ -1,7 +1,9 @@
 from typing import List
 
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, Depends, HTTPException
+from playwright.async_api import Browser
 
+from core.browser_manager import get_shared_browser
 from services.scrapping.scrappers import get_event_links as get_event_links_service
 
 from ..schemas.get_event_links import ErrorResponse, EventLinksResponse
@@ -25,10 +27,11 @@ async def get_event_links(
     country: str = "United Kingdom",
     city: str = "London",
     country_code: str = "gb",
+    browser: Browser = Depends(get_shared_browser),
 ) -> EventLinksResponse:
     try:
         event_links = await get_event_links_service(
-            keywords, eventbrite, meetup, luma, country, city, country_code
+            keywords, eventbrite, meetup, luma, country, city, country_code, browser
         )
         return EventLinksResponse(event_links=event_links)
     except ValueError as e:
@@ -19,10 +19,10 @@ router = APIRouter()
         500: {"model": ErrorResponse, "description": "Internal Server Error"},
     },
 )
-def get_search_keywords(user_profile: UserProfile) -> SearchKeywordsResponse:
+async def get_search_keywords(user_profile: UserProfile) -> SearchKeywordsResponse:
     """Get search keywords based on user profile"""
     try:
-        keywords = get_search_keywords_for_event_sites(user_profile, gemma_3_27b)
+        keywords = await get_search_keywords_for_event_sites(user_profile, gemma_3_27b)
         return SearchKeywordsResponse(keywords=keywords)
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
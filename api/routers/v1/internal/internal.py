@@ -4,6 +4,7 @@ from fastapi import APIRouter
 
 from .endpoints.check_event import router as check_event_router
 from .endpoints.get_address_details import router as get_address_details_router
+from .endpoints.get_cache_stats import router as get_cache_stats_router
 from .endpoints.get_event_links import router as get_event_links_router
 from .endpoints.get_search_keywords import router as get_search_keywords_router
 
@@ -13,6 +14,7 @@ router.include_router(get_search_keywords_router)
 router.include_router(get_event_links_router)
 router.include_router(get_address_details_router)
 router.include_router(check_event_router)
+router.include_router(get_cache_stats_router)
 
 
 @router.get("/")
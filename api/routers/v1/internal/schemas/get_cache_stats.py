@@ -0,0 +1,23 @@
+from typing import Dict
+
+from pydantic import BaseModel, Field
+
+from api.routers.v1.schemas.common import ErrorResponse
+from core.cache_metrics import CacheNamespaceStats
+
+
+class CacheStatsResponse(BaseModel):
+    """Response model for get cache stats endpoint"""
+
+    namespaces: Dict[str, CacheNamespaceStats]
+    key_count: int | None
+    memory_bytes: int | None = Field(
+        default=None,
+        description=(
+            "Memory used by the keyspace, None if the backend doesn't report it, "
+            "as Upstash doesn't over its REST API"
+        ),
+    )
+
+
+__all__ = ["CacheStatsResponse", "ErrorResponse"]
@@ -0,0 +1,148 @@
+import asyncio
+from typing import Optional
+
+from playwright.async_api import Browser, Playwright, async_playwright
+
+from core.browser_config import BrowserConfig
+from core.config import settings
+from core.logging_config import get_logger
+
+logger = get_logger(__name__)
+
+
+class BrowserManager:
+    """
+    Owns a single long-lived Playwright browser shared across API requests.
+
+    The browser is launched once from the FastAPI lifespan handler and handed to
+    the scraping services instead of each request launching its own Chromium. A
+    background task periodically checks that the browser still responds and
+    relaunches it if it crashed or got disconnected.
+
+    Usage:
+        from core.browser_manager import browser_manager
+
+        browser = await browser_manager.get_browser()
+        page = await browser.new_page()
+    """
+
+    def __init__(self):
+        self._playwright: Optional[Playwright] = None
+        self._browser: Optional[Browser] = None
+        self._lock = asyncio.Lock()
+        self._health_check_task: Optional[asyncio.Task] = None
+
+    async def start(self) -> None:
+        """Launch the browser and start the periodic health check."""
+        try:
+            async with self._lock:
+                await self._launch()
+        except Exception as e:
+            # The app can still serve requests, the browser will be launched
+            # lazily by the first request that needs it
+            logger.error(f"Failed to launch shared browser on startup: {e}")
+
+        if self._health_check_task is None:
+            self._health_check_task = asyncio.create_task(self._health_check_loop())
+
+    async def stop(self) -> None:
+        """Stop the health check and close the browser and Playwright."""
+        if self._health_check_task is not None:
+            self._health_check_task.cancel()
+            try:
+                await self._health_check_task
+            except asyncio.CancelledError:
+                pass
+            self._health_check_task = None
+
+        async with self._lock:
+            await self._close()
+
+    async def get_browser(self) -> Browser:
+        """Get the shared browser, relaunching it if it is not connected."""
+        if self.is_connected():
+            assert self._browser is not None
+            return self._browser
+
+        async with self._lock:
+            # Another request might have relaunched it while we were waiting
+            if not self.is_connected():
+                logger.warning("Shared browser is not connected, relaunching")
+                await self._close()
+                await self._launch()
+
+            assert self._browser is not None
+            return self._browser
+
+    def is_connected(self) -> bool:
+        """Check if the browser process is up and connected."""
+        return self._browser is not None and self._browser.is_connected()
+
+    async def health_check(self) -> bool:
+        """
+        Check that the browser can actually open a page. A browser can stay
+        connected while being unable to create new contexts (e.g. when out of
+        memory), so this goes further than is_connected.
+        """
+        if not self.is_connected():
+            return False
+
+        assert self._browser is not None
+        try:
+            context = await asyncio.wait_for(self._browser.new_context(), timeout=10)
+            await context.close()
+            return True
+        except Exception as e:
+            logger.error(f"Shared browser health check failed: {e}")
+            return False
+
+    async def _health_check_loop(self) -> None:
+        while True:
+            await asyncio.sleep(settings.BROWSER_HEALTH_CHECK_INTERVAL_SECONDS)
+            if await self.health_check():
+                continue
+
+            async with self._lock:
+                logger.warning("Relaunching shared browser after failed health check")
+                try:
+                    await self._close()
+                    await self._launch()
+                except Exception as e:
+                    logger.error(f"Failed to relaunch shared browser: {e}")
+
+    async def _launch(self) -> None:
+        if self._playwright is None:
+            self._playwright = await async_playwright().start()
+
+        self._browser = await self._playwright.chromium.launch(
+            headless=True, args=BrowserConfig.get_browser_args()
+        )
+        logger.info("Shared browser launched")
+
+    async def _close(self) -> None:
+        try:
+            if self._browser is not None:
+                await self._browser.close()
+                logger.info("Shared browser closed")
+        except Exception as e:
+            logger.error(f"Error closing shared browser: {e}")
+        finally:
+            self._browser = None
+
+        try:
+            if self._playwright is not None:
+                await self._playwright.stop()
+                logger.info("Playwright stopped")
+        except Exception as e:
+            logger.error(f"Error stopping playwright: {e}")
+        finally:
+            self._playwright = None
+
+
+async def get_shared_browser() -> Browser:
+    """Dependency to get the browser shared across API requests"""
+    return await browser_manager.get_browser()
+
+
+# Global instance - started and stopped by the FastAPI lifespan handler
+browser_manager = BrowserManager()
@@ -0,0 +1,479 @@
+import sys
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+from upstash_redis.asyncio import Redis
+
+from core.cache_metrics import CacheMetrics, cache_metrics
+from core.config import settings
+from core.logging_config import get_logger
+from core.run_metrics import get_run_metrics
+
+logger = get_logger(__name__)
+
+
+class CacheEntry(NamedTuple):
+    key: str
+    value: str
+    ttl_seconds: Optional[int] = None
+
+
+class CacheBackend(ABC):
+    """
+    Async key-value cache used across the project.
+
+    Bulk operations (mget, mset) are done in a single round trip where the
+    backend supports it, so callers should prefer them over looping get/set.
+    """
+
+    @abstractmethod
+    async def get(self, key: str) -> Optional[str]:
+        """Get a value, None if the key doesn't exist or has expired"""
+
+    @abstractmethod
+    async def mget(self, keys: List[str]) -> List[Optional[str]]:
+        """Get multiple values at once, in the same order as the keys"""
+
+    @abstractmethod
+    async def set(
+        self, key: str, value: str, ttl_seconds: Optional[int] = None
+    ) -> None:
+        """Set a value, optionally expiring after ttl_seconds"""
+
+    @abstractmethod
+    async def mset(self, entries: List[CacheEntry]) -> None:
+        """Set multiple values at once, each with its own TTL"""
+
+    @abstractmethod
+    async def delete(self, keys: List[str]) -> None:
+        """Delete keys, missing keys are ignored"""
+
+    @abstractmethod
+    async def count_keys(self) -> Optional[int]:
+        """Count the keys in the keyspace, None if the backend can't tell"""
+
+    @abstractmethod
+    async def get_memory_bytes(self) -> Optional[int]:
+        """Memory used by the keyspace, None if the backend can't tell"""
+
+
+class UpstashCacheBackend(CacheBackend):
+    """Cache backed by Upstash Redis over its REST API."""
+
+    def __init__(self, url: str, token: str):
+        self.client = Redis(url=url, token=token)
+
+    async def get(self, key: str) -> Optional[str]:
+        value = await self.client.get(key)
+        return None if value is None else str(value)
+
+    async def mget(self, keys: List[str]) -> List[Optional[str]]:
+        if not keys:
+            return []
+
+        values = await self.client.mget(*keys)
+        return [None if value is None else str(value) for value in values]
+
+    async def set(
+        self, key: str, value: str, ttl_seconds: Optional[int] = None
+    ) -> None:
+        await self.client.set(key, value, ex=ttl_seconds)
+
+    async def mset(self, entries: List[CacheEntry]) -> None:
+        if not entries:
+            return
+
+        pipeline = self.client.pipeline()
+        for entry in entries:
+            pipeline.set(entry.key, entry.value, ex=entry.ttl_seconds)
+        await pipeline.exec()
+
+    async def delete(self, keys: List[str]) -> None:
+        if keys:
+            await self.client.delete(*keys)
+
+    async def count_keys(self) -> Optional[int]:
+        return int(await self.client.dbsize())
+
+    async def get_memory_bytes(self) -> Optional[int]:
+        # Upstash doesn't report memory usage over its REST API, its console
+        # shows the size of the database instead
+        return None
+
+
+class InMemoryCacheBackend(CacheBackend):
+    """
+    Process-local cache for jobs and tests that run without Upstash, and the
+    local tier of TieredCacheBackend. Nothing is shared between processes and
+    nothing survives a restart.
+
+    When max_bytes is set, the least recently used keys are evicted once the
+    estimated memory used by keys and values goes over it.
+    """
+
+    def __init__(self, max_bytes: Optional[int] = None):
+        self.max_bytes = max_bytes
+        self._store: OrderedDict[str, Tuple[str, Optional[float]]] = OrderedDict()
+        self._used_bytes = 0
+
+    def _get_entry_size(self, key: str, value: str) -> int:
+        return sys.getsizeof(key) + sys.getsizeof(value)
+
+    def _remove(self, key: str) -> None:
+        item = self._store.pop(key, None)
+        if item is not None:
+            self._used_bytes -= self._get_entry_size(key, item[0])
+
+    def _get_value(self, key: str) -> Optional[str]:
+        item = self._store.get(key)
+        if item is None:
+            return None
+
+        value, expires_at = item
+        if expires_at is not None and expires_at <= time.monotonic():
+            self._remove(key)
+            return None
+
+        self._store.move_to_end(key)
+        return value
+
+    def _set_value(self, key: str, value: str, ttl_seconds: Optional[int]) -> None:
+        self._remove(key)
+
+        expires_at = time.monotonic() + ttl_seconds if ttl_seconds else None
+        self._store[key] = (value, expires_at)
+        self._used_bytes += self._get_entry_size(key, value)
+
+        if self.max_bytes is not None:
+            while self._used_bytes > self.max_bytes and self._store:
+                oldest_key = next(iter(self._store))
+                self._remove(oldest_key)
+
+    @property
+    def used_bytes(self) -> int:
+        return self._used_bytes
+
+    async def get(self, key: str) -> Optional[str]:
+        return self._get_value(key)
+
+    async def mget(self, keys: List[str]) -> List[Optional[str]]:
+        return [self._get_value(key) for key in keys]
+
+    async def set(
+        self, key: str, value: str, ttl_seconds: Optional[int] = None
+    ) -> None:
+        self._set_value(key, value, ttl_seconds)
+
+    async def mset(self, entries: List[CacheEntry]) -> None:
+        for entry in entries:
+            self._set_value(entry.key, entry.value, entry.ttl_seconds)
+
+    async def delete(self, keys: List[str]) -> None:
+        for key in keys:
+            self._remove(key)
+
+    async def count_keys(self) -> Optional[int]:
+        return len(self._store)
+
+    async def get_memory_bytes(self) -> Optional[int]:
+        return self._used_bytes
+
+
+class TieredCacheBackend(CacheBackend):
+    """
+    Bounded in-process cache in front of a remote backend. Reads try the local
+    tier first and only go to the remote one for the keys it doesn't have.
+    Writes go to both tiers.
+
+    Local entries never outlive local_ttl_seconds, so changes made by other
+    processes show up after at most that long. Keys the remote tier doesn't
+    have are remembered locally for negative_ttl_seconds so that a missing key
+    isn't looked up remotely over and over.
+    """
+
+    # Marks a key the remote tier doesn't have, can't clash with a real value
+    MISSING = "\x00missing"
+
+    def __init__(
+        self,
+        local: InMemoryCacheBackend,
+        remote: CacheBackend,
+        local_ttl_seconds: int,
+        negative_ttl_seconds: int,
+        metrics: Optional[CacheMetrics] = None,
+    ):
+        self.local = local
+        self.remote = remote
+        self.local_ttl_seconds = local_ttl_seconds
+        self.negative_ttl_seconds = negative_ttl_seconds
+        self.metrics = metrics
+
+    def _get_local_ttl(self, ttl_seconds: Optional[int]) -> int:
+        if ttl_seconds is None:
+            return self.local_ttl_seconds
+        return min(ttl_seconds, self.local_ttl_seconds)
+
+    async def get(self, key: str) -> Optional[str]:
+        return (await self.mget([key]))[0]
+
+    async def mget(self, keys: List[str]) -> List[Optional[str]]:
+        local_values = await self.local.mget(keys)
+        missing_keys = [key for key, value in zip(keys, local_values) if value is None]
+
+        if self.metrics is not None:
+            local_hits = [
+                key
+                for key, value in zip(keys, local_values)
+                if value is not None and value != self.MISSING
+            ]
+            self.metrics.record_local_hits(local_hits)
+            get_run_metrics().cache_metrics.record_local_hits(local_hits)
+
+        remote_values: Dict[str, Optional[str]] = {}
+        if missing_keys:
+            fetched_values = await self.remote.mget(missing_keys)
+            remote_values = dict(zip(missing_keys, fetched_values))
+            await self.local.mset(
+                [
+                    (
+                        CacheEntry(key, value, self.local_ttl_seconds)
+                        if value is not None
+                        else CacheEntry(key, self.MISSING, self.negative_ttl_seconds)
+                    )
+                    for key, value in remote_values.items()
+                ]
+            )
+
+        values: List[Optional[str]] = []
+        for key, local_value in zip(keys, local_values):
+            value = local_value if local_value is not None else remote_values[key]
+            values.append(None if value == self.MISSING else value)
+
+        return values
+
+    async def set(
+        self, key: str, value: str, ttl_seconds: Optional[int] = None
+    ) -> None:
+        await self.mset([CacheEntry(key, value, ttl_seconds)])
+
+    async def mset(self, entries: List[CacheEntry]) -> None:
+        await self.remote.mset(entries)
+        await self.local.mset(
+            [
+                CacheEntry(
+                    entry.key, entry.value, self._get_local_ttl(entry.ttl_seconds)
+                )
+                for entry in entries
+            ]
+        )
+
+    async def delete(self, keys: List[str]) -> None:
+        await self.local.delete(keys)
+        await self.remote.delete(keys)
+
+    async def count_keys(self) -> Optional[int]:
+        return await self.remote.count_keys()
+
+    async def get_memory_bytes(self) -> Optional[int]:
+        return await self.remote.get_memory_bytes()
+
+
+class InstrumentedCacheBackend(CacheBackend):
+    """
+    Wraps another backend and records hits, misses, errors and latency per key
+    namespace for every operation, both in the given metrics and in those of
+    the run the operation is part of.
+    """
+
+    def __init__(self, backend: CacheBackend, metrics: CacheMetrics):
+        self.backend = backend
+        self.metrics = metrics
+
+    def _elapsed_ms(self, start: float) -> float:
+        return (time.perf_counter() - start) * 1000
+
+    def _get_metrics(self) -> List[CacheMetrics]:
+        return [self.metrics, get_run_metrics().cache_metrics]
+
+    async def get(self, key: str) -> Optional[str]:
+        start = time.perf_counter()
+        try:
+            value = await self.backend.get(key)
+        except Exception:
+            elapsed_ms = self._elapsed_ms(start)
+            for metrics in self._get_metrics():
+                metrics.record_error([key], elapsed_ms)
+            raise
+
+        elapsed_ms = self._elapsed_ms(start)
+        for metrics in self._get_metrics():
+            metrics.record_lookup([key], [value is not None], elapsed_ms)
+        return value
+
+    async def mget(self, keys: List[str]) -> List[Optional[str]]:
+        if not keys:
+            return []
+
+        start = time.perf_counter()
+        try:
+            values = await self.backend.mget(keys)
+        except Exception:
+            elapsed_ms = self._elapsed_ms(start)
+            for metrics in self._get_metrics():
+                metrics.record_error(keys, elapsed_ms)
+            raise
+
+        elapsed_ms = self._elapsed_ms(start)
+        hits = [value is not None for value in values]
+        for metrics in self._get_metrics():
+            metrics.record_lookup(keys, hits, elapsed_ms)
+        return values
+
+    async def set(
+        self, key: str, value: str, ttl_seconds: Optional[int] = None
+    ) -> None:
+        await self.mset([CacheEntry(key, value, ttl_seconds)])
+
+    async def mset(self, entries: List[CacheEntry]) -> None:
+        if not entries:
+            return
+
+        keys = [entry.key for entry in entries]
+        start = time.perf_counter()
+        try:
+            if len(entries) == 1:
+                entry = entries[0]
+                await self.backend.set(entry.key, entry.value, entry.ttl_seconds)
+            else:
+                await self.backend.mset(entries)
+        except Exception:
+            elapsed_ms = self._elapsed_ms(start)
+            for metrics in self._get_metrics():
+                metrics.record_error(keys, elapsed_ms)
+            raise
+
+        elapsed_ms = self._elapsed_ms(start)
+        value_sizes = [len(entry.value) for entry in entries]
+        for metrics in self._get_metrics():
+            metrics.record_write(keys, value_sizes, elapsed_ms)
+
+    async def delete(self, keys: List[str]) -> None:
+        if not keys:
+            return
+
+        start = time.perf_counter()
+        try:
+            await self.backend.delete(keys)
+        except Exception:
+            elapsed_ms = self._elapsed_ms(start)
+            for metrics in self._get_metrics():
+                metrics.record_error(keys, elapsed_ms)
+            raise
+
+        elapsed_ms = self._elapsed_ms(start)
+        for metrics in self._get_metrics():
+            metrics.record_delete(keys, elapsed_ms)
+
+    async def count_keys(self) -> Optional[int]:
+        return await self.backend.count_keys()
+
+    async def get_memory_bytes(self) -> Optional[int]:
+        return await self.backend.get_memory_bytes()
+
+
+class CacheWriteBuffer:
+    """
+    Collects cache writes and sends them in batches with mset instead of one
+    round trip per write. Call flush once the writes are done, anything still
+    buffered is lost otherwise.
+
+    Usage:
+        buffer = CacheWriteBuffer(cache)
+        await buffer.add("event_details:https://...", value, ttl_seconds=3600)
+        await buffer.flush()
+    """
+
+    def __init__(self, backend: CacheBackend, max_size: int = 50):
+        self.backend = backend
+        self.max_size = max_size
+        self._entries: List[CacheEntry] = []
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    async def add(
+        self, key: str, value: str, ttl_seconds: Optional[int] = None
+    ) -> None:
+        """Buffer a write, flushing the buffer once it holds max_size writes"""
+        self._entries.append(CacheEntry(key, value, ttl_seconds))
+        if len(self._entries) >= self.max_size:
+            await self.flush()
+
+    async def flush(self) -> None:
+        """Send all buffered writes in one batch"""
+        if not self._entries:
+            return
+
+        entries, self._entries = self._entries, []
+        try:
+            await self.backend.mset(entries)
+        except Exception as e:
+            logger.error(f"Error flushing {len(entries)} cache writes: {e}")
+
+
+def create_cache_backend() -> CacheBackend:
+    """
+    Create the cache backend selected by the CACHE_BACKEND setting, with the
+    in-process tier in front of Upstash when LOCAL_CACHE_ENABLED is set.
+    """
+    backend: CacheBackend
+    if settings.CACHE_BACKEND == "memory":
+        logger.info("Using in-memory cache")
+        backend = InMemoryCacheBackend(max_bytes=settings.LOCAL_CACHE_MAX_BYTES)
+    elif not settings.UPSTASH_REDIS_REST_URL or not settings.UPSTASH_REDIS_REST_TOKEN:
+        logger.warning("Upstash Redis credentials not found, using in-memory cache")
+        backend = InMemoryCacheBackend(max_bytes=settings.LOCAL_CACHE_MAX_BYTES)
+    else:
+        backend = UpstashCacheBackend(
+            url=settings.UPSTASH_REDIS_REST_URL,
+            token=settings.UPSTASH_REDIS_REST_TOKEN,
+        )
+        if settings.LOCAL_CACHE_ENABLED:
+            backend = TieredCacheBackend(
+                local=InMemoryCacheBackend(max_bytes=settings.LOCAL_CACHE_MAX_BYTES),
+                remote=backend,
+                local_ttl_seconds=settings.LOCAL_CACHE_TTL_SECONDS,
+                negative_ttl_seconds=settings.LOCAL_CACHE_NEGATIVE_TTL_SECONDS,
+                metrics=cache_metrics,
+            )
+
+    return InstrumentedCacheBackend(backend, cache_metrics)
+
+
+def create_shared_cache_backend() -> Optional[CacheBackend]:
+    """
+    Create a cache that every process sees the same way, for coordinating work
+    between processes. It has no in-process tier, so a value written by one
+    process is visible to the others straight away.
+
+    Returns:
+        The backend, or None if only the in-memory cache is available
+    """
+    if (
+        settings.CACHE_BACKEND == "memory"
+        or not settings.UPSTASH_REDIS_REST_URL
+        or not settings.UPSTASH_REDIS_REST_TOKEN
+    ):
+        return None
+
+    backend = UpstashCacheBackend(
+        url=settings.UPSTASH_REDIS_REST_URL,
+        token=settings.UPSTASH_REDIS_REST_TOKEN,
+    )
+    return InstrumentedCacheBackend(backend, cache_metrics)
+
+
+# Global instance - use this in all services
+cache = create_cache_backend()
@@ -0,0 +1,137 @@
+import json
+import threading
+from typing import Dict, List
+
+from pydantic import BaseModel, computed_field
+
+from core.logging_config import get_logger
+
+logger = get_logger(__name__)
+
+
+class CacheNamespaceStats(BaseModel):
+    """Counters for all cache keys sharing a prefix (e.g. event_details)."""
+
+    hits: int = 0
+    local_hits: int = 0
+    misses: int = 0
+    writes: int = 0
+    deletes: int = 0
+    errors: int = 0
+    bytes_written: int = 0
+    operations: int = 0
+    total_latency_ms: float = 0
+    max_latency_ms: float = 0
+
+    @computed_field  # type: ignore[prop-decorator]
+    @property
+    def hit_rate(self) -> float:
+        lookups = self.hits + self.misses
+        return round(self.hits / lookups, 3) if lookups else 0
+
+    @computed_field  # type: ignore[prop-decorator]
+    @property
+    def average_latency_ms(self) -> float:
+        if not self.operations:
+            return 0
+        return round(self.total_latency_ms / self.operations, 1)
+
+
+def get_key_namespace(key: str) -> str:
+    """Get the namespace of a cache key, which is everything before the first ':'"""
+    namespace, separator, _ = key.partition(":")
+    return namespace if separator else "default"
+
+
+class CacheMetrics:
+    """
+    Thread-safe hit, miss, error and latency counters per cache key namespace.
+    Latency is counted per operation, so a bulk mget counts once for every
+    namespace it touched.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._namespaces: Dict[str, CacheNamespaceStats] = {}
+
+    def _get_stats(self, namespace: str) -> CacheNamespaceStats:
+        if namespace not in self._namespaces:
+            self._namespaces[namespace] = CacheNamespaceStats()
+        return self._namespaces[namespace]
+
+    def _record_latency(self, stats: CacheNamespaceStats, latency_ms: float) -> None:
+        stats.operations += 1
+        stats.total_latency_ms += latency_ms
+        stats.max_latency_ms = max(stats.max_latency_ms, latency_ms)
+
+    def record_lookup(
+        self, keys: List[str], hits: List[bool], latency_ms: float
+    ) -> None:
+        with self._lock:
+            for namespace in {get_key_namespace(key) for key in keys}:
+                self._record_latency(self._get_stats(namespace), latency_ms)
+
+            for key, hit in zip(keys, hits):
+                stats = self._get_stats(get_key_namespace(key))
+                if hit:
+                    stats.hits += 1
+                else:
+                    stats.misses += 1
+
+    def record_local_hits(self, keys: List[str]) -> None:
+        """Record keys served by the in-process tier, they also count as hits"""
+        with self._lock:
+            for key in keys:
+                self._get_stats(get_key_namespace(key)).local_hits += 1
+
+    def record_write(
+        self, keys: List[str], value_sizes: List[int], latency_ms: float
+    ) -> None:
+        with self._lock:
+            for namespace in {get_key_namespace(key) for key in keys}:
+                self._record_latency(self._get_stats(namespace), latency_ms)
+
+            for key, value_size in zip(keys, value_sizes):
+                stats = self._get_stats(get_key_namespace(key))
+                stats.writes += 1
+                stats.bytes_written += value_size
+
+    def record_delete(self, keys: List[str], latency_ms: float) -> None:
+        with self._lock:
+            for namespace in {get_key_namespace(key) for key in keys}:
+                self._record_latency(self._get_stats(namespace), latency_ms)
+
+            for key in keys:
+                self._get_stats(get_key_namespace(key)).deletes += 1
+
+    def record_error(self, keys: List[str], latency_ms: float) -> None:
+        with self._lock:
+            for namespace in {get_key_namespace(key) for key in keys}:
+                stats = self._get_stats(namespace)
+                stats.errors += 1
+                self._record_latency(stats, latency_ms)
+
+    def snapshot(self) -> Dict[str, CacheNamespaceStats]:
+        """Get a copy of the current counters per namespace"""
+        with self._lock:
+            return {
+                namespace: stats.model_copy()
+                for namespace, stats in sorted(self._namespaces.items())
+            }
+
+    def reset(self) -> None:
+        """Clear every counter, e.g. so a job only counts its own operations"""
+        with self._lock:
+            self._namespaces = {}
+
+    def log_summary(self) -> None:
+        """Log the counters of every namespace as a single JSON line"""
+        summary = {
+            namespace: stats.model_dump(exclude={"operations", "total_latency_ms"})
+            for namespace, stats in self.snapshot().items()
+        }
+        logger.info(f"Cache summary: {json.dumps(summary)}")
+
+
+# Global instance - shared by every cache backend in the process
+cache_metrics = CacheMetrics()
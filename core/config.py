@@ -1,3 +1,5 @@
+from typing import Literal
+
 from pydantic_settings import BaseSettings
 
 
@@ -28,6 +30,13 @@ class Settings(BaseSettings):
     UPSTASH_REDIS_REST_URL: str = ""
     UPSTASH_REDIS_REST_TOKEN: str = ""
 
+    # Cache
+    CACHE_BACKEND: Literal["upstash", "memory"] = "upstash"
+    LOCAL_CACHE_ENABLED: bool = True
+    LOCAL_CACHE_MAX_BYTES: int = 64 * 1024 * 1024
+    LOCAL_CACHE_TTL_SECONDS: int = 10 * 60
+    LOCAL_CACHE_NEGATIVE_TTL_SECONDS: int = 60
+
     # Scrappey
     SCRAPPEY_API_KEY: str = ""
 
@@ -35,6 +44,107 @@ class Settings(BaseSettings):
     GOOGLE_CLOUD_PROJECT: str = ""
     GOOGLE_CLOUD_REGION: str = "europe-west2"
     CLOUD_RUN_JOB_NAME: str = "event-finder-agent-job"
+    # Must match the job's max retries, a failed run is only reverted on the
+    # task's last attempt since the retries resume it
+    CLOUD_RUN_JOB_MAX_RETRIES: int = 3
+
+    # Agent execution
+    # "cloud_run" starts a Cloud Run Jobs execution per run, "queue" puts runs
+    # on the run queue for the long-lived workers
+    AGENT_EXECUTOR: Literal["cloud_run", "queue"] = "cloud_run"
+    RUN_QUEUE_BACKEND: Literal["upstash", "memory"] = "upstash"
+    RUN_WORKER_CONCURRENCY: int = 2
+    RUN_WORKER_MAX_ATTEMPTS: int = 3
+    RUN_WORKER_POLL_SECONDS: int = 2
+    # A run claimed longer than this is taken back from its worker, which is
+    # taken to have died, and retried. Keep it above AGENT_RUN_DEADLINE_SECONDS
+    # so runs still going aren't taken back.
+    RUN_QUEUE_CLAIM_TIMEOUT_SECONDS: int = 60 * 60
+    RUN_WORKER_RECLAIM_INTERVAL_SECONDS: int = 60
+
+    # Search and check Luma's city listing while the search keywords are
+    # generated, instead of waiting for them to search every source
+    AGENT_OVERLAP_KEYWORD_GENERATION: bool = True
+
+    # Agent checkpoints
+    # Save each run's progress under its run ID so a retry resumes it
+    AGENT_CHECKPOINT_ENABLED: bool = True
+    AGENT_CHECKPOINT_TTL_SECONDS: int = 24 * 60 * 60
+
+    # Run deadline
+    # Wall-clock budget of a run, or of a batch job as a whole, keep it under
+    # the Cloud Run task timeout. 0 leaves runs unbounded.
+    AGENT_RUN_DEADLINE_SECONDS: int = 50 * 60
+    # Time kept at the end of a run to score the events found and email them,
+    # no new events are searched for or checked once only this is left
+    AGENT_RUN_RESERVE_SECONDS: int = 5 * 60
+    AGENT_SEARCH_TIMEOUT_SECONDS: int = 10 * 60
+    AGENT_EVENT_TIMEOUT_SECONDS: int = 2 * 60
+
+    # Early stopping
+    # Check events most promising first, and stop once EARLY_STOP_TOP_K events
+    # pass the relevance threshold and none of the rest is expected to beat them
+    EARLY_STOP_ENABLED: bool = True
+    EARLY_STOP_TOP_K: int = 10
+    # Events checked and scored between two early stopping checks
+    EARLY_STOP_WAVE_SIZE: int = 8
+
+    # Run reports
+    # Keep each run's timing and counters report in the cache as well as
+    # logging it
+    RUN_REPORT_PERSIST: bool = False
+    RUN_REPORT_TTL_SECONDS: int = 7 * 24 * 60 * 60
+
+    # Agent sharding
+    # Cloud Run tasks a single user's run is spread over, 1 runs it in one task
+    AGENT_SHARD_TASK_COUNT: int = 1
+    # How long tasks wait for the links and for each other's results
+    AGENT_SHARD_WAIT_SECONDS: int = 30 * 60
+    AGENT_SHARD_POLL_SECONDS: int = 5
+
+    # Browser
+    BROWSER_HEALTH_CHECK_INTERVAL_SECONDS: int = 60
+
+    # Page scraping
+    SCRAP_PAGE_EXTRACTION_MODE: Literal[
+        "inner_text", "text_content", "html"
+    ] = "inner_text"
+    SCRAP_PAGE_USE_WORKER_PROCESS: bool = False
+    SCRAP_PAGE_WORKER_PROCESSES: int = 2
+    SCRAP_PAGE_TIMEOUT_MS: int = 20_000
+
+    # Relevance scoring
+    # Score events from their cached audience profile instead of their page,
+    # in every scoring path. Off, events are scored from their page and the
+    # profile doesn't override any of the LLM's answers.
+    RELEVANCE_USE_AUDIENCE_PROFILE: bool = True
+    # Events scored per LLM call, 1 scores every event on its own
+    RELEVANCE_BATCH_SIZE: int = 8
+    RELEVANCE_BATCH_MAX_TOKENS: int = 12_000
+    # Characters of page text sent per event in a batch
+    RELEVANCE_BATCH_TEXT_CHARS: int = 1500
+    # Users one event is scored for per LLM call
+    RELEVANCE_MULTI_USER_BATCH_SIZE: int = 10
+
+    # Speculative relevance scoring
+    # On a cache miss, score the event from its page while its details are
+    # extracted instead of after. Every event that is then disqualified costs
+    # an LLM call for nothing, so only links whose keywords disqualify at most
+    # this share of their links are scored speculatively.
+    RELEVANCE_SPECULATION_ENABLED: bool = False
+    RELEVANCE_SPECULATION_MAX_DISQUALIFICATION_RATE: float = 0.5
+    # Disqualification rate assumed for links without trusted keyword stats
+    RELEVANCE_SPECULATION_DEFAULT_DISQUALIFICATION_RATE: float = 0.5
+
+    # Relevance pre-ranking
+    # Off until an audit shows the cutoff keeps the events that would be sent
+    PRE_RANKER_ENABLED: bool = False
+    PRE_RANKER_TOP_K: int = 30
+    # Events scoring below this are dropped, 0 keeps events with no term in
+    # common with the profile
+    PRE_RANKER_MIN_SCORE: float = 0.0
+    # Score every event anyway and log the pre-ranker's recall against it
+    PRE_RANKER_AUDIT: bool = False
 
     class Config:
         case_sensitive = True
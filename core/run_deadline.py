@@ -0,0 +1,124 @@
+import time
+from contextvars import ContextVar
+from typing import Optional
+
+from core.config import settings
+
+
+class RunDeadlineExceeded(Exception):
+    """
+    Raised instead of waiting on something that would outlast the run. Code
+    that turns errors into a default result, like a score of 0, must re-raise
+    it so the run stops instead of using the default.
+    """
+
+
+class RunDeadline:
+    """
+    Wall-clock budget of one agent run. The last reserve_seconds of it are
+    kept for scoring the events already found and emailing them, so stages
+    that find and check new events stop once only the reserve is left.
+
+    Code deep in the pipeline gets the deadline of the run it's part of with
+    get_run_deadline, so it doesn't have to be passed around.
+
+    Usage:
+        deadline = start_run_deadline(settings.AGENT_RUN_DEADLINE_SECONDS)
+        if not deadline.is_nearly_spent():
+            await asyncio.wait_for(
+                check_event(...),
+                deadline.get_timeout(settings.AGENT_EVENT_TIMEOUT_SECONDS),
+            )
+    """
+
+    def __init__(
+        self, seconds: Optional[float] = None, reserve_seconds: float = 0
+    ) -> None:
+        self._expires_at = time.monotonic() + seconds if seconds else None
+        self.reserve_seconds = reserve_seconds
+
+    def get_remaining_seconds(self) -> Optional[float]:
+        """Seconds left until the deadline, None if the run is unbounded"""
+        if self._expires_at is None:
+            return None
+        return max(0.0, self._expires_at - time.monotonic())
+
+    def is_expired(self) -> bool:
+        return self.get_remaining_seconds() == 0
+
+    def is_nearly_spent(self) -> bool:
+        """Whether only the time kept for scoring and emailing is left"""
+        remaining_seconds = self.get_remaining_seconds()
+        return (
+            remaining_seconds is not None and remaining_seconds <= self.reserve_seconds
+        )
+
+    def get_timeout(self, budget_seconds: Optional[float] = None) -> Optional[float]:
+        """
+        Timeout for a stage that finds or checks new events: its own budget,
+        cut short so it ends before the reserve.
+
+        Args:
+            budget_seconds: How long the stage may take, unbounded if None
+
+        Returns:
+            The timeout in seconds, None if neither the stage nor the run is
+            bounded
+        """
+        remaining_seconds = self.get_remaining_seconds()
+        if remaining_seconds is None:
+            return budget_seconds
+
+        timeout = max(0.0, remaining_seconds - self.reserve_seconds)
+        if budget_seconds is not None:
+            timeout = min(timeout, budget_seconds)
+        return timeout
+
+    def check_wait(self, seconds: float) -> None:
+        """
+        Raise RunDeadlineExceeded if waiting that long would go past the
+        deadline
+        """
+        remaining_seconds = self.get_remaining_seconds()
+        if remaining_seconds is not None and seconds >= remaining_seconds:
+            raise RunDeadlineExceeded(
+                f"Waiting {seconds:.1f}s would go past the run deadline, "
+                f"{remaining_seconds:.1f}s left"
+            )
+
+
+# Deadline of the run the current task is part of. Tasks and threads started
+# with asyncio.to_thread inherit it, so concurrent runs each see their own.
+_current_run_deadline: ContextVar[Optional[RunDeadline]] = ContextVar(
+    "current_run_deadline", default=None
+)
+
+# Code running outside of a run is never cut short
+_unbounded_run_deadline = RunDeadline()
+
+
+def start_run_deadline(seconds: Optional[float] = None) -> RunDeadline:
+    """
+    Start the deadline of a new run in the current task, keeping the
+    configured reserve for scoring and emailing. A run given less than the
+    configured budget, e.g. one user's share of a batch job, keeps the same
+    share of the reserve.
+
+    Args:
+        seconds: Budget of the run, the configured one if None and unbounded
+            if 0
+    """
+    run_seconds = settings.AGENT_RUN_DEADLINE_SECONDS
+    if seconds is None:
+        seconds = run_seconds
+    reserve_seconds: float = settings.AGENT_RUN_RESERVE_SECONDS
+    if run_seconds and seconds and seconds < run_seconds:
+        reserve_seconds *= seconds / run_seconds
+    deadline = RunDeadline(seconds, reserve_seconds)
+    _current_run_deadline.set(deadline)
+    return deadline
+
+
+def get_run_deadline() -> RunDeadline:
+    """Get the deadline of the run the current task is part of"""
+    return _current_run_deadline.get() or _unbounded_run_deadline
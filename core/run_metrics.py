@@ -0,0 +1,163 @@
+import json
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Awaitable, Callable, Dict, Iterator, List, Optional
+
+from pydantic import BaseModel
+
+from core.cache_metrics import CacheMetrics
+from core.logging_config import get_logger
+
+logger = get_logger(__name__)
+
+ReportHook = Callable[[Dict[str, Any]], Awaitable[None]]
+
+
+class StageStats(BaseModel):
+    """How long one stage took over all the times it ran in a run."""
+
+    count: int = 0
+    total_seconds: float = 0
+    p50_seconds: float = 0
+    p95_seconds: float = 0
+    max_seconds: float = 0
+
+
+def get_percentile(sorted_values: List[float], fraction: float) -> float:
+    """Nearest-rank percentile of values sorted in ascending order"""
+    if not sorted_values:
+        return 0
+    index = max(
+        0, min(len(sorted_values) - 1, round(fraction * len(sorted_values)) - 1)
+    )
+    return sorted_values[index]
+
+
+class RunMetrics:
+    """
+    Thread-safe timers and counters for one agent run. Every time a stage runs
+    its duration is recorded, so the report has the distribution of each stage
+    and not only its total.
+
+    Code deep in the pipeline gets the metrics of the run it's part of with
+    get_run_metrics, so they don't have to be passed around.
+
+    Usage:
+        run_metrics = start_run_metrics(run_id)
+        with get_run_metrics().timer("scrape_page"):
+            ...
+        get_run_metrics().increment("pages_fetched")
+        await run_metrics.publish_report()
+    """
+
+    def __init__(self, run_id: Optional[str] = None):
+        self.run_id = run_id
+        self._lock = threading.Lock()
+        self._started_at = time.monotonic()
+        self._durations: Dict[str, List[float]] = defaultdict(list)
+        self._counters: Dict[str, int] = defaultdict(int)
+        # Cache operations made by the run, recorded by InstrumentedCacheBackend
+        self.cache_metrics = CacheMetrics()
+
+    @contextmanager
+    def timer(self, stage: str) -> Iterator[None]:
+        """Time the code in the with block as one run of the stage"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(stage, time.perf_counter() - start)
+
+    def observe(self, stage: str, seconds: float) -> None:
+        with self._lock:
+            self._durations[stage].append(seconds)
+
+    def increment(self, counter: str, amount: int = 1) -> None:
+        with self._lock:
+            self._counters[counter] += amount
+
+    def get_counter(self, counter: str) -> int:
+        with self._lock:
+            return self._counters.get(counter, 0)
+
+    def get_stage_stats(self) -> Dict[str, StageStats]:
+        with self._lock:
+            durations = {
+                stage: sorted(values) for stage, values in self._durations.items()
+            }
+
+        return {
+            stage: StageStats(
+                count=len(values),
+                total_seconds=round(sum(values), 3),
+                p50_seconds=round(get_percentile(values, 0.5), 3),
+                p95_seconds=round(get_percentile(values, 0.95), 3),
+                max_seconds=round(values[-1], 3),
+            )
+            for stage, values in sorted(durations.items())
+        }
+
+    def get_report(self) -> Dict[str, Any]:
+        """
+        Build the report of the run: its duration, the stats of every stage,
+        the counters and the counters of the cache operations it made.
+        """
+        with self._lock:
+            counters = dict(sorted(self._counters.items()))
+
+        return {
+            "run_id": self.run_id,
+            "total_seconds": round(time.monotonic() - self._started_at, 3),
+            "stages": {
+                stage: stats.model_dump()
+                for stage, stats in self.get_stage_stats().items()
+            },
+            "counters": counters,
+            "cache": {
+                namespace: stats.model_dump(exclude={"operations", "total_latency_ms"})
+                for namespace, stats in self.cache_metrics.snapshot().items()
+            },
+        }
+
+    async def publish_report(self) -> None:
+        """Log the report as a single JSON line and hand it to the report hooks"""
+        report = self.get_report()
+        logger.info(f"Run report: {json.dumps(report)}")
+
+        for hook in _report_hooks:
+            try:
+                await hook(report)
+            except Exception as e:
+                logger.error(f"Error in run report hook: {e}")
+
+
+_report_hooks: List[ReportHook] = []
+
+# Metrics of the run the current task is part of. Tasks inherit it from the
+# task that created them, so concurrent runs each see their own.
+_current_run_metrics: ContextVar[Optional[RunMetrics]] = ContextVar(
+    "current_run_metrics", default=None
+)
+
+# Collects whatever is recorded outside of a run, e.g. by the API
+_default_run_metrics = RunMetrics()
+
+
+def add_report_hook(hook: ReportHook) -> None:
+    """Register a function to call with every run report, e.g. to persist it"""
+    _report_hooks.append(hook)
+
+
+def start_run_metrics(run_id: Optional[str] = None) -> RunMetrics:
+    """Start collecting the metrics of a new run in the current task"""
+    run_metrics = RunMetrics(run_id)
+    _current_run_metrics.set(run_metrics)
+    return run_metrics
+
+
+def get_run_metrics() -> RunMetrics:
+    """Get the metrics of the run the current task is part of"""
+    return _current_run_metrics.get() or _default_run_metrics
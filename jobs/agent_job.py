@@ -1,7 +1,10 @@
 #!/usr/bin/env python3
 """
 Agent Job for Google Cloud Run Jobs.
-This job executes the event finding agent directly.
+This job executes the event finding agent directly, either for one user or
+for a batch of users sharing one browser and cache. When the execution has
+several tasks, a single user's run is sharded across them and a batch is split
+between them.
 """
 
 import argparse
@@ -13,7 +16,9 @@ from datetime import datetime
 
 # Import the agent function directly
 from core.logging_config import setup_logging
-from services.agent.agent import agent
+from schemas.agent_run_model import AgentRun
+from services.agent.agent import agent_batch
+from services.agent.sharded_agent import sharded_agent
 from utils.user_profile_utils import convert_from_json_to_user_profile
 
 # Set up logging configuration
@@ -37,9 +42,66 @@ parser.add_argument(
 )
 parser.add_argument("--user_profile", type=str, help="User profile JSON")
 parser.add_argument("--user_id", type=str, help="User ID")
+parser.add_argument(
+    "--run_id",
+    type=str,
+    help="Run ID to checkpoint under, defaults to the Cloud Run execution",
+)
+parser.add_argument(
+    "--users",
+    type=str,
+    help=(
+        "JSON list of users to run as one batch, each with user_id, "
+        "user_profile and optionally only_highly_relevant and run_id"
+    ),
+)
 
 args = parser.parse_args()
 
+task_index = int(os.environ.get("CLOUD_RUN_TASK_INDEX", "0"))
+task_count = int(os.environ.get("CLOUD_RUN_TASK_COUNT", "1"))
+execution_id = os.environ.get("CLOUD_RUN_EXECUTION", "local")
+
+if args.users:
+    print("\n" + "=" * 30)
+    print("EXECUTING AGENT BATCH")
+    print("=" * 30)
+
+    try:
+        runs = []
+        for run in json.loads(args.users):
+            # Key each user's checkpoint by the execution, so a retry of the
+            # task resumes it, unless the run comes with its own ID
+            if "run_id" not in run and "CLOUD_RUN_EXECUTION" in os.environ:
+                run["run_id"] = f"{execution_id}:{run['user_id']}"
+            runs.append(AgentRun(**run))
+    except Exception as e:
+        print(f"ERROR: Could not parse users: {e}")
+        sys.exit(1)
+
+    # Each task takes its own share of the users
+    runs = runs[task_index::task_count]
+    print(f"Users in batch: {[run.user_id for run in runs]}")
+
+    try:
+        results = asyncio.run(agent_batch(runs))
+    except Exception as e:
+        print(f"ERROR: Agent batch execution failed: {e}")
+        sys.exit(1)
+
+    failed_user_ids = [user_id for user_id, ok in results.items() if not ok]
+    print(f"Agent batch completed: {len(runs) - len(failed_user_ids)} succeeded")
+    if failed_user_ids:
+        # Failed runs were already reverted, and failing the job would make
+        # Cloud Run retry it and email the other users twice
+        print(f"ERROR: Agent execution failed for users: {failed_user_ids}")
+
+    print("\n" + "=" * 50)
+    print("AGENT JOB COMPLETED SUCCESSFULLY")
+    print("=" * 50)
+
+    sys.exit(0)
+
 print("\n" + "=" * 30)
 print("PARAMETERS FROM API")
 print("=" * 30)
@@ -81,11 +143,26 @@ print("EXECUTING AGENT")
 print("=" * 30)
 
 try:
-    # Run the agent function directly
-    asyncio.run(agent(user_profile, user_id, only_highly_relevant_bool))
+    # Runs the agent directly when the execution has a single task
+    asyncio.run(
+        sharded_agent(
+            user_profile,
+            user_id,
+            only_highly_relevant_bool,
+            execution_id=execution_id,
+            task_index=task_index,
+            task_count=task_count,
+            # Retries of the task run in the same execution, so they resume
+            # from the checkpoint of the attempt that failed
+            run_id=args.run_id or os.environ.get("CLOUD_RUN_EXECUTION"),
+        )
+    )
     print("Agent execution completed successfully")
 except Exception as e:
+    # Failing the task makes Cloud Run retry it, the run is only reverted once
+    # the last attempt fails
     print(f"ERROR: Agent execution failed: {e}")
+    print(f"Task attempt: {os.environ.get('CLOUD_RUN_TASK_ATTEMPT', '0')}")
     sys.exit(1)
 
 print("\n" + "=" * 50)
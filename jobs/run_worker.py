@@ -0,0 +1,38 @@
+#!/usr/bin/env python3
+"""
+Run Worker.
+Long-lived process that takes agent runs off the run queue and processes them
+with a warm browser, instead of a Cloud Run Jobs execution per run.
+"""
+
+import asyncio
+import signal
+
+from core.browser_manager import browser_manager
+from core.config import settings
+from core.logging_config import get_logger, setup_logging
+from services.agent.run_worker import RunWorker
+from services.runs.run_queue import run_queue
+
+setup_logging(log_level=settings.LOG_LEVEL)
+
+logger = get_logger(__name__)
+
+
+async def main():
+    await browser_manager.start()
+    worker = RunWorker(run_queue, browser_manager)
+
+    # Finish the runs in flight before exiting when the platform stops us
+    loop = asyncio.get_running_loop()
+    for signal_number in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(signal_number, worker.stop)
+
+    try:
+        await worker.run()
+    finally:
+        await browser_manager.stop()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
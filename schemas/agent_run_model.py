@@ -0,0 +1,81 @@
+from typing import Dict, List, Literal, Optional
+from uuid import uuid4
+
+from pydantic import BaseModel, Field
+
+from schemas.event_model import EventResult, PreparedEvent
+from schemas.user_profile_model import UserProfile
+
+
+class AgentRun(BaseModel):
+    """A user the agent should find events for, and how to filter them."""
+
+    user_id: str
+    user_profile: UserProfile
+    only_highly_relevant: bool = False
+    # Identifies the run across retries, so a retry can resume its checkpoint
+    run_id: str = Field(default_factory=lambda: uuid4().hex)
+
+
+class QueuedRun(AgentRun):
+    """An agent run waiting in the run queue for a worker to pick it up."""
+
+    # Times a worker already tried the run and failed
+    attempts: int = 0
+    # Unix time a worker claimed the run at, None while it's waiting
+    claimed_at: Optional[float] = None
+
+
+class ShardLinks(BaseModel):
+    """The links task 0 of a sharded run found, for every task to check its share."""
+
+    event_links: List[str] = []
+    # Links skipped as duplicates while searching, to the link kept instead
+    duplicates: Dict[str, str] = {}
+
+
+class ShardResult(BaseModel):
+    """The part of a sharded run one Cloud Run task evaluated."""
+
+    events: List[EventResult] = []
+    # MinHash signatures of the events' pages, for task 0 to find the copies
+    # of an event that other shards kept
+    signatures: Dict[str, List[int]] = {}
+    # Relevance of every link in the shard, None if it didn't make it to scoring
+    outcomes: Dict[str, Optional[float]] = {}
+    failed: bool = False
+    # Links of the shard the task stopped before checking or scoring
+    unchecked_links: List[str] = []
+
+
+class DiscoveryCheckpoint(BaseModel):
+    """The links a run found, saved so a resumed run doesn't search again."""
+
+    city: str
+    event_links_by_source: Dict[str, Dict[str, List[str]]]
+    event_links: List[str]
+    # Links skipped as duplicates while searching, to the link kept instead
+    duplicates: Dict[str, str] = {}
+    # Highest relevance each link to check is expected to reach
+    upper_bounds: Dict[str, float] = {}
+    # How likely each link to check is to be disqualified, when known
+    disqualification_rates: Dict[str, float] = {}
+
+
+class LinkCheckpoint(BaseModel):
+    """How checking one link of a run went."""
+
+    status: Literal["prepared", "rejected", "failed"]
+    # Set when the event is compatible and waiting to be scored
+    prepared_event: Optional[PreparedEvent] = None
+    # Set when the event was skipped as a duplicate of another link
+    duplicate_of: Optional[str] = None
+
+
+class EvaluationCheckpoint(BaseModel):
+    """The scored events of a run, saved once scoring is done."""
+
+    events: List[EventResult] = []
+    outcomes: Dict[str, Optional[float]] = {}
+    # Links the run stopped before checking or scoring
+    unchecked_links: List[str] = []
@@ -0,0 +1,47 @@
+from typing import Literal, Optional
+
+from pydantic import BaseModel
+
+from schemas.bias_options import event_format_options
+from schemas.event_model import EventDetails
+
+
+class EventCandidate(BaseModel):
+    """
+    An event link found on a search or listing page, together with whatever the
+    listing already says about the event. Every field but the URL is optional
+    since each source shows different details.
+    """
+
+    url: str
+    source: str
+    title: Optional[str] = None
+    date_of_event: Optional[str] = None  # DD-MM-YYYY
+    start_time: Optional[str] = None  # HH:MM
+    end_time: Optional[str] = None  # HH:MM
+    location: Optional[str] = None
+    # Lowest listed price, 0 for free events
+    price_of_event: Optional[float] = None
+    event_format: Optional[list[Literal[event_format_options]]] = None
+    is_sold_out: Optional[bool] = None
+
+    def to_partial_event_details(self) -> EventDetails:
+        """
+        Build event details from the listing data only, for running the checks
+        that don't need the event page. Missing values are None, so checks skip
+        them the same way they skip details missing from the page.
+        """
+        return EventDetails.model_construct(
+            title=self.title or "",
+            age_range=None,
+            gender_bias=None,
+            sexual_orientation_bias=None,
+            relationship_status_bias=None,
+            date_of_event=self.date_of_event,
+            start_time=self.start_time,
+            end_time=self.end_time,
+            location_of_event=None,
+            price_of_event=self.price_of_event,
+            event_format=self.event_format,
+            is_sold_out=self.is_sold_out,
+        )
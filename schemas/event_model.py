@@ -20,6 +20,16 @@ class AgeRange(BaseModel):
     max_age: Optional[int] = None
 
 
+class EventAudienceProfile(BaseModel):
+    """Who an event is for, which is the same for every user checking it."""
+
+    topics: list[str] = []
+    audience: Optional[str] = None
+    is_professional_networking: bool = False
+    industry_focus: Optional[str] = None
+    nationality_or_ethnic_group: Optional[str] = None
+
+
 class EventDetails(BaseModel):
     title: str
     age_range: Optional[AgeRange] = None
@@ -33,6 +43,18 @@ class EventDetails(BaseModel):
     price_of_event: Union[float, int]
     event_format: Optional[list[Literal[event_format_options]]] = None
     is_sold_out: Optional[bool] = None
+    audience_profile: Optional[EventAudienceProfile] = None
+
+
+class PreparedEvent(BaseModel):
+    """An event that passed every check and only needs relevance scoring."""
+
+    event_url: str
+    event_details: EventDetails
+    webpage_content: Optional[str] = None
+    # Relevance of the event from the LLM's answers for its page, got while the
+    # details were being extracted
+    speculative_relevance: Optional[float] = None
 
 
 class EventResult(BaseModel):
@@ -0,0 +1,58 @@
+from typing import Dict, List, Optional
+
+from pydantic import BaseModel, Field
+
+EVENTBRITE_SOURCE = "eventbrite"
+MEETUP_SOURCE = "meetup"
+LUMA_SOURCE = "luma"
+
+# Luma lists events per city without a keyword search
+CITY_LISTING_KEYWORD = "*"
+
+
+class KeywordYieldStats(BaseModel):
+    """Accumulated yield of one keyword on one source in one city."""
+
+    runs: int = Field(
+        default=0, description="Number of runs the keyword was scraped in"
+    )
+    links: int = Field(default=0, description="Links returned by the keyword")
+    unique_links: int = Field(
+        default=0, description="Links no other keyword or source found in the same run"
+    )
+    survived_links: int = Field(
+        default=0, description="Links that passed extraction and disqualification"
+    )
+    relevance_sum: float = Field(
+        default=0, description="Sum of the relevance of the links that survived"
+    )
+    max_relevance: Optional[float] = Field(
+        default=None,
+        description="Highest relevance of a link that survived, None until recorded",
+    )
+    shared_links: Dict[str, int] = Field(
+        default_factory=dict,
+        description="Links also found by each other keyword on the same source",
+    )
+
+    @property
+    def survival_rate(self) -> float:
+        return self.survived_links / self.links if self.links else 0
+
+    @property
+    def unique_rate(self) -> float:
+        return self.unique_links / self.links if self.links else 0
+
+    @property
+    def average_relevance(self) -> float:
+        return self.relevance_sum / self.survived_links if self.survived_links else 0
+
+
+class ScrapePlan(BaseModel):
+    """Which keywords to search for and how many events to take per source."""
+
+    eventbrite_keywords: List[str] = Field(default_factory=list)
+    meetup_keywords: List[str] = Field(default_factory=list)
+    eventbrite_regular_count: int = 5
+    meetup_max_events: int = 5
+    luma_max_events: int = 40
@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""
+Benchmark the scrap_page text extraction modes against each other.
+
+For every URL the page is loaded once per mode and the extraction step alone is
+measured: wall time, browser CPU time (Chrome's TaskDuration metric, which covers
+script, style recalculation and layout) and the length of the returned text.
+
+Usage:
+    python -m scripts.benchmark_scrap_page https://lu.ma/xyz https://www.meetup.com/...
+"""
+
+import argparse
+import asyncio
+import statistics
+import time
+from typing import get_args
+
+from playwright.async_api import Browser, async_playwright
+
+from core.browser_config import BrowserConfig
+from services.scrapping.scrap_web_page import ExtractionMode, extract_page_text
+
+
+async def get_task_duration(cdp_session) -> float:
+    response = await cdp_session.send("Performance.getMetrics")
+    metrics = {metric["name"]: metric["value"] for metric in response["metrics"]}
+    return float(metrics.get("TaskDuration", 0.0))
+
+
+async def benchmark_mode(
+    browser: Browser, url: str, mode: ExtractionMode, runs: int
+) -> dict:
+    wall_times = []
+    cpu_times = []
+    lengths = []
+
+    for _ in range(runs):
+        page = await browser.new_page()
+        try:
+            await page.goto(url)
+            await page.wait_for_load_state("domcontentloaded")
+            await page.wait_for_timeout(250)
+
+            cdp_session = await page.context.new_cdp_session(page)
+            await cdp_session.send("Performance.enable")
+
+            cpu_before = await get_task_duration(cdp_session)
+            start = time.perf_counter()
+            text = await extract_page_text(page, mode)
+            wall_times.append(time.perf_counter() - start)
+            cpu_times.append(await get_task_duration(cdp_session) - cpu_before)
+            lengths.append(len(text))
+        finally:
+            await page.close()
+
+    return {
+        "wall_ms": statistics.median(wall_times) * 1000,
+        "browser_cpu_ms": statistics.median(cpu_times) * 1000,
+        "chars": int(statistics.median(lengths)),
+    }
+
+
+async def main(urls: list[str], runs: int) -> None:
+    playwright = await async_playwright().start()
+    browser = await playwright.chromium.launch(
+        headless=True, args=BrowserConfig.get_browser_args()
+    )
+
+    try:
+        for url in urls:
+            print(f"\n{url}")
+            print(f"{'mode':<14}{'wall ms':>10}{'browser cpu ms':>16}{'chars':>10}")
+            for mode in get_args(ExtractionMode):
+                result = await benchmark_mode(browser, url, mode, runs)
+                print(
+                    f"{mode:<14}"
+                    f"{result['wall_ms']:>10.1f}"
+                    f"{result['browser_cpu_ms']:>16.1f}"
+                    f"{result['chars']:>10}"
+                )
+    finally:
+        await browser.close()
+        await playwright.stop()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark scrap_page modes")
+    parser.add_argument("urls", nargs="+", help="Event page URLs to benchmark")
+    parser.add_argument("--runs", type=int, default=3, help="Runs per mode and URL")
+    args = parser.parse_args()
+
+    asyncio.run(main(args.urls, args.runs))
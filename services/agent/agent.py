@@ -1,84 +1,1006 @@
-from playwright.async_api import async_playwright
+import asyncio
+import inspect
+import json
+import math
+from typing import Any, Awaitable, Dict, List, Literal, NamedTuple, Optional, Tuple
+
+from playwright.async_api import Browser, async_playwright
 
 from core.browser_config import BrowserConfig
+from core.cache import CacheWriteBuffer, cache
+from core.cache_metrics import cache_metrics
+from core.config import settings
 from core.llm import gemma_3_27b
 from core.logging_config import get_logger
+from core.run_deadline import (
+    RunDeadline,
+    RunDeadlineExceeded,
+    get_run_deadline,
+    start_run_deadline,
+)
+from core.run_metrics import add_report_hook, get_run_metrics, start_run_metrics
+from schemas.agent_run_model import (
+    AgentRun,
+    DiscoveryCheckpoint,
+    EvaluationCheckpoint,
+    LinkCheckpoint,
+)
+from schemas.event_model import EventResult, PreparedEvent
+from schemas.keyword_yield_model import EVENTBRITE_SOURCE, LUMA_SOURCE, MEETUP_SOURCE
 from schemas.user_profile_model import UserProfile
+from services.agent.run_checkpoint import RunCheckpoint
 from services.email.send_email import post_message
-from services.event_processing.check_event import check_event
+from services.event_processing.batch_relevance_scorer import BatchRelevanceScorer
+from services.event_processing.check_event import (
+    get_event_details_cache_key,
+    prepare_event,
+    score_events,
+)
+from services.event_processing.event_disqualifier import EventDisqualifier
+from services.event_processing.event_pre_ranker import EventPreRanker, RankedEvent
+from services.event_processing.event_prioritizer import MAX_RELEVANCE, EventPrioritizer
+from services.event_processing.near_duplicates import (
+    NearDuplicateIndex,
+    sort_by_source_preference,
+)
+from services.event_processing.negative_cache import get_negative_cache_key
+from services.keyword_yield.keyword_yield_service import keyword_yield_service
 from services.runs.user_runs_service import user_run_service
-from services.scrapping.scrappers import get_event_links
+from services.scrapping.scrappers import (
+    flatten_event_candidates,
+    get_event_candidates_by_source,
+    to_event_links_by_source,
+)
 from services.search_words.get_search_words_for_event_sites import (
     get_search_keywords_for_event_sites,
 )
+from utils.cloud_run_utils import is_final_task_attempt
 from utils.email_utils import format_events_for_email
 from utils.event_utils import (
     filter_events_by_relevance,
+    get_relevance_threshold,
     remove_duplicates_based_on_title,
 )
 
 logger = get_logger(__name__)
 
+# Share of the events the pre-ranker keeps that can go to the city listing,
+# which is checked first while the rest is still being searched for
+CITY_LISTING_SCORING_SHARE = 0.5
 
-async def agent(
-    user_profile: UserProfile, user_id: str, only_highly_relevant: bool = False
-):
-    logger.info("Starting agent execution")
-    try:
-        search_keywords = get_search_keywords_for_event_sites(user_profile, gemma_3_27b)
-        logger.info(f"Found {len(search_keywords)} search keywords")
 
-        playwright = await async_playwright().start()
-        browser = await playwright.chromium.launch(
-            headless=True, args=BrowserConfig.get_browser_args()
-        )
+async def save_run_report(report: Dict[str, Any]) -> None:
+    """Keep the run report in the cache, for looking into slow runs later"""
+    run_id = report.get("run_id")
+    if run_id is None:
+        return
+    await cache.set(
+        f"run_report:{run_id}", json.dumps(report), settings.RUN_REPORT_TTL_SECONDS
+    )
+
+
+if settings.RUN_REPORT_PERSIST:
+    add_report_hook(save_run_report)
+
+
+class DiscoveredEvents(NamedTuple):
+    city: str
+    # Links found per source and keyword, for the keyword yield stats
+    event_links_by_source: Dict[str, Dict[str, List[str]]]
+    # Links left to check after dropping the ones the search results rule out,
+    # most promising first
+    event_links: List[str]
+    duplicate_index: NearDuplicateIndex
+    # Highest relevance each link to check is expected to reach
+    upper_bounds: Dict[str, float]
+    # How likely each link to check is to be disqualified, for the links whose
+    # keywords have trusted stats
+    disqualification_rates: Dict[str, float]
+
+
+class EvaluatedEvents(NamedTuple):
+    events: List[EventResult]
+    # Relevance of every checked link, None if it didn't make it to scoring
+    outcomes: Dict[str, Optional[float]]
+    # Links the run stopped before checking or scoring, because it ran out of
+    # time, stopped early or the pre-ranker dropped them, and their duplicates
+    unchecked_links: List[str]
+
 
-        event_links = await get_event_links(
+async def get_run_search_keywords(
+    user_profile: UserProfile, checkpoint: Optional[RunCheckpoint] = None
+) -> List[str]:
+    """Generate the search keywords of the run, unless they're saved already"""
+    search_keywords = None
+    if checkpoint is not None:
+        search_keywords = await checkpoint.load_keywords()
+    if search_keywords is None:
+        with get_run_metrics().timer("keyword_generation"):
+            search_keywords = await get_search_keywords_for_event_sites(
+                user_profile, gemma_3_27b
+            )
+        if checkpoint is not None:
+            await checkpoint.save_keywords(search_keywords)
+    logger.info(f"Found {len(search_keywords)} search keywords")
+    return search_keywords
+
+
+async def discover_event_links(
+    user_profile: UserProfile,
+    browser: Browser,
+    checkpoint: Optional[RunCheckpoint] = None,
+    search_keywords: Optional[List[str]] = None,
+    sources: Optional[List[str]] = None,
+    duplicate_index: Optional[NearDuplicateIndex] = None,
+) -> DiscoveredEvents:
+    """
+    Search the event sites for the user and keep the links worth checking.
+
+    Args:
+        user_profile: Profile of the user to find events for
+        browser: Browser to scrape search results with
+        checkpoint: Progress of the run, the search is skipped if it's saved
+        search_keywords: Keywords to search Eventbrite and Meetup for, they're
+            generated if None and one of them is searched
+        sources: Sources to search, every one if None
+        duplicate_index: Events already seen in this run, a new index if None
+
+    Returns:
+        The links to check, with the index of the duplicates already skipped
+    """
+    if sources is None:
+        sources = [EVENTBRITE_SOURCE, MEETUP_SOURCE, LUMA_SOURCE]
+    if duplicate_index is None:
+        duplicate_index = NearDuplicateIndex()
+
+    if checkpoint is not None:
+        discovery = await checkpoint.load_discovery()
+        if discovery is not None:
+            logger.info(f"Resuming with {len(discovery.event_links)} saved links")
+            duplicate_index.duplicates.update(discovery.duplicates)
+            return DiscoveredEvents(
+                discovery.city,
+                discovery.event_links_by_source,
+                discovery.event_links,
+                duplicate_index,
+                discovery.upper_bounds,
+                discovery.disqualification_rates,
+            )
+
+    run_metrics = get_run_metrics()
+    if search_keywords is None:
+        if EVENTBRITE_SOURCE in sources or MEETUP_SOURCE in sources:
+            search_keywords = await get_run_search_keywords(user_profile, checkpoint)
+        else:
+            search_keywords = []
+
+    city = user_profile.location.city or ""
+    scrape_plan = await keyword_yield_service.plan_scrape(search_keywords, city)
+
+    search_timeout = get_run_deadline().get_timeout(
+        settings.AGENT_SEARCH_TIMEOUT_SECONDS
+    )
+    with run_metrics.timer("search"):
+        candidates_by_source = await get_event_candidates_by_source(
             search_keywords=search_keywords,
-            luma=True,
-            eventbrite=True,
-            meetup=True,
+            luma=LUMA_SOURCE in sources,
+            eventbrite=EVENTBRITE_SOURCE in sources,
+            meetup=MEETUP_SOURCE in sources,
             country=user_profile.location.country,
             country_code=user_profile.location.country_code,
             city=user_profile.location.city,
             browser=browser,
+            scrape_plan=scrape_plan,
+            timeout=search_timeout,
         )
+    event_links_by_source = to_event_links_by_source(candidates_by_source)
+    candidates = {
+        candidate.url: candidate
+        for candidate in flatten_event_candidates(candidates_by_source)
+    }
 
-        events = []
-        for event_link in event_links:
-            try:
-                event_details = await check_event(
-                    event_link, user_profile, gemma_3_27b, browser
-                )
-                if event_details is not None:
-                    events.append(event_details)
-            except Exception as e:
-                logger.error(f"Error checking event: {e}")
+    # Drop events the search results already rule out, and cross-posted
+    # copies whose listing shows the same title and date, before scraping
+    event_disqualifier = EventDisqualifier(user_profile)
+    event_links = []
+    # Cross-posted events keep the link of the first source they're seen on
+    for event_link in sort_by_source_preference(candidates):
+        candidate = candidates[event_link]
+        if not event_disqualifier.check_candidate(candidate):
+            continue
+        if candidate.title and candidate.date_of_event:
+            # Only events that pass disqualification are added, once checked
+            duplicate_of = duplicate_index.find_title_duplicate(
+                event_link, candidate.title, candidate.date_of_event
+            )
+            if duplicate_of is not None:
+                continue
+        event_links.append(event_link)
+
+    # Check the most promising events first, so a run that stops early or runs
+    # out of time has checked the ones most likely to be sent
+    event_prioritizer = EventPrioritizer(
+        user_profile,
+        await keyword_yield_service.get_link_stats(city, event_links_by_source),
+    )
+    event_links = [
+        candidate.url
+        for candidate in event_prioritizer.prioritize(
+            [candidates[event_link] for event_link in event_links]
+        )
+    ]
+    upper_bounds = {
+        event_link: event_prioritizer.get_upper_bound(event_link)
+        for event_link in event_links
+    }
+    disqualification_rates = {}
+    for event_link in event_links:
+        disqualification_rate = event_prioritizer.get_disqualification_rate(event_link)
+        if disqualification_rate is not None:
+            disqualification_rates[event_link] = disqualification_rate
+    logger.info(f"Checking {len(event_links)} of {len(candidates)} events found")
+    run_metrics.increment("links_found", len(candidates))
+    run_metrics.increment("links_to_check", len(event_links))
+
+    if checkpoint is not None:
+        await checkpoint.save_discovery(
+            DiscoveryCheckpoint(
+                city=city,
+                event_links_by_source=event_links_by_source,
+                event_links=event_links,
+                duplicates=duplicate_index.duplicates,
+                upper_bounds=upper_bounds,
+                disqualification_rates=disqualification_rates,
+            )
+        )
+
+    return DiscoveredEvents(
+        city,
+        event_links_by_source,
+        event_links,
+        duplicate_index,
+        upper_bounds,
+        disqualification_rates,
+    )
 
-        events = sorted(events, key=lambda x: x.relevance, reverse=True)
-        events = remove_duplicates_based_on_title(events)
-        events = filter_events_by_relevance(events, only_highly_relevant)
 
-        for event in events:
+async def evaluate_event_links(
+    event_links: List[str],
+    user_profile: UserProfile,
+    browser: Browser,
+    only_highly_relevant: bool = False,
+    duplicate_index: Optional[NearDuplicateIndex] = None,
+    scraped_pages: Optional[Dict[str, str]] = None,
+    pre_ranker_top_k: Optional[int] = None,
+    checkpoint: Optional[RunCheckpoint] = None,
+    upper_bounds: Optional[Dict[str, float]] = None,
+    disqualification_rates: Optional[Dict[str, float]] = None,
+    found_events: Optional[List[EventResult]] = None,
+    batch_scorer: Optional[BatchRelevanceScorer] = None,
+) -> EvaluatedEvents:
+    """
+    Check the events behind the links and score the compatible ones. Once the
+    run's deadline is nearly spent no more links are checked, and the events
+    found so far are scored, most promising first.
+
+    With upper bounds, the links are checked and scored a wave at a time, in
+    the order given, and the rest are skipped once EARLY_STOP_TOP_K events pass
+    the relevance threshold and none of the links left is expected to beat
+    them.
+
+    Args:
+        event_links: Links of the events to check, most promising first
+        user_profile: Profile of the user to check the events for
+        browser: Browser to scrape the event pages with
+        only_highly_relevant: Whether only highly relevant events will be sent,
+            used as the relevance threshold of the early stop and of the
+            pre-ranker recall report
+        duplicate_index: Events already seen in this run, a new index if None
+        scraped_pages: Event pages already scraped in this job, shared between
+            the users of a batch
+        pre_ranker_top_k: How many events the pre-ranker keeps, the configured
+            number if None
+        checkpoint: Progress of the run. Links it has a result for aren't
+            checked again, and scoring is skipped if its result is saved.
+        upper_bounds: Highest relevance each link is expected to reach, checks
+            every link if None
+        disqualification_rates: How likely each link is to be disqualified,
+            links that are likely enough to survive are scored speculatively
+            when RELEVANCE_SPECULATION_ENABLED
+        found_events: Events the run already scored, counted towards the
+            events the early stop waits for
+        batch_scorer: Scorer of the batch job the run is part of, scores the
+            events for the batch's other users at the same time
+
+    Returns:
+        The scored events, the outcome of every link and the links left
+        unchecked or unscored
+    """
+    if checkpoint is not None:
+        evaluation = await checkpoint.load_evaluation()
+        if evaluation is not None:
+            logger.info("Resuming with saved scored events")
+            return EvaluatedEvents(
+                evaluation.events, evaluation.outcomes, evaluation.unchecked_links
+            )
+
+    if duplicate_index is None:
+        duplicate_index = NearDuplicateIndex()
+
+    run_metrics = get_run_metrics()
+    deadline = get_run_deadline()
+    prepared_events = []
+    saved_links = {}
+    if checkpoint is not None:
+        saved_links = await checkpoint.load_links(event_links)
+        if saved_links:
             logger.info(
-                (
-                    f"Event: {event.event_details.title} - "
-                    f"Link: {event.event_url} - "
-                    f"Relevance: {event.relevance}\n"
+                f"Resuming with {len(saved_links)} of {len(event_links)} "
+                "events already checked"
+            )
+    for event_link, saved_link in saved_links.items():
+        if saved_link.duplicate_of is not None:
+            duplicate_index.duplicates[event_link] = saved_link.duplicate_of
+        prepared_event = saved_link.prepared_event
+        if prepared_event is not None:
+            # Put the event back in the index so its duplicates are still found
+            duplicate_index.check_event(
+                event_link,
+                prepared_event.webpage_content,
+                prepared_event.event_details.title,
+                prepared_event.event_details.date_of_event,
+            )
+            prepared_events.append(prepared_event)
+    event_links_to_check = [link for link in event_links if link not in saved_links]
+
+    # Look up every candidate in one round trip instead of one per event
+    cache_keys = [
+        cache_key
+        for link in event_links_to_check
+        for cache_key in (
+            get_negative_cache_key(link),
+            get_event_details_cache_key(link),
+        )
+    ]
+    try:
+        with run_metrics.timer("cache_prefetch"):
+            prefetched_cache = dict(zip(cache_keys, await cache.mget(cache_keys)))
+    except Exception as e:
+        logger.error(f"Error prefetching cached event details: {e}")
+        prefetched_cache = {}
+    cache_writer = CacheWriteBuffer(cache)
+
+    # Only send the events that overlap most with the user's profile to the
+    # LLM for relevance scoring
+    pre_ranker = EventPreRanker(user_profile, top_k=pre_ranker_top_k)
+    pre_ranker_cutoff = settings.PRE_RANKER_ENABLED and not settings.PRE_RANKER_AUDIT
+    scoring_budget = pre_ranker.top_k
+    speculations_before = run_metrics.get_counter("speculative_scores_started")
+
+    # The pre-ranker recall report needs every event scored, and the cutoff
+    # needs every event checked to pick the ones to score out of all of them
+    early_stop = (
+        upper_bounds is not None
+        and settings.EARLY_STOP_ENABLED
+        and not settings.PRE_RANKER_AUDIT
+        and not pre_ranker_cutoff
+    )
+    wave_size = (
+        settings.EARLY_STOP_WAVE_SIZE if early_stop else len(event_links_to_check)
+    )
+    relevance_threshold = get_relevance_threshold(only_highly_relevant)
+
+    outcomes: Dict[str, Optional[float]] = {link: None for link in event_links}
+    events: List[EventResult] = []
+    ranked_events: List[RankedEvent] = []
+    links_left = event_links_to_check
+    # Checked events that weren't scored, they don't count as misses
+    unscored_links: List[str] = []
+    events_prepared = len(prepared_events)
+    stopped_early = False
+    deadline_exceeded = False
+    try:
+        while True:
+            wave, links_left = links_left[:wave_size], links_left[wave_size:]
+            for index, event_link in enumerate(wave):
+                if deadline.is_nearly_spent():
+                    links_left = wave[index:] + links_left
+                    logger.error(
+                        f"Run deadline nearly spent, leaving {len(links_left)} "
+                        "events unchecked"
+                    )
+                    run_metrics.increment("events_unchecked", len(links_left))
+                    break
+
+                status: Literal["prepared", "rejected", "failed"] = "failed"
+                prepared_event = None
+                # Speculative scores come out of the pre-ranker's budget too
+                speculate = (
+                    scoring_budget > 0 or not pre_ranker_cutoff
+                ) and should_speculate(event_link, disqualification_rates or {})
+                try:
+                    with run_metrics.timer("check_event"):
+                        prepared_event = await asyncio.wait_for(
+                            prepare_event(
+                                event_link,
+                                user_profile,
+                                gemma_3_27b,
+                                browser,
+                                prefetched_cache=prefetched_cache,
+                                cache_writer=cache_writer,
+                                duplicate_index=duplicate_index,
+                                scraped_pages=scraped_pages,
+                                speculate=speculate,
+                            ),
+                            deadline.get_timeout(settings.AGENT_EVENT_TIMEOUT_SECONDS),
+                        )
+                    if prepared_event is not None:
+                        prepared_events.append(prepared_event)
+                        events_prepared += 1
+                    status = "prepared" if prepared_event is not None else "rejected"
+                except asyncio.TimeoutError:
+                    logger.error(f"Checking event timed out: {event_link}")
+                    run_metrics.increment("check_event_timeouts")
+                except RunDeadlineExceeded as e:
+                    links_left = wave[index:] + links_left
+                    logger.error(
+                        f"Stopping event checks, leaving {len(links_left)} "
+                        f"events unchecked: {e}"
+                    )
+                    run_metrics.increment("events_unchecked", len(links_left))
+                    deadline_exceeded = True
+                    break
+                except Exception as e:
+                    logger.error(f"Error checking event: {e}")
+                    run_metrics.increment("check_event_failures")
+
+                # Every speculative score is an LLM call of its own, made
+                # whether or not the event is then kept
+                speculations = run_metrics.get_counter("speculative_scores_started")
+                scoring_budget -= speculations - speculations_before
+                speculations_before = speculations
+
+                if checkpoint is not None:
+                    await checkpoint.save_link(
+                        event_link,
+                        LinkCheckpoint(
+                            status=status,
+                            prepared_event=prepared_event,
+                            duplicate_of=duplicate_index.duplicates.get(event_link),
+                        ),
+                    )
+
+            with run_metrics.timer("pre_rank"):
+                ranked_wave = pre_ranker.rank(prepared_events)
+            ranked_events += ranked_wave
+            if pre_ranker_cutoff:
+                events_to_score = EventPreRanker(
+                    user_profile, top_k=scoring_budget
+                ).select(ranked_wave)
+                # Events scored speculatively were paid for when they were
+                # checked, keeping them costs no more LLM calls
+                selected_links = {event.event_url for event in events_to_score}
+                events_to_score += [
+                    event
+                    for event in prepared_events
+                    if event.speculative_relevance is not None
+                    and event.event_url not in selected_links
+                ]
+                selected_links = {event.event_url for event in events_to_score}
+                unscored_links += [
+                    event.event_url
+                    for event in prepared_events
+                    if event.event_url not in selected_links
+                ]
+            else:
+                events_to_score = prepared_events
+            scoring_budget -= sum(
+                1 for event in events_to_score if event.speculative_relevance is None
+            )
+            prepared_events = []
+
+            with run_metrics.timer("relevance_scoring"):
+                # The LLM calls are blocking, keep them off the event loop
+                scored_events = await asyncio.to_thread(
+                    score_events_until_deadline,
+                    events_to_score,
+                    user_profile,
+                    batch_scorer,
                 )
+            events += scored_events
+            if len(scored_events) < len(events_to_score):
+                # Out of time, the events left unscored count as unchecked
+                unscored_links += [
+                    event.event_url for event in events_to_score[len(scored_events) :]
+                ]
+                break
+
+            if not links_left or deadline_exceeded or deadline.is_nearly_spent():
+                break
+            if early_stop and _can_stop_early(
+                (found_events or []) + events,
+                links_left,
+                upper_bounds or {},
+                relevance_threshold,
+            ):
+                stopped_early = True
+                break
+    finally:
+        await cache_writer.flush()
+
+    if stopped_early:
+        logger.info(f"Stopped early, leaving {len(links_left)} events unchecked")
+        run_metrics.increment("events_skipped_early_stop", len(links_left))
+
+    run_metrics.increment("events_prepared", events_prepared)
+    run_metrics.increment("events_scored", len(events))
+    for event in events:
+        outcomes[event.event_url] = event.relevance
+
+    if settings.PRE_RANKER_AUDIT:
+        pre_ranker.log_recall_report(
+            ranked_events,
+            {event.event_url: event.relevance for event in events},
+            relevance_threshold=relevance_threshold,
+        )
+
+    inherit_duplicate_outcomes(outcomes, duplicate_index)
+    unchecked_links = get_unchecked_links(
+        links_left + unscored_links, outcomes, duplicate_index
+    )
+    if checkpoint is not None:
+        await checkpoint.save_evaluation(
+            EvaluationCheckpoint(
+                events=events, outcomes=outcomes, unchecked_links=unchecked_links
             )
+        )
+    return EvaluatedEvents(events, outcomes, unchecked_links)
 
-        html = format_events_for_email(events, user_profile)
+
+def should_speculate(event_link: str, disqualification_rates: Dict[str, float]) -> bool:
+    """
+    Whether to score the event while its details are extracted. That saves the
+    wait for scoring if the event survives and wastes an LLM call if it
+    doesn't, so it's only worth it for links likely enough to survive.
+    """
+    if not settings.RELEVANCE_SPECULATION_ENABLED:
+        return False
+    disqualification_rate = disqualification_rates.get(
+        event_link, settings.RELEVANCE_SPECULATION_DEFAULT_DISQUALIFICATION_RATE
+    )
+    return (
+        disqualification_rate
+        <= settings.RELEVANCE_SPECULATION_MAX_DISQUALIFICATION_RATE
+    )
+
+
+def _can_stop_early(
+    events: List[EventResult],
+    links_left: List[str],
+    upper_bounds: Dict[str, float],
+    relevance_threshold: float,
+) -> bool:
+    """
+    Whether EARLY_STOP_TOP_K events already pass the threshold and none of the
+    links left is expected to score above the lowest of them
+    """
+    top_relevances = sorted(
+        (event.relevance for event in events if event.relevance > relevance_threshold),
+        reverse=True,
+    )[: settings.EARLY_STOP_TOP_K]
+    if len(top_relevances) < settings.EARLY_STOP_TOP_K:
+        return False
+
+    best_possible = max(upper_bounds.get(link, MAX_RELEVANCE) for link in links_left)
+    if best_possible > top_relevances[-1]:
+        return False
+
+    logger.info(
+        f"Found {len(top_relevances)} events scoring {top_relevances[-1]} or more, "
+        f"the {len(links_left)} left can't beat {best_possible}"
+    )
+    return True
+
+
+def score_events_until_deadline(
+    prepared_events: List[PreparedEvent],
+    user_profile: UserProfile,
+    batch_scorer: Optional[BatchRelevanceScorer] = None,
+) -> List[EventResult]:
+    """
+    Score the events a batch at a time, in order, and stop once the run is out
+    of time so the events already scored can still be sent. In a batch job the
+    events are scored through its batch scorer, for the other users too.
+    """
+    deadline = get_run_deadline()
+    batch_size = max(1, settings.RELEVANCE_BATCH_SIZE)
+    events: List[EventResult] = []
+    for start in range(0, len(prepared_events), batch_size):
+        if deadline.is_expired():
+            logger.error("Run deadline reached, stopping relevance scoring")
+            break
+        chunk = prepared_events[start : start + batch_size]
+        try:
+            if batch_scorer is not None:
+                events += batch_scorer.score_events(chunk, gemma_3_27b)
+            else:
+                events += score_events(chunk, user_profile, gemma_3_27b)
+        except RunDeadlineExceeded as e:
+            logger.error(f"Stopping relevance scoring: {e}")
+            break
+
+    if len(events) < len(prepared_events):
+        get_run_metrics().increment(
+            "events_unscored", len(prepared_events) - len(events)
+        )
+    return events
+
+
+def inherit_duplicate_outcomes(
+    outcomes: Dict[str, Optional[float]], duplicate_index: NearDuplicateIndex
+) -> None:
+    """A skipped duplicate was as useful as the event it duplicates"""
+    for event_link, duplicate_of in duplicate_index.duplicates.items():
+        outcomes[event_link] = outcomes.get(duplicate_of)
+
+
+def get_unchecked_links(
+    unchecked_links: List[str],
+    outcomes: Dict[str, Optional[float]],
+    duplicate_index: NearDuplicateIndex,
+) -> List[str]:
+    """
+    The links left unchecked or unscored, with the duplicates of those links
+    among the ones the outcomes are for, as their outcome is unknown too
+    """
+    unchecked = set(unchecked_links)
+    return unchecked_links + [
+        event_link
+        for event_link, duplicate_of in duplicate_index.duplicates.items()
+        if duplicate_of in unchecked and event_link in outcomes
+    ]
+
+
+def send_events(
+    events: List[EventResult], user_profile: UserProfile, only_highly_relevant: bool
+) -> None:
+    """Rank, dedupe and filter the scored events and email them to the user"""
+    events = sorted(events, key=lambda x: x.relevance, reverse=True)
+    events = remove_duplicates_based_on_title(events)
+    events = filter_events_by_relevance(events, only_highly_relevant)
+
+    for event in events:
+        logger.info(
+            (
+                f"Event: {event.event_details.title} - "
+                f"Link: {event.event_url} - "
+                f"Relevance: {event.relevance}\n"
+            )
+        )
+
+    html = format_events_for_email(events, user_profile)
+    with get_run_metrics().timer("email"):
         post_message(
             user_profile.email,
             "Events specifically picked for you! 🤩",
             html,
         )
+    get_run_metrics().increment("events_sent", len(events))
+
+
+async def _resolve_browser(browser: Browser | Awaitable[Browser]) -> Browser:
+    if inspect.isawaitable(browser):
+        return await browser
+    return browser
+
+
+async def discover_and_evaluate_overlapped(
+    user_profile: UserProfile,
+    browser: Browser | Awaitable[Browser],
+    only_highly_relevant: bool = False,
+    scraped_pages: Optional[Dict[str, str]] = None,
+    checkpoint: Optional[RunCheckpoint] = None,
+    batch_scorer: Optional[BatchRelevanceScorer] = None,
+) -> Tuple[DiscoveredEvents, EvaluatedEvents]:
+    """
+    Discover and evaluate the events of a run without waiting for the search
+    keywords to start. The keywords are generated while the browser launches
+    and Luma's city listing, which doesn't need them, is searched and its
+    links checked. Eventbrite and Meetup are searched as soon as the keywords
+    arrive, and their links checked once the listing's are.
+
+    The listing's events are scored in a thread, see evaluate_event_links, so
+    the keyword search keeps going meanwhile and its search timeout isn't
+    spent waiting on the event loop.
+
+    Cross-posted events keep the link seen first, so here Luma's link is kept
+    over the other sources'.
+
+    Returns:
+        What was discovered and evaluated, both parts put together
+    """
+    keywords_task = asyncio.create_task(
+        get_run_search_keywords(user_profile, checkpoint)
+    )
+    keyword_discovery: Optional[asyncio.Task] = None
+    listing_checkpoint = keyword_checkpoint = None
+    if checkpoint is not None:
+        listing_checkpoint = checkpoint.get_stage("city_listing")
+        keyword_checkpoint = checkpoint.get_stage("keyword_search")
+
+    try:
+        browser = await _resolve_browser(browser)
+        listing = await discover_event_links(
+            user_profile, browser, listing_checkpoint, sources=[LUMA_SOURCE]
+        )
+
+        async def discover_keyword_links() -> DiscoveredEvents:
+            return await discover_event_links(
+                user_profile,
+                browser,
+                keyword_checkpoint,
+                search_keywords=await keywords_task,
+                sources=[EVENTBRITE_SOURCE, MEETUP_SOURCE],
+                duplicate_index=listing.duplicate_index,
+            )
+
+        keyword_discovery = asyncio.create_task(discover_keyword_links())
+
+        listing_evaluated = await evaluate_event_links(
+            listing.event_links,
+            user_profile,
+            browser,
+            only_highly_relevant,
+            duplicate_index=listing.duplicate_index,
+            scraped_pages=scraped_pages,
+            pre_ranker_top_k=math.ceil(
+                settings.PRE_RANKER_TOP_K * CITY_LISTING_SCORING_SHARE
+            ),
+            checkpoint=listing_checkpoint,
+            upper_bounds=listing.upper_bounds,
+            disqualification_rates=listing.disqualification_rates,
+            batch_scorer=batch_scorer,
+        )
+        keyword_discovered = await keyword_discovery
+        keyword_evaluated = await evaluate_event_links(
+            keyword_discovered.event_links,
+            user_profile,
+            browser,
+            only_highly_relevant,
+            duplicate_index=listing.duplicate_index,
+            scraped_pages=scraped_pages,
+            pre_ranker_top_k=max(
+                0, settings.PRE_RANKER_TOP_K - len(listing_evaluated.events)
+            ),
+            checkpoint=keyword_checkpoint,
+            upper_bounds=keyword_discovered.upper_bounds,
+            disqualification_rates=keyword_discovered.disqualification_rates,
+            found_events=listing_evaluated.events,
+            batch_scorer=batch_scorer,
+        )
+    finally:
+        for task in (keywords_task, keyword_discovery):
+            if task is not None and not task.done():
+                task.cancel()
+
+    discovered = DiscoveredEvents(
+        listing.city,
+        {
+            **listing.event_links_by_source,
+            **keyword_discovered.event_links_by_source,
+        },
+        listing.event_links + keyword_discovered.event_links,
+        listing.duplicate_index,
+        {**listing.upper_bounds, **keyword_discovered.upper_bounds},
+        {
+            **listing.disqualification_rates,
+            **keyword_discovered.disqualification_rates,
+        },
+    )
+    outcomes = {**listing_evaluated.outcomes, **keyword_evaluated.outcomes}
+    # Duplicates can be of an event checked in the other part
+    inherit_duplicate_outcomes(outcomes, listing.duplicate_index)
+    evaluated = EvaluatedEvents(
+        listing_evaluated.events + keyword_evaluated.events,
+        outcomes,
+        listing_evaluated.unchecked_links + keyword_evaluated.unchecked_links,
+    )
+    return discovered, evaluated
+
+
+async def find_events_for_user(
+    user_profile: UserProfile,
+    browser: Browser | Awaitable[Browser],
+    only_highly_relevant: bool = False,
+    scraped_pages: Optional[Dict[str, str]] = None,
+    run_id: Optional[str] = None,
+    batch_scorer: Optional[BatchRelevanceScorer] = None,
+    deadline_seconds: Optional[float] = None,
+) -> None:
+    """
+    Find, check and score events for one user, then email them the results.
+    The run gets deadline_seconds, if it runs short the best events found so
+    far are sent.
+
+    Args:
+        user_profile: Profile of the user to find events for
+        browser: Browser to scrape search results and event pages with, or
+            its launch, so the run can start generating keywords meanwhile
+        only_highly_relevant: Whether to only send highly relevant events
+        scraped_pages: Event pages already scraped in this job, shared between
+            the users of a batch
+        run_id: ID of the run to checkpoint the progress under. A run retried
+            with the same ID resumes from its checkpoint.
+        batch_scorer: Scorer of the batch job the run is part of, the user's
+            run must be started on it
+        deadline_seconds: Budget of the run, AGENT_RUN_DEADLINE_SECONDS if None
+    """
+    run_metrics = start_run_metrics(run_id)
+    start_run_deadline(deadline_seconds)
+    checkpoint = None
+    if run_id is not None and settings.AGENT_CHECKPOINT_ENABLED:
+        checkpoint = RunCheckpoint(run_id)
+
+    try:
+        if settings.AGENT_OVERLAP_KEYWORD_GENERATION:
+            discovered, evaluated = await discover_and_evaluate_overlapped(
+                user_profile,
+                browser,
+                only_highly_relevant,
+                scraped_pages,
+                checkpoint,
+                batch_scorer,
+            )
+        else:
+            browser = await _resolve_browser(browser)
+            discovered = await discover_event_links(user_profile, browser, checkpoint)
+            evaluated = await evaluate_event_links(
+                discovered.event_links,
+                user_profile,
+                browser,
+                only_highly_relevant,
+                duplicate_index=discovered.duplicate_index,
+                scraped_pages=scraped_pages,
+                checkpoint=checkpoint,
+                upper_bounds=discovered.upper_bounds,
+                disqualification_rates=discovered.disqualification_rates,
+                batch_scorer=batch_scorer,
+            )
+
+        await keyword_yield_service.record_run(
+            discovered.city,
+            discovered.event_links_by_source,
+            evaluated.outcomes,
+            unchecked_links=evaluated.unchecked_links,
+        )
+        await asyncio.to_thread(
+            send_events, evaluated.events, user_profile, only_highly_relevant
+        )
+
+        if checkpoint is not None:
+            await checkpoint.clear(discovered.event_links)
+    except Exception:
+        run_metrics.increment("run_failures")
+        raise
+    finally:
+        await run_metrics.publish_report()
+
+
+async def agent(
+    user_profile: UserProfile,
+    user_id: str,
+    only_highly_relevant: bool = False,
+    run_id: Optional[str] = None,
+):
+    logger.info("Starting agent execution")
+    # The job's cache summary only counts its own operations
+    cache_metrics.reset()
+    try:
+        playwright = await async_playwright().start()
+        # The run generates its search keywords while the browser launches
+        browser_launch = asyncio.create_task(
+            playwright.chromium.launch(
+                headless=True, args=BrowserConfig.get_browser_args()
+            )
+        )
+
+        await find_events_for_user(
+            user_profile, browser_launch, only_highly_relevant, run_id=run_id
+        )
     except Exception as e:
         logger.error(f"Error in agent execution: {str(e)}")
-        await user_run_service.revert_user_run(user_id)
+        # Earlier attempts are retried and resume from the checkpoint
+        if is_final_task_attempt():
+            await user_run_service.revert_user_run(user_id)
         raise
     finally:
+        cache_metrics.log_summary()
+        try:
+            if "browser_launch" in locals():
+                browser = await browser_launch
+                await browser.close()
+                logger.info("Browser closed")
+            if "playwright" in locals():
+                await playwright.stop()
+                logger.info("Playwright stopped")
+        except Exception as e:
+            logger.error(f"Error closing browser/playwright: {str(e)}")
+
+
+async def agent_batch(runs: List[AgentRun]) -> Dict[str, bool]:
+    """
+    Run the agent for many users in one job, sharing the browser, the scraped
+    event pages and the cache between them. Extracted details and negative
+    results are written to the cache after each user, so the next users' bulk
+    lookup picks them up instead of calling the LLM again. Events compatible
+    with several of the users still to run are scored for them at once, see
+    BatchRelevanceScorer.
+
+    Users are processed one after the other and a failure only affects its own
+    user: their run is reverted and the batch moves on to the next one. The
+    whole job gets AGENT_RUN_DEADLINE_SECONDS, each user an equal share of the
+    time left when their run starts.
+
+    Args:
+        runs: Users to run the agent for
+
+    Returns:
+        Whether the run succeeded, keyed by user ID
+    """
+    logger.info(f"Starting batch agent execution for {len(runs)} users")
+    results: Dict[str, bool] = {}
+    scraped_pages: Dict[str, str] = {}
+    batch_scorer = BatchRelevanceScorer({run.user_id: run.user_profile for run in runs})
+    job_deadline = RunDeadline(settings.AGENT_RUN_DEADLINE_SECONDS)
+    cache_metrics.reset()
+    try:
+        playwright = await async_playwright().start()
+        browser = await playwright.chromium.launch(
+            headless=True, args=BrowserConfig.get_browser_args()
+        )
+
+        for index, run in enumerate(runs):
+            if job_deadline.is_expired():
+                logger.error(f"Job deadline reached before user {run.user_id} ran")
+                await user_run_service.revert_user_run(run.user_id)
+                results[run.user_id] = False
+                continue
+
+            # Time a user's run doesn't use goes to the users after them
+            remaining_seconds = job_deadline.get_remaining_seconds()
+            deadline_seconds = (
+                remaining_seconds / (len(runs) - index)
+                if remaining_seconds is not None
+                else None
+            )
+            logger.info(f"Starting agent execution for user {run.user_id}")
+            batch_scorer.start_user(run.user_id)
+            try:
+                await find_events_for_user(
+                    run.user_profile,
+                    browser,
+                    run.only_highly_relevant,
+                    scraped_pages=scraped_pages,
+                    run_id=run.run_id,
+                    batch_scorer=batch_scorer,
+                    deadline_seconds=deadline_seconds,
+                )
+                results[run.user_id] = True
+            except Exception as e:
+                logger.error(
+                    f"Error in agent execution for user {run.user_id}: {str(e)}"
+                )
+                await user_run_service.revert_user_run(run.user_id)
+                results[run.user_id] = False
+    except Exception as e:
+        # The browser never started, so none of the remaining users ran
+        logger.error(f"Error in batch agent execution: {str(e)}")
+        for run in runs:
+            if run.user_id not in results:
+                await user_run_service.revert_user_run(run.user_id)
+                results[run.user_id] = False
+    finally:
+        cache_metrics.log_summary()
         try:
             if "browser" in locals():
                 await browser.close()
@@ -88,3 +1010,7 @@ async def agent(
                 logger.info("Playwright stopped")
         except Exception as e:
             logger.error(f"Error closing browser/playwright: {str(e)}")
+
+    succeeded = sum(results.values())
+    logger.info(f"Batch agent execution finished: {succeeded}/{len(runs)} succeeded")
+    return results
@@ -0,0 +1,137 @@
+import json
+from typing import Dict, List, Optional
+
+from core.cache import CacheBackend, cache
+from core.config import settings
+from core.logging_config import get_logger
+from schemas.agent_run_model import (
+    DiscoveryCheckpoint,
+    EvaluationCheckpoint,
+    LinkCheckpoint,
+)
+
+logger = get_logger(__name__)
+
+
+class RunCheckpoint:
+    """
+    Progress of one agent run saved in the cache under its run ID, so a run
+    that is retried after dying halfway picks up where it stopped: the search
+    keywords, the links found, how checking each link went and the scored
+    events.
+
+    Saving and loading never fail the run, a checkpoint that can't be read or
+    written is treated as missing.
+
+    Usage:
+        checkpoint = RunCheckpoint(run_id)
+        keywords = await checkpoint.load_keywords()
+        await checkpoint.save_keywords(["tech meetup"])
+    """
+
+    def __init__(self, run_id: str, backend: CacheBackend = cache):
+        self.run_id = run_id
+        self.backend = backend
+        self._stages: Dict[str, "RunCheckpoint"] = {}
+
+    def get_stage(self, name: str) -> "RunCheckpoint":
+        """
+        Checkpoint of a part of the run that is discovered and evaluated on its
+        own, cleared together with the run's
+        """
+        if name not in self._stages:
+            self._stages[name] = RunCheckpoint(f"{self.run_id}:{name}", self.backend)
+        return self._stages[name]
+
+    def _get_key(self, name: str) -> str:
+        return f"agent_checkpoint:{self.run_id}:{name}"
+
+    def _get_link_key(self, event_link: str) -> str:
+        return self._get_key(f"link:{event_link}")
+
+    async def _save(self, key: str, value: str) -> None:
+        try:
+            await self.backend.set(key, value, settings.AGENT_CHECKPOINT_TTL_SECONDS)
+        except Exception as e:
+            logger.error(f"Error saving checkpoint {key}: {e}")
+
+    async def _load(self, key: str) -> Optional[str]:
+        try:
+            return await self.backend.get(key)
+        except Exception as e:
+            logger.error(f"Error loading checkpoint {key}: {e}")
+            return None
+
+    async def save_keywords(self, search_keywords: List[str]) -> None:
+        await self._save(self._get_key("keywords"), json.dumps(search_keywords))
+
+    async def load_keywords(self) -> Optional[List[str]]:
+        value = await self._load(self._get_key("keywords"))
+        return json.loads(value) if value is not None else None
+
+    async def save_discovery(self, discovery: DiscoveryCheckpoint) -> None:
+        await self._save(self._get_key("discovery"), discovery.model_dump_json())
+
+    async def load_discovery(self) -> Optional[DiscoveryCheckpoint]:
+        value = await self._load(self._get_key("discovery"))
+        if value is None:
+            return None
+        try:
+            return DiscoveryCheckpoint.model_validate_json(value)
+        except ValueError as e:
+            logger.error(f"Ignoring unreadable discovery checkpoint: {e}")
+            return None
+
+    async def save_link(self, event_link: str, link: LinkCheckpoint) -> None:
+        await self._save(self._get_link_key(event_link), link.model_dump_json())
+
+    async def load_links(self, event_links: List[str]) -> Dict[str, LinkCheckpoint]:
+        """Get how checking went for the links already checked, in one round trip"""
+        if not event_links:
+            return {}
+        try:
+            values = await self.backend.mget(
+                [self._get_link_key(event_link) for event_link in event_links]
+            )
+        except Exception as e:
+            logger.error(f"Error loading link checkpoints: {e}")
+            return {}
+
+        links = {}
+        for event_link, value in zip(event_links, values):
+            if value is None:
+                continue
+            try:
+                links[event_link] = LinkCheckpoint.model_validate_json(value)
+            except ValueError as e:
+                logger.error(f"Ignoring unreadable checkpoint of {event_link}: {e}")
+        return links
+
+    async def save_evaluation(self, evaluation: EvaluationCheckpoint) -> None:
+        await self._save(self._get_key("evaluation"), evaluation.model_dump_json())
+
+    async def load_evaluation(self) -> Optional[EvaluationCheckpoint]:
+        value = await self._load(self._get_key("evaluation"))
+        if value is None:
+            return None
+        try:
+            return EvaluationCheckpoint.model_validate_json(value)
+        except ValueError as e:
+            logger.error(f"Ignoring unreadable evaluation checkpoint: {e}")
+            return None
+
+    async def clear(self, event_links: List[str]) -> None:
+        """Delete the checkpoint and the ones of its stages once the run is done"""
+        for stage in self._stages.values():
+            await stage.clear(event_links)
+
+        keys = [
+            self._get_key("keywords"),
+            self._get_key("discovery"),
+            self._get_key("evaluation"),
+            *[self._get_link_key(event_link) for event_link in event_links],
+        ]
+        try:
+            await self.backend.delete(keys)
+        except Exception as e:
+            logger.error(f"Error clearing checkpoint of run {self.run_id}: {e}")
@@ -0,0 +1,146 @@
+import asyncio
+from typing import Optional, Set
+
+from core.browser_manager import BrowserManager
+from core.config import settings
+from core.logging_config import get_logger
+from schemas.agent_run_model import QueuedRun
+from services.agent.agent import find_events_for_user
+from services.runs.run_queue import RunQueue
+from services.runs.user_runs_service import user_run_service
+
+logger = get_logger(__name__)
+
+
+class RunWorker:
+    """
+    Long-lived worker that takes agent runs off the run queue and processes up
+    to `concurrency` of them at a time. The browser, the LLM client and the
+    in-process cache tier stay warm between runs instead of being set up again
+    for each one. Runs share the event loop with each other, and with the API
+    when the worker runs in its process, so the agent makes its blocking LLM
+    and email calls in threads. The cache counters of each run are in its run
+    report, as the process-wide ones mix every run the worker has processed.
+
+    A run that fails is put back on the queue until it has been tried
+    max_attempts times, then dropped and the user's run reverted. Runs claimed
+    for longer than RUN_QUEUE_CLAIM_TIMEOUT_SECONDS, whose worker was killed
+    before it could do either, are taken back and treated as failed attempts.
+
+    Usage:
+        worker = RunWorker(run_queue, browser_manager)
+        await worker.run()
+    """
+
+    def __init__(
+        self,
+        queue: RunQueue,
+        browser_manager: BrowserManager,
+        concurrency: Optional[int] = None,
+        max_attempts: Optional[int] = None,
+    ):
+        self.queue = queue
+        self.browser_manager = browser_manager
+        self.concurrency = concurrency or settings.RUN_WORKER_CONCURRENCY
+        self.max_attempts = max_attempts or settings.RUN_WORKER_MAX_ATTEMPTS
+        self._stopping = asyncio.Event()
+        self._tasks: Set[asyncio.Task] = set()
+
+    async def run(self) -> None:
+        """Process runs until stop is called, then wait for the ones in flight"""
+        logger.info(f"Run worker started with concurrency {self.concurrency}")
+        semaphore = asyncio.Semaphore(self.concurrency)
+        reclaim_task = asyncio.create_task(self._reclaim_expired())
+        while not self._stopping.is_set():
+            await semaphore.acquire()
+            try:
+                queued_run = await self.queue.dequeue()
+            except Exception as e:
+                logger.error(f"Error taking a run off the queue: {e}")
+                queued_run = None
+
+            if queued_run is None:
+                semaphore.release()
+                try:
+                    await asyncio.wait_for(
+                        self._stopping.wait(), settings.RUN_WORKER_POLL_SECONDS
+                    )
+                except asyncio.TimeoutError:
+                    pass
+                continue
+
+            task = asyncio.create_task(self._process(queued_run, semaphore))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+        await reclaim_task
+        if self._tasks:
+            logger.info(f"Waiting for {len(self._tasks)} runs to finish")
+            await asyncio.gather(*self._tasks, return_exceptions=True)
+        logger.info("Run worker stopped")
+
+    def stop(self) -> None:
+        """Stop taking new runs, the ones in flight are finished first"""
+        self._stopping.set()
+
+    async def _reclaim_expired(self) -> None:
+        """Take back the runs of dead workers every reclaim interval until stopped"""
+        while not self._stopping.is_set():
+            try:
+                reclaimed_runs = await self.queue.reclaim(
+                    settings.RUN_QUEUE_CLAIM_TIMEOUT_SECONDS
+                )
+            except Exception as e:
+                logger.error(f"Error reclaiming expired runs: {e}")
+                reclaimed_runs = []
+
+            for queued_run in reclaimed_runs:
+                logger.warning(
+                    f"Run {queued_run.run_id} for user {queued_run.user_id} was "
+                    "claimed by a worker that stopped, reclaiming it"
+                )
+                await self._handle_failure(queued_run)
+
+            try:
+                await asyncio.wait_for(
+                    self._stopping.wait(),
+                    settings.RUN_WORKER_RECLAIM_INTERVAL_SECONDS,
+                )
+            except asyncio.TimeoutError:
+                pass
+
+    async def _process(self, queued_run: QueuedRun, semaphore: asyncio.Semaphore):
+        logger.info(
+            f"Processing run {queued_run.run_id} for user {queued_run.user_id} "
+            f"(attempt {queued_run.attempts + 1} of {self.max_attempts})"
+        )
+        try:
+            browser = await self.browser_manager.get_browser()
+            # A retried run resumes from where the failed attempt stopped
+            await find_events_for_user(
+                queued_run.user_profile,
+                browser,
+                queued_run.only_highly_relevant,
+                run_id=queued_run.run_id,
+            )
+            await self.queue.ack(queued_run)
+            logger.info(f"Run {queued_run.run_id} completed")
+        except Exception as e:
+            logger.error(f"Error processing run {queued_run.run_id}: {str(e)}")
+            await self._handle_failure(queued_run)
+        finally:
+            semaphore.release()
+
+    async def _handle_failure(self, queued_run: QueuedRun) -> None:
+        try:
+            if queued_run.attempts + 1 < self.max_attempts:
+                await self.queue.retry(queued_run)
+                logger.info(f"Run {queued_run.run_id} put back on the queue")
+                return
+
+            await self.queue.ack(queued_run)
+        except Exception as e:
+            logger.error(f"Error updating run {queued_run.run_id} on the queue: {e}")
+
+        logger.error(f"Run {queued_run.run_id} failed for good, reverting it")
+        await user_run_service.revert_user_run(queued_run.user_id)
@@ -0,0 +1,318 @@
+import asyncio
+import math
+import time
+from typing import Dict, List, Optional
+
+from playwright.async_api import async_playwright
+
+from core.browser_config import BrowserConfig
+from core.cache import CacheBackend, create_shared_cache_backend
+from core.cache_metrics import cache_metrics
+from core.config import settings
+from core.logging_config import get_logger
+from core.run_deadline import get_run_deadline, start_run_deadline
+from core.run_metrics import start_run_metrics
+from schemas.agent_run_model import ShardLinks, ShardResult
+from schemas.event_model import EventResult
+from schemas.user_profile_model import UserProfile
+from services.agent.agent import (
+    agent,
+    discover_event_links,
+    evaluate_event_links,
+    inherit_duplicate_outcomes,
+    send_events,
+)
+from services.event_processing.near_duplicates import (
+    NearDuplicateIndex,
+    sort_by_source_preference,
+)
+from services.keyword_yield.keyword_yield_service import keyword_yield_service
+from services.runs.user_runs_service import user_run_service
+from utils.cloud_run_utils import is_final_task_attempt
+
+logger = get_logger(__name__)
+
+# Coordination keys only need to outlive the execution
+SHARD_TTL_SECONDS = 2 * 60 * 60
+
+
+def get_shard_links_key(execution_id: str) -> str:
+    return f"agent_shards:{execution_id}:links"
+
+
+def get_shard_result_key(execution_id: str, task_index: int) -> str:
+    return f"agent_shards:{execution_id}:results:{task_index}"
+
+
+def get_shard(event_links: List[str], task_index: int, task_count: int) -> List[str]:
+    """Links the task evaluates, every task_count-th link from its index"""
+    return event_links[task_index::task_count]
+
+
+def get_signatures(
+    events: List[EventResult], duplicate_index: NearDuplicateIndex
+) -> Dict[str, List[int]]:
+    """Page signatures of the events, for task 0 to compare across shards"""
+    signatures = {}
+    for event in events:
+        signature = duplicate_index.get_signature(event.event_url)
+        if signature is not None:
+            signatures[event.event_url] = list(signature)
+    return signatures
+
+
+def remove_shard_duplicates(shard_results: List[ShardResult]) -> List[EventResult]:
+    """
+    Merge the events of the shards, keeping one event of the copies different
+    shards kept, as each shard only knows the events it checked itself.
+    """
+    events = {
+        event.event_url: event for result in shard_results for event in result.events
+    }
+    signatures = {
+        event_link: tuple(signature)
+        for result in shard_results
+        for event_link, signature in result.signatures.items()
+    }
+
+    duplicate_index = NearDuplicateIndex()
+    for event_link in sort_by_source_preference(events):
+        event = events[event_link]
+        duplicate_index.check_signed_event(
+            event_link,
+            signatures.get(event_link),
+            event.event_details.title,
+            event.event_details.date_of_event,
+        )
+    return [
+        event
+        for event_link, event in events.items()
+        if event_link not in duplicate_index.duplicates
+    ]
+
+
+async def _set_safe(shared_cache: CacheBackend, key: str, value: str) -> None:
+    try:
+        await shared_cache.set(key, value, SHARD_TTL_SECONDS)
+    except Exception as e:
+        logger.error(f"Error publishing {key}: {e}")
+
+
+async def _wait_for_links(
+    shared_cache: CacheBackend, execution_id: str
+) -> Optional[ShardLinks]:
+    links_key = get_shard_links_key(execution_id)
+    deadline = time.monotonic() + settings.AGENT_SHARD_WAIT_SECONDS
+    while time.monotonic() < deadline:
+        value = await shared_cache.get(links_key)
+        if value is not None:
+            try:
+                return ShardLinks.model_validate_json(value)
+            except ValueError as e:
+                logger.error(f"Ignoring unreadable links of {execution_id}: {e}")
+                return None
+        await asyncio.sleep(settings.AGENT_SHARD_POLL_SECONDS)
+
+    logger.error(f"Timed out waiting for the links of execution {execution_id}")
+    return None
+
+
+async def _wait_for_shard_results(
+    shared_cache: CacheBackend, execution_id: str, task_count: int
+) -> List[ShardResult]:
+    pending_keys = [
+        get_shard_result_key(execution_id, task_index)
+        for task_index in range(1, task_count)
+    ]
+    results = []
+    wait_seconds: float = settings.AGENT_SHARD_WAIT_SECONDS
+    # Don't wait past the end of the run, the events found so far are sent
+    remaining_seconds = get_run_deadline().get_remaining_seconds()
+    if remaining_seconds is not None:
+        wait_seconds = min(wait_seconds, remaining_seconds)
+    deadline = time.monotonic() + wait_seconds
+    while pending_keys:
+        values = await shared_cache.mget(pending_keys)
+        still_pending = []
+        for key, value in zip(pending_keys, values):
+            if value is None:
+                still_pending.append(key)
+                continue
+            try:
+                results.append(ShardResult.model_validate_json(value))
+            except ValueError as e:
+                logger.error(f"Ignoring unreadable shard result {key}: {e}")
+        pending_keys = still_pending
+
+        if pending_keys and time.monotonic() >= deadline:
+            logger.error(
+                f"Timed out waiting for {len(pending_keys)} shards, "
+                "sending the events found so far"
+            )
+            break
+        if pending_keys:
+            await asyncio.sleep(settings.AGENT_SHARD_POLL_SECONDS)
+
+    return results
+
+
+async def sharded_agent(
+    user_profile: UserProfile,
+    user_id: str,
+    only_highly_relevant: bool,
+    execution_id: str,
+    task_index: int,
+    task_count: int,
+    run_id: Optional[str] = None,
+):
+    """
+    Run the agent for one user spread over the tasks of a Cloud Run execution.
+
+    Task 0 searches the event sites and publishes the links to check. Every
+    task then checks and scores its own share of the links, and the other tasks
+    publish their results for task 0, which merges them, keeping one of the
+    copies of an event different shards kept, and emails the user.
+    Tasks find each other through the shared cache, keyed by execution ID.
+
+    Only task 0 reverts the user's run on failure. Another task that fails
+    publishes a failed result, so task 0 sends what the other shards found
+    instead of waiting for it.
+
+    Args:
+        user_profile: Profile of the user to find events for
+        user_id: ID of the user, for reverting the run on failure
+        only_highly_relevant: Whether to only send highly relevant events
+        execution_id: ID shared by all tasks of the execution
+        task_index: Index of this task, from 0
+        task_count: Number of tasks in the execution
+        run_id: ID of the run to checkpoint the progress under when it isn't
+            sharded
+    """
+    shared_cache = create_shared_cache_backend()
+    if task_count <= 1 or shared_cache is None:
+        if task_index == 0:
+            logger.info("Running the agent unsharded")
+            await agent(user_profile, user_id, only_highly_relevant, run_id)
+        else:
+            logger.info("No shared cache to shard over, leaving the run to task 0")
+        return
+
+    logger.info(f"Starting agent execution as task {task_index} of {task_count}")
+    run_metrics = start_run_metrics(f"{execution_id}:{task_index}")
+    start_run_deadline()
+    cache_metrics.reset()
+    links_published = False
+    try:
+        playwright = await async_playwright().start()
+        browser = await playwright.chromium.launch(
+            headless=True, args=BrowserConfig.get_browser_args()
+        )
+
+        discovered = None
+        if task_index == 0:
+            discovered = await discover_event_links(user_profile, browser)
+            duplicate_index = discovered.duplicate_index
+            shard_links = ShardLinks(
+                event_links=discovered.event_links,
+                duplicates=duplicate_index.duplicates,
+            )
+            await shared_cache.set(
+                get_shard_links_key(execution_id),
+                shard_links.model_dump_json(),
+                SHARD_TTL_SECONDS,
+            )
+            links_published = True
+        else:
+            published_links = await _wait_for_links(shared_cache, execution_id)
+            if published_links is None:
+                return
+            shard_links = published_links
+            duplicate_index = NearDuplicateIndex()
+            duplicate_index.duplicates.update(shard_links.duplicates)
+        event_links = shard_links.event_links
+
+        shard = get_shard(event_links, task_index, task_count)
+        logger.info(f"Checking {len(shard)} of {len(event_links)} events")
+        evaluated = await evaluate_event_links(
+            shard,
+            user_profile,
+            browser,
+            only_highly_relevant,
+            duplicate_index=duplicate_index,
+            # Every shard keeps its share of the events the pre-ranker would
+            # have kept over the whole run
+            pre_ranker_top_k=math.ceil(settings.PRE_RANKER_TOP_K / task_count),
+        )
+        shard_result = ShardResult(
+            events=evaluated.events,
+            signatures=get_signatures(evaluated.events, duplicate_index),
+            outcomes=evaluated.outcomes,
+            unchecked_links=evaluated.unchecked_links,
+        )
+
+        if task_index != 0:
+            await shared_cache.set(
+                get_shard_result_key(execution_id, task_index),
+                shard_result.model_dump_json(),
+                SHARD_TTL_SECONDS,
+            )
+            return
+
+        assert discovered is not None
+        shard_results = [shard_result] + await _wait_for_shard_results(
+            shared_cache, execution_id, task_count
+        )
+        failed_shards = sum(result.failed for result in shard_results)
+        if failed_shards:
+            logger.error(f"{failed_shards} shards failed, their events are missing")
+
+        events = remove_shard_duplicates(shard_results)
+        outcomes = {
+            event_link: outcome
+            for result in shard_results
+            for event_link, outcome in result.outcomes.items()
+        }
+        inherit_duplicate_outcomes(outcomes, discovered.duplicate_index)
+
+        await keyword_yield_service.record_run(
+            discovered.city,
+            discovered.event_links_by_source,
+            outcomes,
+            unchecked_links=[
+                event_link
+                for result in shard_results
+                for event_link in result.unchecked_links
+            ],
+        )
+        await asyncio.to_thread(send_events, events, user_profile, only_highly_relevant)
+    except Exception as e:
+        logger.error(f"Error in agent execution as task {task_index}: {str(e)}")
+        if task_index == 0:
+            if not links_published:
+                # Let the other tasks stop waiting, there's nothing to check
+                await _set_safe(
+                    shared_cache,
+                    get_shard_links_key(execution_id),
+                    ShardLinks().model_dump_json(),
+                )
+            # Earlier attempts are retried and resume from the checkpoint
+            if is_final_task_attempt():
+                await user_run_service.revert_user_run(user_id)
+            raise
+        await _set_safe(
+            shared_cache,
+            get_shard_result_key(execution_id, task_index),
+            ShardResult(failed=True).model_dump_json(),
+        )
+    finally:
+        await run_metrics.publish_report()
+        cache_metrics.log_summary()
+        try:
+            if "browser" in locals():
+                await browser.close()
+                logger.info("Browser closed")
+            if "playwright" in locals():
+                await playwright.stop()
+                logger.info("Playwright stopped")
+        except Exception as e:
+            logger.error(f"Error closing browser/playwright: {str(e)}")
@@ -20,12 +20,16 @@ class CloudRunJobsService:
         self.region = settings.GOOGLE_CLOUD_REGION
         self.job_name = settings.CLOUD_RUN_JOB_NAME
 
-    async def execute_job(self, parameters: Optional[dict] = None) -> str:
+    async def execute_job(
+        self, parameters: Optional[dict] = None, task_count: Optional[int] = None
+    ) -> str:
         """
         Execute the agent job on Cloud Run Jobs asynchronously.
 
         Args:
             parameters: Dictionary of parameters to pass to the job
+            task_count: Number of tasks to run the job with, the job's own
+                setting if None
 
         Returns:
             A unique task ID for tracking the job execution
@@ -48,7 +52,8 @@ class CloudRunJobsService:
                 overrides=run_v2.RunJobRequest.Overrides(
                     container_overrides=[
                         run_v2.RunJobRequest.Overrides.ContainerOverride(args=args)
-                    ]
+                    ],
+                    task_count=task_count,
                 ),
             )
 
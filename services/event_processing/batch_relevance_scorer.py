@@ -0,0 +1,135 @@
+import threading
+from typing import Dict, List, Optional, Tuple
+
+from langchain_core.language_models.chat_models import BaseChatModel
+
+from core.logging_config import get_logger
+from core.run_metrics import get_run_metrics
+from schemas.event_model import EventResult, PreparedEvent
+from schemas.user_profile_model import UserProfile
+from services.event_processing.check_event import score_event_for_users, score_events
+from services.event_processing.event_disqualifier import EventDisqualifier
+
+logger = get_logger(__name__)
+
+
+class BatchRelevanceScorer:
+    """
+    Scores the events of a batch job for several users of the batch at once,
+    so an event many of them find costs one LLM call instead of one per user.
+
+    Users are run one after the other. The events of the user whose run is
+    going are scored for them in listwise batches first. An event compatible
+    with more than one of the users still to run is then scored for all of
+    them in one call, and their scores are kept until their own run gets to
+    the event. Sharing an event with a single user would cost the call it
+    saves, and take the event out of that user's own batch. A user whose run
+    never finds the event leaves its score unused.
+
+    Usage:
+        batch_scorer = BatchRelevanceScorer(
+            {run.user_id: run.user_profile for run in runs}
+        )
+        for run in runs:
+            batch_scorer.start_user(run.user_id)
+            events = batch_scorer.score_events(prepared_events, model)
+    """
+
+    def __init__(self, user_profiles: Dict[str, UserProfile]):
+        self.user_profiles = user_profiles
+        self._lock = threading.Lock()
+        self._current_user: Optional[str] = None
+        self._pending_users: List[str] = list(user_profiles)
+        # Scores kept for users still to run, by user ID and event link
+        self._scores: Dict[Tuple[str, str], float] = {}
+
+    def start_user(self, user_id: str) -> None:
+        """Score the events of the user's run from now on"""
+        with self._lock:
+            self._current_user = user_id
+            if user_id in self._pending_users:
+                self._pending_users.remove(user_id)
+
+    def _get_users_to_share_with(self, prepared_event: PreparedEvent) -> List[str]:
+        with self._lock:
+            pending_users = [
+                user_id
+                for user_id in self._pending_users
+                if (user_id, prepared_event.event_url) not in self._scores
+            ]
+        return [
+            user_id
+            for user_id in pending_users
+            if EventDisqualifier(self.user_profiles[user_id]).check_compatibility(
+                prepared_event.event_details
+            )
+        ]
+
+    def score_events(
+        self, prepared_events: List[PreparedEvent], model: BaseChatModel
+    ) -> List[EventResult]:
+        """
+        Score the events for the user whose run is going, reusing the scores
+        an earlier run of the batch already got for them.
+
+        Returns:
+            The scored events, in the same order
+        """
+        with self._lock:
+            user_id = self._current_user
+        if user_id is None:
+            raise ValueError("No user's run has been started")
+        user_profile = self.user_profiles[user_id]
+        run_metrics = get_run_metrics()
+
+        scores: Dict[str, float] = {}
+        events_to_score = []
+        for prepared_event in prepared_events:
+            event_link = prepared_event.event_url
+            with self._lock:
+                score = self._scores.pop((user_id, event_link), None)
+            if score is not None:
+                scores[event_link] = score
+                run_metrics.increment("batch_scores_reused")
+            else:
+                events_to_score.append(prepared_event)
+
+        scored_events = (
+            score_events(events_to_score, user_profile, model)
+            if events_to_score
+            else []
+        )
+        for scored_event in scored_events:
+            scores[scored_event.event_url] = scored_event.relevance
+
+        for prepared_event in events_to_score:
+            self._share(prepared_event, model)
+
+        return [
+            EventResult(
+                event_details=prepared_event.event_details,
+                event_url=prepared_event.event_url,
+                relevance=scores[prepared_event.event_url],
+            )
+            for prepared_event in prepared_events
+        ]
+
+    def _share(self, prepared_event: PreparedEvent, model: BaseChatModel) -> None:
+        """Score the event for the users still to run that would find it"""
+        shared_with = self._get_users_to_share_with(prepared_event)
+        if len(shared_with) <= 1:
+            return
+
+        event_link = prepared_event.event_url
+        results = score_event_for_users(
+            prepared_event,
+            [self.user_profiles[other_user] for other_user in shared_with],
+            model,
+        )
+        with self._lock:
+            for other_user, result in zip(shared_with, results):
+                self._scores[(other_user, event_link)] = result.relevance
+        logger.info(
+            f"Scored {event_link} for {len(shared_with)} more users of the batch"
+        )
+        get_run_metrics().increment("batch_scores_shared", len(shared_with))
@@ -1,82 +1,348 @@
-import json
-from typing import Optional
+import asyncio
+from typing import Dict, Mapping, Optional
 
 from langchain_core.language_models.chat_models import BaseChatModel
 from playwright.async_api import Browser
 
+from core.cache import CacheWriteBuffer, cache
 from core.logging_config import get_logger
-from core.redis_client import redis_client
-from schemas.event_model import EventDetails, EventResult
+from core.run_deadline import RunDeadlineExceeded
+from core.run_metrics import get_run_metrics
+from schemas.event_model import EventDetails, EventResult, PreparedEvent
 from schemas.user_profile_model import UserProfile
 from services.event_processing.event_disqualifier import EventDisqualifier
 from services.event_processing.event_relevance_calculator import (
     EventRelevanceCalculator,
+    MultiUserRelevanceCalculator,
+)
+from services.event_processing.extract_event_details import (
+    add_event_coordinates,
+    extract_event_details_with_reason,
+)
+from services.event_processing.near_duplicates import NearDuplicateIndex
+from services.event_processing.negative_cache import (
+    get_negative_cache_key,
+    parse_negative_reason,
+    record_negative_result,
 )
-from services.event_processing.extract_event_details import extract_event_details
 from services.scrapping.scrap_web_page import scrap_page
+from utils.cache_codec import decode_event_details, encode_event_details
 from utils.event_utils import get_seconds_until_event
+from utils.url_utils import canonicalize_event_url
 
 logger = get_logger(__name__)
 
 
-async def check_event(
+def get_event_details_cache_key(event_link: str) -> str:
+    return f"event_details:{event_link}"
+
+
+async def _get_cached_value(
+    cache_key: str, prefetched_cache: Optional[Mapping[str, Optional[str]]]
+) -> Optional[str]:
+    if prefetched_cache is not None and cache_key in prefetched_cache:
+        return prefetched_cache[cache_key]
+    return await cache.get(cache_key)
+
+
+async def prepare_event(
     event_link: str,
     user_profile: UserProfile,
     model: BaseChatModel,
     browser: Optional[Browser] = None,
-) -> EventResult | None:
+    prefetched_cache: Optional[Mapping[str, Optional[str]]] = None,
+    cache_writer: Optional[CacheWriteBuffer] = None,
+    duplicate_index: Optional[NearDuplicateIndex] = None,
+    scraped_pages: Optional[Dict[str, str]] = None,
+    speculate: bool = False,
+) -> PreparedEvent | None:
+    """
+    Scrape an event, get its details and check whether it's compatible with the
+    user, leaving only the relevance scoring to do.
+
+    Args:
+        event_link: URL of the event page
+        user_profile: Profile of the user to check the event for
+        model: Model used for extraction and relevance scoring
+        browser: Browser to scrape the page with, a new one is launched if None
+        prefetched_cache: Cached values already looked up in bulk, keyed by cache
+            key. The cache is only queried if the event's key isn't in it.
+        cache_writer: Buffer to batch the cache write through, written directly
+            if None
+        duplicate_index: Events already kept in this run. Events that
+            duplicate one of them are skipped, before any LLM call if their
+            page matches. Events are added once they pass disqualification.
+        scraped_pages: Page contents already scraped in this job, keyed by
+            event link, so users sharing a job load each page once. Pages
+            scraped here are added to it.
+        speculate: Whether to score the page while its details are extracted
+            on a cache miss, at the cost of an LLM call if the event is then
+            disqualified
+
+    Returns:
+        The event ready to be scored, or None if it isn't compatible
+    """
+    # Links from the scrapers are already canonical, but links passed in
+    # directly must map to the same cache keys
+    event_link = canonicalize_event_url(event_link)
     logger.info(f"Checking event: {event_link}")
+    run_metrics = get_run_metrics()
 
-    # Try to get cached result
-    cache_key = f"event_details:{event_link}"
-    cached_result = redis_client.get(cache_key)
+    # Skip links that recently failed or turned out not to be events
+    negative_cache_key = get_negative_cache_key(event_link)
+    negative_reason = parse_negative_reason(
+        await _get_cached_value(negative_cache_key, prefetched_cache)
+    )
+    if negative_reason is not None:
+        logger.info(f"Skipping event, cached negative result: {negative_reason}")
+        run_metrics.increment("negative_cache_hits")
+        return None
 
-    webpage_content = await scrap_page(event_link, browser)
+    # Try to get cached result
+    cache_key = get_event_details_cache_key(event_link)
+    cached_result = await _get_cached_value(cache_key, prefetched_cache)
 
-    if cached_result is not None:
-        logger.info("Retrieved event from cache:")
-        event_details_dict = json.loads(str(cached_result))
-        event_details = EventDetails(**event_details_dict)
-        logger.info(event_details)
+    if scraped_pages is not None and event_link in scraped_pages:
+        webpage_content = scraped_pages[event_link]
+        run_metrics.increment("pages_reused")
     else:
-        temp_event_details = extract_event_details(webpage_content, model)
+        try:
+            with run_metrics.timer("scrape_page"):
+                webpage_content = await scrap_page(event_link, browser)
+            run_metrics.increment("pages_fetched")
+        except Exception:
+            run_metrics.increment("page_failures")
+            await record_negative_result(event_link, "scrape_failed", cache_writer)
+            raise
+        if scraped_pages is not None:
+            scraped_pages[event_link] = webpage_content
 
-        if temp_event_details is None:
-            logger.error("Something went wrong while extracting event details.")
+    if duplicate_index is not None:
+        if duplicate_index.find_page_duplicate(event_link, webpage_content) is not None:
+            run_metrics.increment("duplicates_skipped")
             return None
 
-        event_details = temp_event_details
+    event_details: EventDetails | None = None
+    if cached_result is not None:
+        try:
+            event_details = decode_event_details(cached_result)
+            run_metrics.increment("details_cache_hits")
+            logger.info("Retrieved event from cache:")
+            logger.info(event_details)
+        except ValueError as e:
+            logger.error(f"Ignoring cached event details: {e}")
 
-        # Cache the event details
-        redis_client.setex(
-            cache_key,
-            get_seconds_until_event(
+    speculative_scoring: Optional[asyncio.Task] = None
+    speculative_relevance: Optional[float] = None
+    try:
+        if event_details is None:
+            if speculate:
+                # Score the page while its details are extracted, the score is
+                # thrown away if the event turns out to be disqualified
+                event_relevance_calculator = EventRelevanceCalculator(
+                    model, user_profile
+                )
+                speculative_scoring = asyncio.create_task(
+                    asyncio.to_thread(
+                        event_relevance_calculator.calculate_page_scoring_system,
+                        webpage_content,
+                    )
+                )
+                run_metrics.increment("speculative_scores_started")
+
+            with run_metrics.timer("extract_details"):
+                # The LLM call is blocking, keep it off the event loop
+                temp_event_details, failure_reason = await asyncio.to_thread(
+                    extract_event_details_with_reason, webpage_content, model
+                )
+
+            if temp_event_details is None:
+                logger.error("Something went wrong while extracting event details.")
+                run_metrics.increment("extraction_failures")
+                if failure_reason is not None:
+                    await record_negative_result(
+                        event_link, failure_reason, cache_writer
+                    )
+                return None
+
+            with run_metrics.timer("geocode"):
+                event_details = await add_event_coordinates(temp_event_details)
+
+            # Cache the event details
+            ttl_seconds = get_seconds_until_event(
                 event_details.date_of_event, event_details.start_time
-            ),
-            json.dumps(event_details.model_dump()),
+            )
+            cached_value = encode_event_details(event_details)
+            if cache_writer is not None:
+                await cache_writer.add(cache_key, cached_value, ttl_seconds)
+            else:
+                await cache.set(cache_key, cached_value, ttl_seconds)
+
+        assert event_details is not None
+        event_disqualifier = EventDisqualifier(user_profile)
+
+        rejection_reason = event_disqualifier.get_user_independent_rejection(
+            event_details
         )
+        if rejection_reason is not None:
+            run_metrics.increment("events_rejected")
+            await record_negative_result(event_link, rejection_reason, cache_writer)
+            return None
 
-    assert event_details is not None
-    event_disqualifier = EventDisqualifier(user_profile)
-    is_compatible = event_disqualifier.check_compatibility(event_details)
+        is_compatible = event_disqualifier.check_compatibility(event_details)
 
-    if is_compatible:
-        event_relevance_calculator = EventRelevanceCalculator(model, user_profile)
-        event_relevance_score = (
-            event_relevance_calculator.calculate_event_relevance_score(
-                webpage_content, event_details
+        if not is_compatible:
+            logger.info(
+                "Event is not compatible with the user's profile and/or preferences."
             )
-        )
-        logger.info(f"Event relevance score: {event_relevance_score}")
-        result = EventResult(
-            event_details=event_details,
+            run_metrics.increment("events_rejected")
+            return None
+
+        # Only events that can be sent hide their copies
+        if (
+            duplicate_index is not None
+            and duplicate_index.check_event(
+                event_link,
+                webpage_content,
+                event_details.title,
+                event_details.date_of_event,
+            )
+            is not None
+        ):
+            run_metrics.increment("duplicates_skipped")
+            return None
+
+        if speculative_scoring is not None:
+            try:
+                page_scoring_system = await speculative_scoring
+                if page_scoring_system is not None:
+                    speculative_relevance = (
+                        event_relevance_calculator.score_page_scoring_system(
+                            page_scoring_system, event_details
+                        )
+                    )
+                    run_metrics.increment("speculative_scores_used")
+            except RunDeadlineExceeded:
+                raise
+            except Exception as e:
+                # The event is scored with the others instead
+                logger.error(f"Error scoring event speculatively: {e}")
+
+        return PreparedEvent(
             event_url=event_link,
-            relevance=event_relevance_score,
+            event_details=event_details,
+            webpage_content=webpage_content,
+            speculative_relevance=speculative_relevance,
         )
+    finally:
+        if speculative_scoring is not None and speculative_relevance is None:
+            # The thread can't be stopped, its result is just ignored
+            speculative_scoring.cancel()
+            if speculative_scoring.done() and not speculative_scoring.cancelled():
+                speculative_scoring.exception()
+            run_metrics.increment("speculative_scores_discarded")
 
-        return result
-    else:
-        logger.info(
-            "Event is not compatible with the user's profile and/or preferences."
+
+def score_event(
+    prepared_event: PreparedEvent, user_profile: UserProfile, model: BaseChatModel
+) -> EventResult:
+    """Calculate how relevant a prepared event is to the user."""
+    event_relevance_calculator = EventRelevanceCalculator(model, user_profile)
+    event_relevance_score = event_relevance_calculator.calculate_event_relevance_score(
+        prepared_event.webpage_content, prepared_event.event_details
+    )
+    logger.info(f"Event relevance score: {event_relevance_score}")
+
+    return EventResult(
+        event_details=prepared_event.event_details,
+        event_url=prepared_event.event_url,
+        relevance=event_relevance_score,
+    )
+
+
+def score_events(
+    prepared_events: list[PreparedEvent],
+    user_profile: UserProfile,
+    model: BaseChatModel,
+) -> list[EventResult]:
+    """
+    Calculate how relevant many prepared events are to the user in batches.
+    Events already scored speculatively keep their score.
+    """
+    event_relevance_calculator = EventRelevanceCalculator(model, user_profile)
+    scores = iter(
+        event_relevance_calculator.calculate_event_relevance_scores(
+            [
+                prepared_event
+                for prepared_event in prepared_events
+                if prepared_event.speculative_relevance is None
+            ]
+        )
+    )
+
+    results = []
+    for prepared_event in prepared_events:
+        if prepared_event.speculative_relevance is not None:
+            score = prepared_event.speculative_relevance
+        else:
+            score = next(scores)
+        results.append(
+            EventResult(
+                event_details=prepared_event.event_details,
+                event_url=prepared_event.event_url,
+                relevance=score,
+            )
+        )
+    return results
+
+
+def score_event_for_users(
+    prepared_event: PreparedEvent,
+    user_profiles: list[UserProfile],
+    model: BaseChatModel,
+) -> list[EventResult]:
+    """Calculate how relevant one prepared event is to each of many users."""
+    calculator = MultiUserRelevanceCalculator(model, user_profiles)
+    scores = calculator.calculate_event_relevance_scores(
+        prepared_event.webpage_content, prepared_event.event_details
+    )
+
+    return [
+        EventResult(
+            event_details=prepared_event.event_details,
+            event_url=prepared_event.event_url,
+            relevance=score,
         )
+        for score in scores
+    ]
+
+
+async def check_event(
+    event_link: str,
+    user_profile: UserProfile,
+    model: BaseChatModel,
+    browser: Optional[Browser] = None,
+    prefetched_cache: Optional[Mapping[str, Optional[str]]] = None,
+    cache_writer: Optional[CacheWriteBuffer] = None,
+    duplicate_index: Optional[NearDuplicateIndex] = None,
+) -> EventResult | None:
+    """
+    Check whether an event is compatible with the user and how relevant it is.
+    See prepare_event for the arguments.
+
+    Returns:
+        The event with its relevance, or None if it isn't compatible
+    """
+    prepared_event = await prepare_event(
+        event_link,
+        user_profile,
+        model,
+        browser,
+        prefetched_cache=prefetched_cache,
+        cache_writer=cache_writer,
+        duplicate_index=duplicate_index,
+    )
+    if prepared_event is None:
         return None
+
+    return score_event(prepared_event, user_profile, model)
@@ -1,9 +1,12 @@
 from datetime import datetime, timedelta
+from typing import Optional
 
 from core.logging_config import get_logger
 from schemas.coordinates_model import Coordinates
+from schemas.event_candidate_model import EventCandidate
 from schemas.event_model import EventDetails
 from schemas.user_profile_model import UserProfile
+from services.event_processing.negative_cache import NegativeReason
 from utils.address_utils import calculate_distance
 from utils.age_utils import get_age_from_birth_date
 from utils.date_utils import time_to_string
@@ -44,6 +47,47 @@ class EventDisqualifier:
 
         return all(check(event_details) for check in checks)
 
+    def get_user_independent_rejection(
+        self, event_details: EventDetails
+    ) -> Optional[NegativeReason]:
+        """
+        Run the checks that don't depend on the user, so the outcome can be
+        cached and reused for every user.
+
+        Returns:
+            The reason the event is rejected for everyone, or None
+        """
+        if not self._is_event_page_non_empty(event_details):
+            return "empty_page"
+        if not self._is_not_past_event(event_details):
+            return "past_event"
+        if not self._is_event_sold_out(event_details):
+            return "sold_out"
+
+        return None
+
+    def check_candidate(self, candidate: EventCandidate) -> bool:
+        """
+        Run the checks that work on the partial details shown in search results,
+        so obvious rejects are dropped before their page is scraped. Each check
+        skips the details the listing doesn't show.
+        """
+        event_details = candidate.to_partial_event_details()
+        checks = [
+            self._is_not_past_event,
+            self._is_event_sold_out,
+            self._is_event_within_custom_dates,
+            self._is_event_within_acceptable_times,
+            self._is_event_within_acceptable_price_range,
+            self._is_event_suitable_for_event_format,
+        ]
+
+        is_compatible = all(check(event_details) for check in checks)
+        if not is_compatible:
+            logger.info(f"Skipping {candidate.url} based on its search result")
+
+        return is_compatible
+
     def _is_event_sold_out(self, event_details: EventDetails) -> bool:
         if event_details.is_sold_out:
             logger.info("Event is sold out")
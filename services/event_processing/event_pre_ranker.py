@@ -0,0 +1,195 @@
+import json
+import math
+import re
+from collections import Counter
+from typing import Dict, List, NamedTuple, Optional
+
+from core.config import settings
+from core.logging_config import get_logger
+from schemas.event_model import PreparedEvent
+from schemas.user_profile_model import UserProfile
+
+logger = get_logger(__name__)
+
+# BM25 parameters, the usual defaults
+BM25_K1 = 1.5
+BM25_B = 0.75
+
+# Titles and topics say the most about an event, so their terms count this
+# many times
+TITLE_WEIGHT = 3
+# Only the start of the page is used, the rest is mostly boilerplate
+MAX_TEXT_CHARS = 5000
+
+# Cutoffs the recall report is calculated for, besides the configured one
+RECALL_REPORT_TOP_KS = [5, 10, 20, 30, 40, 60]
+
+STOPWORDS = set(
+    """
+    a about an and are as at be by for from has have i in into is it its me my
+    of on or our that the their them they this to up us we with you your will
+    new people meet make get like want find more other some
+    """.split()
+)
+
+
+def tokenize(text: str) -> List[str]:
+    """Split text into lowercase terms, dropping stopwords and plural endings"""
+    terms = []
+    for word in re.findall(r"[^\W_]+", text.lower()):
+        if len(word) < 2 or word in STOPWORDS:
+            continue
+        if len(word) > 3 and word.endswith("s") and not word.endswith("ss"):
+            word = word[:-1]
+        terms.append(word)
+    return terms
+
+
+class RankedEvent(NamedTuple):
+    event: PreparedEvent
+    score: float
+
+
+class EventPreRanker:
+    """
+    Ranks prepared events with BM25 against the user's interests, goals,
+    occupation and extra info, so only the promising ones are sent to the LLM
+    for relevance scoring. Document frequencies come from the events of the
+    run itself, so terms every event shares count for little.
+    """
+
+    def __init__(
+        self,
+        user_profile: UserProfile,
+        top_k: Optional[int] = None,
+        min_score: Optional[float] = None,
+    ):
+        self.user_profile = user_profile
+        self.top_k = top_k if top_k is not None else settings.PRE_RANKER_TOP_K
+        self.min_score = (
+            min_score if min_score is not None else settings.PRE_RANKER_MIN_SCORE
+        )
+
+    def _get_query_terms(self) -> List[str]:
+        query = " ".join(
+            [
+                *self.user_profile.interests,
+                *self.user_profile.goals,
+                self.user_profile.occupation,
+                self.user_profile.extra_info or "",
+            ]
+        )
+        return list(dict.fromkeys(tokenize(query)))
+
+    def _get_document_terms(self, event: PreparedEvent) -> List[str]:
+        title = event.event_details.title or ""
+        audience_profile = event.event_details.audience_profile
+        if audience_profile is not None:
+            title = " ".join([title, *audience_profile.topics])
+        title_terms = tokenize(title)
+        text_terms = tokenize((event.webpage_content or "")[:MAX_TEXT_CHARS])
+        return title_terms * TITLE_WEIGHT + text_terms
+
+    def rank(self, events: List[PreparedEvent]) -> List[RankedEvent]:
+        """Score every event and sort them from most to least promising"""
+        if not events:
+            return []
+
+        query_terms = self._get_query_terms()
+        documents = [Counter(self._get_document_terms(event)) for event in events]
+        document_lengths = [sum(document.values()) for document in documents]
+        average_length = sum(document_lengths) / len(documents) or 1
+
+        document_frequencies = {
+            term: sum(1 for document in documents if term in document)
+            for term in query_terms
+        }
+        idfs = {
+            term: math.log(1 + (len(documents) - frequency + 0.5) / (frequency + 0.5))
+            for term, frequency in document_frequencies.items()
+        }
+
+        ranked = []
+        for event, document, length in zip(events, documents, document_lengths):
+            normalization = BM25_K1 * (1 - BM25_B + BM25_B * length / average_length)
+            score = 0.0
+            for term in query_terms:
+                frequency = document.get(term, 0)
+                if not frequency:
+                    continue
+                score += (
+                    idfs[term] * frequency * (BM25_K1 + 1) / (frequency + normalization)
+                )
+            ranked.append(RankedEvent(event, round(score, 3)))
+
+        return sorted(ranked, key=lambda ranked_event: ranked_event.score, reverse=True)
+
+    def _apply_cutoff(self, ranked: List[RankedEvent]) -> List[PreparedEvent]:
+        return [
+            ranked_event.event
+            for ranked_event in ranked[: self.top_k]
+            if ranked_event.score >= self.min_score
+        ]
+
+    def select(self, ranked: List[RankedEvent]) -> List[PreparedEvent]:
+        """Keep the top K events that score at least the minimum score"""
+        selected = self._apply_cutoff(ranked)
+        logger.info(
+            f"Pre-ranker selected {len(selected)} of {len(ranked)} events "
+            f"(top_k={self.top_k}, min_score={self.min_score})"
+        )
+        return selected
+
+    def get_recall_report(
+        self,
+        ranked: List[RankedEvent],
+        relevance_by_url: Dict[str, float],
+        relevance_threshold: float = 0,
+    ) -> dict:
+        """
+        Compare the pre-ranker against full LLM scoring of the same events.
+
+        Args:
+            ranked: Events as ranked by rank
+            relevance_by_url: Relevance of every event after full scoring
+            relevance_threshold: Relevance an event needs to count as relevant
+
+        Returns:
+            The number of relevant events, and the share of them the configured
+            cutoff and other top K cutoffs would have kept
+        """
+        relevant_urls = {
+            url
+            for url, relevance in relevance_by_url.items()
+            if relevance > relevance_threshold
+        }
+
+        def recall(selected: List[PreparedEvent]) -> float:
+            if not relevant_urls:
+                return 1.0
+            kept = relevant_urls & {event.event_url for event in selected}
+            return round(len(kept) / len(relevant_urls), 3)
+
+        selected = self._apply_cutoff(ranked)
+        return {
+            "events": len(ranked),
+            "relevant_events": len(relevant_urls),
+            "top_k": self.top_k,
+            "min_score": self.min_score,
+            "selected": len(selected),
+            "recall": recall(selected),
+            "recall_at_top_k": {
+                top_k: recall([ranked_event.event for ranked_event in ranked[:top_k]])
+                for top_k in RECALL_REPORT_TOP_KS
+            },
+        }
+
+    def log_recall_report(
+        self,
+        ranked: List[RankedEvent],
+        relevance_by_url: Dict[str, float],
+        relevance_threshold: float = 0,
+    ) -> None:
+        """Log the recall report as a single JSON line"""
+        report = self.get_recall_report(ranked, relevance_by_url, relevance_threshold)
+        logger.info(f"Pre-ranker recall: {json.dumps(report)}")
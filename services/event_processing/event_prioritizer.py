@@ -0,0 +1,128 @@
+from datetime import date, datetime
+from typing import Dict, List, Optional
+
+from core.logging_config import get_logger
+from schemas.event_candidate_model import EventCandidate
+from schemas.keyword_yield_model import KeywordYieldStats
+from schemas.user_profile_model import UserProfile
+from services.event_processing.event_pre_ranker import tokenize
+
+logger = get_logger(__name__)
+
+# Relevance is capped at this
+MAX_RELEVANCE = 100
+# Added to the best relevance a keyword's links ever reached, so an event a bit
+# better than any before it can still displace the ones found
+UPPER_BOUND_MARGIN = 10
+# Expected relevance per link of keywords without trusted stats
+UNKNOWN_YIELD = 20
+
+# How much each signal counts towards the priority, they're all from 0 to 1
+YIELD_WEIGHT = 0.5
+TITLE_MATCH_WEIGHT = 0.3
+DATE_WEIGHT = 0.2
+# Profile terms a listing title has to share to count as a full match
+FULL_TITLE_MATCH_TERMS = 3
+# Events this many days away get half the date score of one happening today
+DATE_HALF_LIFE_DAYS = 7
+# Date score of events whose listing doesn't show a date
+UNKNOWN_DATE_SCORE = 0.5
+
+
+class EventPrioritizer:
+    """
+    Orders the links of a run from most to least promising before any page is
+    loaded, from what the search results and past runs already say about them:
+    - Yield: the average relevance per link of the keywords that found it
+    - Title match: the profile's terms in the listing title, as the pre-ranker
+      would count them
+    - Date: sooner events come first
+
+    It also estimates the highest relevance each link could reach, from the
+    best relevance the keywords that found it have ever produced. Links found
+    by a keyword without enough history can reach any relevance. The share of
+    each keyword's links that didn't survive checking gives how likely a link
+    is to be disqualified.
+    """
+
+    def __init__(
+        self,
+        user_profile: UserProfile,
+        link_stats: Dict[str, List[Optional[KeywordYieldStats]]],
+    ):
+        self.user_profile = user_profile
+        self.link_stats = link_stats
+        self._query_terms = set(
+            tokenize(
+                " ".join(
+                    [
+                        *user_profile.interests,
+                        *user_profile.goals,
+                        user_profile.occupation,
+                        user_profile.extra_info or "",
+                    ]
+                )
+            )
+        )
+
+    def _get_yield_score(self, event_link: str) -> float:
+        expected_relevances = [
+            stats.relevance_sum / stats.links if stats is not None else UNKNOWN_YIELD
+            for stats in self.link_stats.get(event_link) or [None]
+        ]
+        return min(max(expected_relevances) / MAX_RELEVANCE, 1)
+
+    def _get_title_match_score(self, candidate: EventCandidate) -> float:
+        if not candidate.title:
+            return 0
+        matches = len(self._query_terms & set(tokenize(candidate.title)))
+        return min(matches / FULL_TITLE_MATCH_TERMS, 1)
+
+    def _get_date_score(self, candidate: EventCandidate) -> float:
+        if not candidate.date_of_event:
+            return UNKNOWN_DATE_SCORE
+        try:
+            event_date = datetime.strptime(candidate.date_of_event, "%d-%m-%Y").date()
+        except ValueError:
+            return UNKNOWN_DATE_SCORE
+        days_away = max((event_date - date.today()).days, 0)
+        return 1 / (1 + days_away / DATE_HALF_LIFE_DAYS)
+
+    def get_priority(self, candidate: EventCandidate) -> float:
+        """How promising the link is, from 0 to 1"""
+        return (
+            YIELD_WEIGHT * self._get_yield_score(candidate.url)
+            + TITLE_MATCH_WEIGHT * self._get_title_match_score(candidate)
+            + DATE_WEIGHT * self._get_date_score(candidate)
+        )
+
+    def get_upper_bound(self, event_link: str) -> float:
+        """Highest relevance the link is expected to reach"""
+        all_stats = self.link_stats.get(event_link) or [None]
+        max_relevances = [
+            stats.max_relevance
+            for stats in all_stats
+            if stats is not None and stats.max_relevance is not None
+        ]
+        # Any keyword without a best relevance yet could have found anything
+        if len(max_relevances) < len(all_stats):
+            return MAX_RELEVANCE
+        return min(max(max_relevances) + UPPER_BOUND_MARGIN, MAX_RELEVANCE)
+
+    def get_disqualification_rate(self, event_link: str) -> Optional[float]:
+        """
+        Share of the links of the best keyword that found the link that didn't
+        survive checking, None if none of its keywords has trusted stats
+        """
+        survival_rates = [
+            stats.survival_rate
+            for stats in self.link_stats.get(event_link) or []
+            if stats is not None
+        ]
+        if not survival_rates:
+            return None
+        return 1 - max(survival_rates)
+
+    def prioritize(self, candidates: List[EventCandidate]) -> List[EventCandidate]:
+        """Sort the candidates from most to least promising"""
+        return sorted(candidates, key=self.get_priority, reverse=True)
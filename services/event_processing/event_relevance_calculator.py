@@ -1,14 +1,22 @@
 import ast
 import re
-from typing import Literal, Optional, TypedDict
+from typing import Literal, Optional, TypedDict, cast
 
 from langchain_core.language_models.chat_models import BaseChatModel
 from langchain_core.prompts import ChatPromptTemplate
 
+from core.config import settings
 from core.logging_config import get_logger
+from core.run_deadline import RunDeadlineExceeded
 from schemas.coordinates_model import Coordinates
-from schemas.event_model import EventDetails, LocationOfEvent
+from schemas.event_model import (
+    EventAudienceProfile,
+    EventDetails,
+    LocationOfEvent,
+    PreparedEvent,
+)
 from schemas.user_profile_model import UserProfile
+from services.event_processing.near_duplicates import normalize_title
 from utils.address_utils import calculate_distance
 from utils.age_utils import get_age_from_birth_date
 from utils.request_utils import retry_with_backoff
@@ -50,6 +58,75 @@ class ScoringSystem(TypedDict):
     extra_info: Optional[extra_info_options]
 
 
+# Rules for the prompts that see a summary of the event instead of its page
+SHORT_SCORING_RULES = """
+            Count the user's interests and goals the event matches:
+            - exact_match: core to the event's title or main topic
+            - partial_match: one of the event's topics but not the core theme
+            - weak_match: indirect but thematically relevant
+
+            industry_mismatch, one of {industry_mismatch_options}. Only use anything other than "no_mismatch" if the event is primarily professional networking for an industry unrelated to the user's occupation, and it doesn't serve one of the user's goals (e.g. "find a co-founder", "find investors").
+
+            overly_specific_nationality_or_ethic_group: True only if the event is exclusively for a nationality or ethnic group and nothing in the user's interests, goals or extra information relates to it.
+
+            extra_info, one of {extra_info_options}: whether the user's extra information makes the event more ("positive") or less ("negative") relevant, or None if there is no extra information.
+"""
+
+SCORING_SYSTEM_EXAMPLE = """{{
+                "interests": {{"exact_match": 1, "partial_match": 0, "weak_match": 2}},
+                "goals": {{"exact_match": 0, "partial_match": 1, "weak_match": 0}},
+                "industry_mismatch": "no_mismatch",
+                "overly_specific_nationality_or_ethic_group": False,
+                "extra_info": "neutral"
+            }}"""
+
+
+def estimate_tokens(text: str) -> int:
+    """Roughly estimate the number of tokens of a text, ~4 characters each"""
+    return len(text) // 4 + 1
+
+
+def invoke_numbered_scoring(
+    model: BaseChatModel, template: str, input: dict
+) -> dict[int, ScoringSystem]:
+    """
+    Run a prompt that answers with a Python dictionary from a number (of an
+    event or a user) to its scoring system.
+
+    Returns:
+        The scoring systems by number, empty if the answer can't be parsed
+    """
+    chain = ChatPromptTemplate.from_template(template) | model
+
+    try:
+        result = retry_with_backoff(
+            chain.invoke,
+            max_retries=5,
+            base_delay=2.0,
+            input={
+                **input,
+                "industry_mismatch_options": industry_mismatch_options,
+                "extra_info_options": extra_info_options,
+            },
+        )
+        response_str = (
+            str(result.content) if hasattr(result, "content") else str(result)
+        )
+        logger.info(f"Numbered relevance scores: {response_str}")
+
+        dict_match = re.search(r"\{.*\}", response_str, re.DOTALL)
+        parsed = ast.literal_eval(dict_match.group(0) if dict_match else response_str)
+        if not isinstance(parsed, dict):
+            raise ValueError("Scores are not a dictionary")
+        return {int(number): value for number, value in parsed.items()}
+    except RunDeadlineExceeded:
+        # The run stops scoring, the events aren't scored one by one instead
+        raise
+    except Exception as e:
+        logger.error(f"Error getting numbered relevance scores: {e}")
+        return {}
+
+
 class EventRelevanceCalculator:
     def __init__(self, model: BaseChatModel, user_profile: UserProfile):
         self.model = model
@@ -66,9 +143,190 @@ class EventRelevanceCalculator:
             return 25
         return 0
 
+    def _score_scoring_system(self, scoring_system: ScoringSystem) -> float | int:
+        interests_score = min(
+            scoring_system["interests"]["exact_match"] * 25
+            + scoring_system["interests"]["partial_match"] * 12
+            + scoring_system["interests"]["weak_match"] * 3,
+            50,
+        )
+        goals_score = min(
+            scoring_system["goals"]["exact_match"] * 25
+            + scoring_system["goals"]["partial_match"] * 12
+            + scoring_system["goals"]["weak_match"] * 3,
+            30,
+        )
+        industry_mismatch_score = self._industry_mismatch_deduction(
+            scoring_system["industry_mismatch"]
+        )
+        overly_specific_group_score = (
+            35 if scoring_system["overly_specific_nationality_or_ethic_group"] else 0
+        )
+        extra_info_value = scoring_system.get("extra_info")
+        if extra_info_value == "positive":
+            extra_info_score = 25
+        elif extra_info_value == "negative":
+            extra_info_score = -25
+        else:
+            extra_info_score = 0
+
+        return (
+            interests_score
+            + goals_score
+            - industry_mismatch_score
+            - overly_specific_group_score
+            + extra_info_score
+        )
+
+    def _count_exact_matches(
+        self, preferences: list[str], audience_profile: EventAudienceProfile
+    ) -> int:
+        """
+        Count the interests or goals that are one of the event's topics, or
+        part of one. A topic word inside a longer preference, like "business"
+        in "find a business partner", isn't enough, that's for the LLM to judge.
+        """
+        topics = [normalize_title(topic) for topic in audience_profile.topics]
+        topics = [topic for topic in topics if topic]
+
+        count = 0
+        for preference in preferences:
+            normalized = normalize_title(preference)
+            if normalized and any(
+                f" {normalized} " in f" {topic} " for topic in topics
+            ):
+                count += 1
+        return count
+
+    def _apply_audience_profile(
+        self, scoring_system: ScoringSystem, audience_profile: EventAudienceProfile
+    ) -> ScoringSystem:
+        """
+        Override the answers the audience profile settles without the LLM: exact
+        topic hits, and industry and nationality when the profile rules them out.
+        """
+        scoring_system["interests"]["exact_match"] = max(
+            scoring_system["interests"]["exact_match"],
+            self._count_exact_matches(self.user_profile.interests, audience_profile),
+        )
+        scoring_system["goals"]["exact_match"] = max(
+            scoring_system["goals"]["exact_match"],
+            self._count_exact_matches(self.user_profile.goals, audience_profile),
+        )
+        if not audience_profile.is_professional_networking:
+            scoring_system["industry_mismatch"] = "no_mismatch"
+        if audience_profile.nationality_or_ethnic_group is None:
+            scoring_system["overly_specific_nationality_or_ethic_group"] = False
+
+        return scoring_system
+
+    def _parse_scoring_system(self, response_str: str) -> ScoringSystem:
+        dict_match = re.search(r"\{.*\}", response_str, re.DOTALL)
+        scoring_system = ast.literal_eval(
+            dict_match.group(0) if dict_match else response_str
+        )
+        if not isinstance(scoring_system, dict):
+            raise ValueError(f"Expected a scoring system, got: {response_str}")
+        return cast(ScoringSystem, scoring_system)
+
+    def _calculate_event_relevance_based_on_audience_profile(
+        self, event_details: EventDetails
+    ) -> float | int:
+        """
+        Score the event from its cached audience profile instead of its page.
+        The LLM only sees the short profile, and is skipped entirely if what the
+        profile settles on its own already maxes out every score it could give.
+        """
+        audience_profile = event_details.audience_profile
+        assert audience_profile is not None
+
+        settled_scoring_system = self._apply_audience_profile(
+            {
+                "interests": {"exact_match": 0, "partial_match": 0, "weak_match": 0},
+                "goals": {"exact_match": 0, "partial_match": 0, "weak_match": 0},
+                "industry_mismatch": "no_mismatch",
+                "overly_specific_nationality_or_ethic_group": False,
+                "extra_info": None,
+            },
+            audience_profile,
+        )
+        if (
+            settled_scoring_system["interests"]["exact_match"] * 25 >= 50
+            and settled_scoring_system["goals"]["exact_match"] * 25 >= 30
+            and not audience_profile.is_professional_networking
+            and audience_profile.nationality_or_ethnic_group is None
+            and not self.user_profile.extra_info
+        ):
+            logger.info("Event relevance settled from its audience profile")
+            return self._score_scoring_system(settled_scoring_system)
+
+        template = (
+            """
+            You evaluate how relevant an event is to a user. The event is described by a short profile instead of its full page.
+
+            EVENT:
+            {event_summary}
+
+            USER:
+            Interests: {interests}
+            Goals: {goals}
+            Occupation: {occupation}
+            Extra information: {extra_info}
+            """
+            + SHORT_SCORING_RULES
+            + """
+            Return only a Python dictionary, without ``` or any other formatting, e.g.:
+            """
+            + SCORING_SYSTEM_EXAMPLE
+        )
+        prompt = ChatPromptTemplate.from_template(template)
+        chain = prompt | self.model
+
+        try:
+            result = retry_with_backoff(
+                chain.invoke,
+                max_retries=5,
+                base_delay=2.0,
+                input={
+                    "event_summary": self._summarize_event(event_details),
+                    "interests": self.user_profile.interests,
+                    "goals": self.user_profile.goals,
+                    "occupation": self.user_profile.occupation,
+                    "extra_info": self.user_profile.extra_info,
+                    "industry_mismatch_options": industry_mismatch_options,
+                    "extra_info_options": extra_info_options,
+                },
+            )
+
+            response_str = (
+                str(result.content) if hasattr(result, "content") else str(result)
+            )
+            logger.info(f"Event relevance score from audience profile: {response_str}")
+
+            scoring_system = self._apply_audience_profile(
+                self._parse_scoring_system(response_str), audience_profile
+            )
+            return self._score_scoring_system(scoring_system)
+        except RunDeadlineExceeded:
+            raise
+        except Exception as e:
+            logger.error(f"Error scoring event from its audience profile: {e}")
+            return 0
+
     def _calculate_event_relevance_based_on_interests_and_goals(
         self, webpage_content: str
     ) -> float | int:
+        scoring_system = self._get_page_scoring_system(webpage_content)
+        if scoring_system is None:
+            return 0
+        try:
+            return self._score_scoring_system(scoring_system)
+        except (KeyError, TypeError) as e:
+            logger.error(f"Error scoring scoring system: {e}")
+            return 0
+
+    def _get_page_scoring_system(self, webpage_content: str) -> Optional[ScoringSystem]:
+        """Get the LLM's scoring system for the event's page, None if it fails"""
         extra_info_section = (
             """
             STEP 5: EXTRA INFO
@@ -199,61 +457,17 @@ class EventRelevanceCalculator:
 
             logger.info(f"Event relevance score: {response_str}")
 
-            text_to_parse = response_str
-
-            # Convert to string to ensure we can split
-            text_to_parse = str(text_to_parse)
-
-            # Look for a dictionary pattern like
-            dict_pattern = r"\{.*\}"
-            dict_match = re.search(dict_pattern, text_to_parse, re.DOTALL)
-            if dict_match:
-                text_to_parse = dict_match.group(0)
-
             try:
-                scoring_system: ScoringSystem = ast.literal_eval(text_to_parse)
-                interests_score = min(
-                    scoring_system["interests"]["exact_match"] * 25
-                    + scoring_system["interests"]["partial_match"] * 12
-                    + scoring_system["interests"]["weak_match"] * 3,
-                    50,
-                )
-                goals_score = min(
-                    scoring_system["goals"]["exact_match"] * 25
-                    + scoring_system["goals"]["partial_match"] * 12
-                    + scoring_system["goals"]["weak_match"] * 3,
-                    30,
-                )
-                industry_mismatch_score = self._industry_mismatch_deduction(
-                    scoring_system["industry_mismatch"]
-                )
-                overly_specific_group_score = (
-                    35
-                    if scoring_system["overly_specific_nationality_or_ethic_group"]
-                    else 0
-                )
-                extra_info_value = scoring_system.get("extra_info")
-                if extra_info_value == "positive":
-                    extra_info_score = 25
-                elif extra_info_value == "negative":
-                    extra_info_score = -25
-                else:
-                    extra_info_score = 0
-
-                return (
-                    interests_score
-                    + goals_score
-                    - industry_mismatch_score
-                    - overly_specific_group_score
-                    + extra_info_score
-                )
+                return self._parse_scoring_system(response_str)
             except (SyntaxError, ValueError) as e:
                 logger.error(f"Error parsing scoring system: {e}")
-                return 0
+                return None
 
+        except RunDeadlineExceeded:
+            raise
         except Exception as e:
             logger.error(f"Unexpected error: {str(e)}")
-            return 0
+            return None
 
     def _calculate_price_score(
         self, price_of_event: int | float | None, budget: int | float
@@ -354,15 +568,9 @@ class EventRelevanceCalculator:
 
         return min(score, 15)
 
-    def calculate_event_relevance_score(
-        self, webpage_content: str | None, event_details: EventDetails
+    def _add_non_llm_scores(
+        self, relevance_score: float | int, event_details: EventDetails
     ) -> float:
-        if webpage_content is None:
-            return 0
-
-        relevance_score = self._calculate_event_relevance_based_on_interests_and_goals(
-            webpage_content
-        )
         price_score = self._calculate_price_score(
             event_details.price_of_event, self.user_profile.budget
         )
@@ -371,3 +579,353 @@ class EventRelevanceCalculator:
 
         total_score = relevance_score + price_score + distance_score + demographic_score
         return min(round(total_score, 1), 100)
+
+    def _score_event_from_scoring_system(
+        self, scoring_system: ScoringSystem, event_details: EventDetails
+    ) -> float:
+        """Get the total relevance of an event from the LLM's scoring system"""
+        if (
+            settings.RELEVANCE_USE_AUDIENCE_PROFILE
+            and event_details.audience_profile is not None
+        ):
+            scoring_system = self._apply_audience_profile(
+                scoring_system, event_details.audience_profile
+            )
+        relevance_score = self._score_scoring_system(scoring_system)
+        return self._add_non_llm_scores(relevance_score, event_details)
+
+    def calculate_page_scoring_system(
+        self, webpage_content: str
+    ) -> Optional[ScoringSystem]:
+        """
+        Get the LLM's answers for the event from its page alone, before its
+        details are known, with the prompt its batch would be scored with.
+        Score them with score_page_scoring_system once they are. None if the
+        LLM's answer can't be used.
+        """
+        if settings.RELEVANCE_BATCH_SIZE <= 1:
+            return self._get_page_scoring_system(webpage_content)
+
+        scoring_system = self._get_summary_scoring_systems(
+            [self._summarize_event(None, webpage_content)]
+        ).get(1)
+        return scoring_system if isinstance(scoring_system, dict) else None
+
+    def score_page_scoring_system(
+        self, scoring_system: ScoringSystem, event_details: EventDetails
+    ) -> float:
+        """
+        Get the total relevance of an event from the scoring system of its page,
+        adjusted by its audience profile as when events are scored in batches
+        """
+        return self._score_event_from_scoring_system(scoring_system, event_details)
+
+    def calculate_event_relevance_score(
+        self, webpage_content: str | None, event_details: EventDetails
+    ) -> float:
+        if webpage_content is None:
+            return 0
+
+        if (
+            settings.RELEVANCE_USE_AUDIENCE_PROFILE
+            and event_details.audience_profile is not None
+        ):
+            relevance_score = self._calculate_event_relevance_based_on_audience_profile(
+                event_details
+            )
+        else:
+            relevance_score = (
+                self._calculate_event_relevance_based_on_interests_and_goals(
+                    webpage_content
+                )
+            )
+
+        return self._add_non_llm_scores(relevance_score, event_details)
+
+    def _summarize_event(
+        self,
+        event_details: Optional[EventDetails],
+        webpage_content: Optional[str] = None,
+    ) -> str:
+        """
+        Describe an event in a few lines, with the start of its page if given.
+        Before its details are known the event is described by its page alone,
+        and without RELEVANCE_USE_AUDIENCE_PROFILE by its title and page.
+        """
+        lines = []
+        if event_details is not None:
+            lines.append(f"Title: {event_details.title}")
+
+        audience_profile = (
+            event_details.audience_profile
+            if event_details is not None and settings.RELEVANCE_USE_AUDIENCE_PROFILE
+            else None
+        )
+        if audience_profile is not None:
+            lines += [
+                f"Topics: {', '.join(audience_profile.topics)}",
+                f"Audience: {audience_profile.audience}",
+                "Primarily professional networking: "
+                f"{audience_profile.is_professional_networking}",
+                f"Industry focus: {audience_profile.industry_focus}",
+                "Exclusively for the nationality or ethnic group: "
+                f"{audience_profile.nationality_or_ethnic_group}",
+            ]
+
+        if webpage_content:
+            excerpt = " ".join(
+                webpage_content[: settings.RELEVANCE_BATCH_TEXT_CHARS].split()
+            )
+            lines.append(f"Page excerpt: {excerpt}")
+
+        return "\n".join(lines)
+
+    def _get_batches(self, summaries: list[str]) -> list[list[int]]:
+        """
+        Group events into batches of at most RELEVANCE_BATCH_SIZE events whose
+        summaries fit in RELEVANCE_BATCH_MAX_TOKENS, keeping their order.
+        """
+        batches: list[list[int]] = []
+        batch_tokens = 0
+        for index, summary in enumerate(summaries):
+            tokens = estimate_tokens(summary)
+            if (
+                not batches
+                or len(batches[-1]) >= settings.RELEVANCE_BATCH_SIZE
+                or batch_tokens + tokens > settings.RELEVANCE_BATCH_MAX_TOKENS
+            ):
+                batches.append([])
+                batch_tokens = 0
+            batches[-1].append(index)
+            batch_tokens += tokens
+
+        return batches
+
+    def _get_summary_scoring_systems(
+        self, summaries: list[str]
+    ) -> dict[int, ScoringSystem]:
+        """Get the LLM's answers for numbered event summaries in one call"""
+        template = (
+            """
+            You are a helpful personal assistant who evaluates events for relevance to a given user.
+            Score every one of the numbered events below independently.
+
+            USER:
+            Interests: {interests}
+            Goals: {goals}
+            Occupation: {occupation}
+            Extra information: {extra_info}
+
+            EVENTS:
+            {events}
+            """
+            + SHORT_SCORING_RULES
+            + """
+            Return only a Python dictionary from the number of each event to its scores, without ``` or any other formatting, e.g.:
+            {{1: """
+            + SCORING_SYSTEM_EXAMPLE
+            + """, 2: ...}}
+            """
+        )
+        numbered_summaries = "\n\n".join(
+            f"EVENT {number}:\n{summary}"
+            for number, summary in enumerate(summaries, start=1)
+        )
+        return invoke_numbered_scoring(
+            self.model,
+            template,
+            {
+                "events": numbered_summaries,
+                "interests": self.user_profile.interests,
+                "goals": self.user_profile.goals,
+                "occupation": self.user_profile.occupation,
+                "extra_info": self.user_profile.extra_info,
+            },
+        )
+
+    def _score_batch(
+        self, events: list[PreparedEvent], summaries: list[str]
+    ) -> list[float]:
+        """
+        Score a batch of events in one LLM call. Events missing from the answer,
+        or the whole batch if the answer can't be parsed, are scored one by one.
+        """
+        scoring_systems = self._get_summary_scoring_systems(summaries)
+
+        scores = []
+        for number, event in enumerate(events, start=1):
+            event_details = event.event_details
+            try:
+                scores.append(
+                    self._score_event_from_scoring_system(
+                        scoring_systems[number], event_details
+                    )
+                )
+            except (KeyError, TypeError, ValueError, AttributeError) as e:
+                logger.error(f"No batch score for {event.event_url} ({e}), retrying")
+                scores.append(
+                    self.calculate_event_relevance_score(
+                        event.webpage_content, event_details
+                    )
+                )
+
+        return scores
+
+    def calculate_event_relevance_scores(
+        self, events: list[PreparedEvent]
+    ) -> list[float]:
+        """
+        Score many events for the user with a few listwise LLM calls instead of
+        one call per event. The user's profile and the scoring instructions are
+        sent once per batch, with a short summary of every event in it.
+
+        Args:
+            events: Events to score
+
+        Returns:
+            The relevance of every event, in the same order
+        """
+        if settings.RELEVANCE_BATCH_SIZE <= 1:
+            return [
+                self.calculate_event_relevance_score(
+                    event.webpage_content, event.event_details
+                )
+                for event in events
+            ]
+
+        summaries = [
+            self._summarize_event(event.event_details, event.webpage_content)
+            for event in events
+        ]
+
+        scores: list[float] = [0] * len(events)
+        for batch in self._get_batches(summaries):
+            if len(batch) == 1:
+                event = events[batch[0]]
+                scores[batch[0]] = self.calculate_event_relevance_score(
+                    event.webpage_content, event.event_details
+                )
+                continue
+
+            batch_scores = self._score_batch(
+                [events[index] for index in batch],
+                [summaries[index] for index in batch],
+            )
+            for index, score in zip(batch, batch_scores):
+                scores[index] = score
+
+        return scores
+
+
+class MultiUserRelevanceCalculator:
+    """
+    Scores one event for many users with one LLM call per group of users, so
+    the event's content is only sent once. Each user's answer goes through the
+    same arithmetic as EventRelevanceCalculator.
+    """
+
+    def __init__(self, model: BaseChatModel, user_profiles: list[UserProfile]):
+        self.model = model
+        self.calculators = [
+            EventRelevanceCalculator(model, user_profile)
+            for user_profile in user_profiles
+        ]
+
+    def _summarize_user(self, user_profile: UserProfile) -> str:
+        return "\n".join(
+            [
+                f"Interests: {user_profile.interests}",
+                f"Goals: {user_profile.goals}",
+                f"Occupation: {user_profile.occupation}",
+                f"Extra information: {user_profile.extra_info}",
+            ]
+        )
+
+    def _score_group(
+        self,
+        calculators: list[EventRelevanceCalculator],
+        webpage_content: str,
+        event_details: EventDetails,
+    ) -> list[float]:
+        template = (
+            """
+            You are a helpful personal assistant who evaluates how relevant an event is to each of several users.
+            Score the event for every one of the numbered users below independently.
+
+            EVENT:
+            {event_summary}
+
+            USERS:
+            {users}
+            """
+            + SHORT_SCORING_RULES
+            + """
+            Return only a Python dictionary from the number of each user to their scores, without ``` or any other formatting, e.g.:
+            {{1: """
+            + SCORING_SYSTEM_EXAMPLE
+            + """, 2: ...}}
+            """
+        )
+        numbered_users = "\n\n".join(
+            f"USER {number}:\n{self._summarize_user(calculator.user_profile)}"
+            for number, calculator in enumerate(calculators, start=1)
+        )
+        scoring_systems = invoke_numbered_scoring(
+            self.model,
+            template,
+            {
+                "event_summary": calculators[0]._summarize_event(
+                    event_details, webpage_content
+                ),
+                "users": numbered_users,
+            },
+        )
+
+        scores = []
+        for number, calculator in enumerate(calculators, start=1):
+            try:
+                scores.append(
+                    calculator._score_event_from_scoring_system(
+                        scoring_systems[number], event_details
+                    )
+                )
+            except (KeyError, TypeError, ValueError, AttributeError) as e:
+                logger.error(f"No score for user {number} ({e}), retrying alone")
+                scores.append(
+                    calculator.calculate_event_relevance_score(
+                        webpage_content, event_details
+                    )
+                )
+
+        return scores
+
+    def calculate_event_relevance_scores(
+        self, webpage_content: str | None, event_details: EventDetails
+    ) -> list[float]:
+        """
+        Score the event for every user, RELEVANCE_MULTI_USER_BATCH_SIZE users
+        per LLM call.
+
+        Returns:
+            The relevance of the event for every user, in the same order
+        """
+        if webpage_content is None:
+            return [0] * len(self.calculators)
+
+        group_size = settings.RELEVANCE_MULTI_USER_BATCH_SIZE
+        if len(self.calculators) == 1 or group_size <= 1:
+            return [
+                calculator.calculate_event_relevance_score(
+                    webpage_content, event_details
+                )
+                for calculator in self.calculators
+            ]
+
+        scores: list[float] = []
+        for start in range(0, len(self.calculators), group_size):
+            scores += self._score_group(
+                self.calculators[start : start + group_size],
+                webpage_content,
+                event_details,
+            )
+        return scores
@@ -1,9 +1,11 @@
 import ast
 import re
 from datetime import datetime
+from typing import Any, Optional
 
 from langchain_core.language_models.chat_models import BaseChatModel
 from langchain_core.prompts import ChatPromptTemplate
+from pydantic import ValidationError
 
 from core.logging_config import get_logger
 from schemas.bias_options import (
@@ -12,18 +14,58 @@ from schemas.bias_options import (
     relationship_status_bias_options,
     sexual_orientation_bias_options,
 )
-from schemas.event_model import EventDetails
-from utils.address_utils import get_location_from_query
+from schemas.event_model import EventAudienceProfile, EventDetails
+from services.event_processing.negative_cache import NegativeReason
+from utils.address_utils import get_location_from_query_cached
 from utils.request_utils import retry_with_backoff
 
 logger = get_logger(__name__)
 
 
+def parse_audience_profile(value: Any) -> Optional[EventAudienceProfile]:
+    """
+    Parse the audience profile the model extracted, fixing what it commonly
+    gets wrong. The profile is optional, so it's dropped if it still can't be
+    parsed instead of failing the whole extraction.
+    """
+    if not isinstance(value, dict):
+        return None
+
+    value = dict(value)
+    if isinstance(value.get("topics"), str):
+        value["topics"] = [
+            topic.strip() for topic in value["topics"].split(",") if topic.strip()
+        ]
+    elif value.get("topics") is None:
+        value.pop("topics", None)
+    if value.get("is_professional_networking") is None:
+        value.pop("is_professional_networking", None)
+
+    try:
+        return EventAudienceProfile(**value)
+    except ValidationError as e:
+        logger.error(f"Ignoring unreadable audience profile: {e}")
+        return None
+
+
 def extract_event_details(
     webpage_content: str | None, model: BaseChatModel
 ) -> EventDetails | None:
-    if webpage_content is None:
-        return None
+    event_details, _ = extract_event_details_with_reason(webpage_content, model)
+    return event_details
+
+
+def extract_event_details_with_reason(
+    webpage_content: str | None, model: BaseChatModel
+) -> tuple[EventDetails | None, NegativeReason | None]:
+    """
+    Extract the details of the event from the web page content.
+
+    Returns:
+        The event details and None, or None and the reason nothing was extracted
+    """
+    if webpage_content is None or not webpage_content.strip():
+        return None, "empty_page"
 
     extract_details_template = """
         The web page content is as follows:
@@ -55,6 +97,12 @@ def extract_event_details(
         - Price of the event - just put the number like 20, 50, 100, etc. in either float or int format without the currency symbol. If an event is free, then the price should be 0 instead of None
         - Event format returns a list of of options. The options are: {event_format_options} - This tells us whether the event is online, in person or both. Mentions of Zoom, Online, Virtual, etc. should be considered online unless it's a combination of in person and online, in which case it should be ["offline", "online"].
         - Whether the event is sold out or out of spaces. Note that "Sales ending soon", "Sales end soon", "Limited spaces left", "Limited availability", "Limited availability left", or similar phrases are not a sign of a sold out event and details should be extracted.
+        - Audience profile - who the event is for, regardless of who is reading about it. Return a dictionary with:
+            * "topics": a list of 1 to 5 short lowercase topics the event is about, e.g. ["artificial intelligence", "startups", "networking"]
+            * "audience": one short sentence describing who the event is aimed at
+            * "is_professional_networking": True if the primary purpose of the event is professional networking, otherwise False
+            * "industry_focus": the industry or profession the event is exclusively for, e.g. "software engineering", or None if it isn't for a specific one
+            * "nationality_or_ethnic_group": the nationality or ethnic group the event is exclusively for, or None. Events that only mention a nationality, like "Italian cooking", "Latin dancing" or "Chinese language exchange", are not exclusive and should be None.
 
         The response should be None if there is something to indicate so, or a Python dictionary:
         Example:
@@ -72,7 +120,14 @@ def extract_event_details(
             }},
             "price_of_event": "20",
             "event_format": ["offline"],
-            "is_sold_out": False
+            "is_sold_out": False,
+            "audience_profile": {{
+                "topics": ["technology", "networking"],
+                "audience": "Software engineers working at startups",
+                "is_professional_networking": True,
+                "industry_focus": "software engineering",
+                "nationality_or_ethnic_group": None
+            }}
         }}
 
         CRITICAL: The location_of_event field MUST be a dictionary with a "full_address" key, never a plain string.
@@ -112,7 +167,7 @@ def extract_event_details(
         event_details = dict_match.group(0)
 
     if event_details.lower() == "none":
-        return None
+        return None, "not_an_event"
 
     try:
         event_details_dict = ast.literal_eval(event_details)
@@ -121,37 +176,47 @@ def extract_event_details(
             location_string = event_details_dict["location_of_event"]
             event_details_dict["location_of_event"] = {"full_address": location_string}
 
-        event_details_result: EventDetails | None = EventDetails(**event_details_dict)
+        audience_profile = parse_audience_profile(
+            event_details_dict.pop("audience_profile", None)
+        )
+        event_details_result = EventDetails(
+            **event_details_dict, audience_profile=audience_profile
+        )
     except (SyntaxError, ValueError) as e:
         logger.error(f"Error parsing event details: {e}")
         logger.error(f"Original event details: {og_event_details}")
         logger.error(f"Raw event details: {event_details}")
-        return None
+        return None, "parse_failed"
     except Exception as e:
         logger.error(f"Error creating EventDetails object: {e}")
         logger.error(f"Processed event details dict: {event_details_dict}")
         logger.error(f"Original event details: {og_event_details}")
-        return None
-
-    if (
-        event_details_result
-        and event_details_result.location_of_event
-        and event_details_result.location_of_event.full_address
-    ):
-        coordinates = get_location_from_query(
-            event_details_result.location_of_event.full_address
-        )
-        if (
-            coordinates
-            and coordinates.latitude is not None
-            and coordinates.longitude is not None
-        ):
-            event_details_result.location_of_event.latitude = coordinates.latitude
-            event_details_result.location_of_event.longitude = coordinates.longitude
-        else:
-            event_details_result.location_of_event.full_address = None
+        return None, "parse_failed"
 
     logger.info("Event details:")
     logger.info(event_details_result)
 
-    return event_details_result
+    return event_details_result, None
+
+
+async def add_event_coordinates(event_details: EventDetails) -> EventDetails:
+    """
+    Geocode the address of the event. The address is dropped if it can't be
+    geocoded since it's most likely not a real address.
+    """
+    location_of_event = event_details.location_of_event
+    if not location_of_event or not location_of_event.full_address:
+        return event_details
+
+    coordinates = await get_location_from_query_cached(location_of_event.full_address)
+    if (
+        coordinates
+        and coordinates.latitude is not None
+        and coordinates.longitude is not None
+    ):
+        location_of_event.latitude = coordinates.latitude
+        location_of_event.longitude = coordinates.longitude
+    else:
+        location_of_event.full_address = None
+
+    return event_details
@@ -0,0 +1,263 @@
+import hashlib
+import random
+import re
+import threading
+from collections import defaultdict
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from core.logging_config import get_logger
+from schemas.keyword_yield_model import EVENTBRITE_SOURCE, LUMA_SOURCE, MEETUP_SOURCE
+from utils.url_utils import get_event_platform
+
+logger = get_logger(__name__)
+
+# When the same event is cross-posted, the link from the earliest source here is
+# kept. Eventbrite pages carry the most complete details and ticketing.
+SOURCE_PREFERENCE = [EVENTBRITE_SOURCE, MEETUP_SOURCE, LUMA_SOURCE]
+
+SHINGLE_SIZE = 3
+# Pages with fewer shingles than this don't say enough to be compared safely
+MIN_SHINGLES = 20
+
+# 16 bands of 4 rows make pages with a similarity of ~0.5 or more likely to share
+# a bucket, candidates are then confirmed against SIMILARITY_THRESHOLD
+NUM_PERMUTATIONS = 64
+LSH_BANDS = 16
+LSH_ROWS = NUM_PERMUTATIONS // LSH_BANDS
+SIMILARITY_THRESHOLD = 0.6
+
+_MERSENNE_PRIME = (1 << 61) - 1
+_MAX_HASH = (1 << 32) - 1
+
+
+def normalize_title(title: str) -> str:
+    """Lowercase a title and drop punctuation, emoji and repeated whitespace"""
+    return " ".join(re.findall(r"[^\W_]+", title.lower()))
+
+
+def get_shingles(text: str, size: int = SHINGLE_SIZE) -> Set[str]:
+    """Get the set of overlapping word n-grams of a normalized text"""
+    words = normalize_title(text).split()
+    return {" ".join(words[i : i + size]) for i in range(len(words) - size + 1)}
+
+
+def sort_by_source_preference(event_links: Iterable[str]) -> List[str]:
+    """Order links so preferred sources come first, keeping the order within one"""
+
+    def source_rank(event_link: str) -> int:
+        source = get_event_platform(event_link)
+        if source in SOURCE_PREFERENCE:
+            return SOURCE_PREFERENCE.index(source)
+        return len(SOURCE_PREFERENCE)
+
+    return sorted(event_links, key=source_rank)
+
+
+class MinHasher:
+    """Estimates the Jaccard similarity of shingle sets with fixed-size signatures"""
+
+    def __init__(self, num_permutations: int = NUM_PERMUTATIONS, seed: int = 1):
+        rng = random.Random(seed)
+        self._permutations = [
+            (rng.randint(1, _MERSENNE_PRIME - 1), rng.randint(0, _MERSENNE_PRIME - 1))
+            for _ in range(num_permutations)
+        ]
+
+    def signature(self, shingles: Set[str]) -> Tuple[int, ...]:
+        hashes = [
+            int.from_bytes(
+                hashlib.blake2b(shingle.encode(), digest_size=8).digest(), "big"
+            )
+            for shingle in shingles
+        ]
+        return tuple(
+            min(((a * value + b) % _MERSENNE_PRIME) & _MAX_HASH for value in hashes)
+            for a, b in self._permutations
+        )
+
+    @staticmethod
+    def similarity(first: Tuple[int, ...], second: Tuple[int, ...]) -> float:
+        matches = sum(1 for a, b in zip(first, second) if a == b)
+        return matches / len(first)
+
+
+class NearDuplicateIndex:
+    """
+    Per-run index of the events seen so far, used to skip cross-posted copies of
+    an event before any LLM call is spent on them.
+
+    Events are matched on the similarity of their page text, using MinHash
+    signatures bucketed with LSH, and on their normalized title and date once
+    the details are known. Pages on the same platform share too much
+    boilerplate to be told apart by their text, so only pages from different
+    sources are matched that way.
+
+    Events should only be added, with check_event, once they pass
+    disqualification, so an event is never skipped for a copy that won't be
+    sent, e.g. a sold out or past instance of a recurring event.
+    find_page_duplicate and find_title_duplicate look an event up without
+    adding it, to skip a copy before it's scraped or its details are extracted.
+
+    Links should be checked in source preference order (see
+    sort_by_source_preference) so the link that is kept is the preferred one.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._minhasher = MinHasher()
+        self._signatures: Dict[str, Tuple[int, ...]] = {}
+        self._buckets: Dict[Tuple[int, Tuple[int, ...]], List[str]] = defaultdict(list)
+        self._titles: Dict[str, str] = {}
+        # Duplicate link to the link that was kept instead of it
+        self.duplicates: Dict[str, str] = {}
+
+    def _get_bands(
+        self, signature: Tuple[int, ...]
+    ) -> List[Tuple[int, Tuple[int, ...]]]:
+        return [
+            (band, signature[band * LSH_ROWS : (band + 1) * LSH_ROWS])
+            for band in range(LSH_BANDS)
+        ]
+
+    def _get_signature(
+        self, webpage_content: Optional[str]
+    ) -> Optional[Tuple[int, ...]]:
+        shingles = get_shingles(webpage_content) if webpage_content else set()
+        if len(shingles) < MIN_SHINGLES:
+            return None
+        return self._minhasher.signature(shingles)
+
+    def _find_similar(
+        self, event_link: str, signature: Tuple[int, ...]
+    ) -> Optional[str]:
+        source = get_event_platform(event_link)
+        candidates = dict.fromkeys(
+            candidate_link
+            for band in self._get_bands(signature)
+            for candidate_link in self._buckets.get(band, [])
+            if get_event_platform(candidate_link) != source
+        )
+        for candidate_link in candidates:
+            similarity = MinHasher.similarity(
+                signature, self._signatures[candidate_link]
+            )
+            if similarity >= SIMILARITY_THRESHOLD:
+                return candidate_link
+        return None
+
+    def _mark_duplicate(self, event_link: str, duplicate_of: str) -> str:
+        self.duplicates[event_link] = duplicate_of
+        logger.info(f"Skipping {event_link}, duplicate of {duplicate_of}")
+        return duplicate_of
+
+    def _get_title_key(self, title: str, date_of_event: Optional[str]) -> str:
+        return f"{normalize_title(title)}|{date_of_event or ''}"
+
+    def find_page_duplicate(
+        self, event_link: str, webpage_content: Optional[str]
+    ) -> Optional[str]:
+        """
+        Check the page text of an event against the events added before it,
+        without adding it.
+
+        Args:
+            event_link: Canonical URL of the event
+            webpage_content: Text of the event page
+
+        Returns:
+            The link of the event this one duplicates, or None if it's new
+        """
+        signature = self._get_signature(webpage_content)
+        if signature is None:
+            return None
+
+        with self._lock:
+            if event_link in self._signatures:
+                return None
+
+            duplicate_of = self._find_similar(event_link, signature)
+            if duplicate_of is not None:
+                return self._mark_duplicate(event_link, duplicate_of)
+
+        return None
+
+    def find_title_duplicate(
+        self, event_link: str, title: str, date_of_event: Optional[str] = None
+    ) -> Optional[str]:
+        """
+        Check the normalized title and date of an event against the events
+        added before it, without adding it.
+
+        Returns:
+            The link of the event this one duplicates, or None if it's new
+        """
+        title_key = self._get_title_key(title, date_of_event)
+
+        with self._lock:
+            duplicate_of = self._titles.get(title_key, event_link)
+            if duplicate_of != event_link:
+                return self._mark_duplicate(event_link, duplicate_of)
+
+        return None
+
+    def check_event(
+        self,
+        event_link: str,
+        webpage_content: Optional[str],
+        title: str,
+        date_of_event: Optional[str] = None,
+    ) -> Optional[str]:
+        """
+        Check the page text and the normalized title and date of an event
+        against the events added before it, and add it if it's new. An event
+        found to be a duplicate isn't added, so it never hides later copies.
+
+        Args:
+            event_link: Canonical URL of the event
+            webpage_content: Text of the event page
+            title: Title of the event
+            date_of_event: Date of the event, if known
+
+        Returns:
+            The link of the event this one duplicates, or None if it's new
+        """
+        return self.check_signed_event(
+            event_link, self._get_signature(webpage_content), title, date_of_event
+        )
+
+    def check_signed_event(
+        self,
+        event_link: str,
+        signature: Optional[Tuple[int, ...]],
+        title: str,
+        date_of_event: Optional[str] = None,
+    ) -> Optional[str]:
+        """
+        Like check_event, for an event whose page was signed by another index,
+        e.g. one found by another shard of the run. See get_signature.
+        """
+        title_key = self._get_title_key(title, date_of_event)
+
+        with self._lock:
+            duplicate_of = None
+            if signature is not None and event_link not in self._signatures:
+                duplicate_of = self._find_similar(event_link, signature)
+            if duplicate_of is None:
+                duplicate_of = self._titles.get(title_key, event_link)
+                if duplicate_of == event_link:
+                    duplicate_of = None
+            if duplicate_of is not None:
+                return self._mark_duplicate(event_link, duplicate_of)
+
+            self._titles.setdefault(title_key, event_link)
+            if signature is not None and event_link not in self._signatures:
+                self._signatures[event_link] = signature
+                for band in self._get_bands(signature):
+                    self._buckets[band].append(event_link)
+
+        return None
+
+    def get_signature(self, event_link: str) -> Optional[Tuple[int, ...]]:
+        """Signature of the page of an added event, None if it had too little text"""
+        with self._lock:
+            return self._signatures.get(event_link)
@@ -0,0 +1,58 @@
+from typing import Dict, Literal, Optional
+
+from core.cache import CacheWriteBuffer, cache
+from core.logging_config import get_logger
+
+logger = get_logger(__name__)
+
+# Why a link was rejected regardless of which user it was checked for
+NegativeReason = Literal[
+    "scrape_failed",
+    "empty_page",
+    "not_an_event",
+    "parse_failed",
+    "past_event",
+    "sold_out",
+]
+
+HOUR_IN_SECONDS = 60 * 60
+
+# Transient failures are retried soon, settled outcomes are remembered longer
+NEGATIVE_CACHE_TTL_SECONDS: Dict[NegativeReason, int] = {
+    "scrape_failed": HOUR_IN_SECONDS,
+    "empty_page": 6 * HOUR_IN_SECONDS,
+    "not_an_event": 24 * HOUR_IN_SECONDS,
+    "parse_failed": 6 * HOUR_IN_SECONDS,
+    "past_event": 7 * 24 * HOUR_IN_SECONDS,
+    "sold_out": 6 * HOUR_IN_SECONDS,
+}
+
+
+def get_negative_cache_key(event_link: str) -> str:
+    return f"event_negative:{event_link}"
+
+
+def parse_negative_reason(value: Optional[str]) -> Optional[NegativeReason]:
+    """Get the reason from a cached value, None for unknown or missing values"""
+    if value in NEGATIVE_CACHE_TTL_SECONDS:
+        return value  # type: ignore[return-value]
+    return None
+
+
+async def record_negative_result(
+    event_link: str,
+    reason: NegativeReason,
+    cache_writer: Optional[CacheWriteBuffer] = None,
+) -> None:
+    """Remember that a link was rejected so it's skipped until the TTL runs out"""
+    logger.info(f"Caching negative result for {event_link}: {reason}")
+
+    cache_key = get_negative_cache_key(event_link)
+    ttl_seconds = NEGATIVE_CACHE_TTL_SECONDS[reason]
+    try:
+        if cache_writer is not None:
+            await cache_writer.add(cache_key, reason, ttl_seconds)
+        else:
+            await cache.set(cache_key, reason, ttl_seconds)
+    except Exception as e:
+        logger.error(f"Error caching negative result: {e}")
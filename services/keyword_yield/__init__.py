@@ -0,0 +1 @@
+# Keyword yield services package
@@ -0,0 +1,295 @@
+from collections import defaultdict
+from typing import Collection, Dict, List, Optional, Set, Tuple
+
+from core.cache import CacheEntry, cache
+from core.logging_config import get_logger
+from schemas.keyword_yield_model import (
+    CITY_LISTING_KEYWORD,
+    EVENTBRITE_SOURCE,
+    LUMA_SOURCE,
+    MEETUP_SOURCE,
+    KeywordYieldStats,
+    ScrapePlan,
+)
+
+logger = get_logger(__name__)
+
+KEYWORD_YIELD_TTL_SECONDS = 90 * 24 * 60 * 60
+
+# Only act on keywords that have been scraped enough times to trust their stats
+MIN_RUNS_FOR_PRUNING = 2
+MIN_LINKS_FOR_PRUNING = 5
+# A keyword is merged into another one if that one already found this share of
+# its links
+REDUNDANT_OVERLAP_RATE = 0.8
+# Never prune a source down to fewer keywords than this
+MIN_KEYWORDS_PER_SOURCE = 3
+
+# Sources whose links survive often get more events per query and vice versa
+HIGH_SURVIVAL_RATE = 0.5
+LOW_SURVIVAL_RATE = 0.15
+COUNT_INCREASE_FACTOR = 1.5
+COUNT_DECREASE_FACTOR = 0.6
+MIN_COUNT = 2
+
+
+class KeywordYieldService:
+    """
+    Service for tracking how many useful events each search keyword yields per
+    source and city, and for using those stats to plan the next scrape.
+    """
+
+    def __init__(self):
+        pass
+
+    def _get_key(self, city: str, source: str, keyword: str) -> str:
+        return f"keyword_yield:{city.lower()}:{source}:{keyword.lower()}"
+
+    async def get_stats(
+        self, city: str, source: str, keywords: List[str]
+    ) -> Dict[str, KeywordYieldStats]:
+        """Get the yield stats of the keywords, keywords without stats are skipped"""
+        if not keywords:
+            return {}
+
+        keys = [self._get_key(city, source, keyword) for keyword in keywords]
+        try:
+            values = await cache.mget(keys)
+        except Exception as e:
+            logger.error(f"Error getting keyword yield stats: {e}")
+            return {}
+
+        stats = {}
+        for keyword, value in zip(keywords, values):
+            if value is None:
+                continue
+            try:
+                stats[keyword] = KeywordYieldStats.model_validate_json(value)
+            except Exception as e:
+                logger.error(f"Error parsing keyword yield stats for {keyword}: {e}")
+
+        return stats
+
+    async def plan_scrape(self, keywords: List[str], city: str) -> ScrapePlan:
+        """
+        Decide which keywords to search each source for and how many events to
+        take from it, based on the stats of previous runs in the same city.
+        """
+        default_plan = ScrapePlan()
+
+        eventbrite_stats = await self.get_stats(city, EVENTBRITE_SOURCE, keywords)
+        meetup_stats = await self.get_stats(city, MEETUP_SOURCE, keywords)
+        luma_stats = await self.get_stats(city, LUMA_SOURCE, [CITY_LISTING_KEYWORD])
+
+        plan = ScrapePlan(
+            eventbrite_keywords=self._prune_keywords(
+                keywords, eventbrite_stats, EVENTBRITE_SOURCE
+            ),
+            meetup_keywords=self._prune_keywords(keywords, meetup_stats, MEETUP_SOURCE),
+            eventbrite_regular_count=self._scale_count(
+                default_plan.eventbrite_regular_count, eventbrite_stats
+            ),
+            meetup_max_events=self._scale_count(
+                default_plan.meetup_max_events, meetup_stats
+            ),
+            luma_max_events=self._scale_count(default_plan.luma_max_events, luma_stats),
+        )
+
+        logger.info(f"Scrape plan: {plan}")
+        return plan
+
+    async def get_link_stats(
+        self, city: str, event_links_by_source: Dict[str, Dict[str, List[str]]]
+    ) -> Dict[str, List[Optional[KeywordYieldStats]]]:
+        """
+        Get the stats of every source and keyword that found each link, None
+        for the ones without enough runs behind them to trust.
+        """
+        link_stats: Dict[str, List[Optional[KeywordYieldStats]]] = defaultdict(list)
+        for source, events_by_keyword in event_links_by_source.items():
+            stored_stats = await self.get_stats(city, source, list(events_by_keyword))
+            for keyword, event_links in events_by_keyword.items():
+                stats = stored_stats.get(keyword)
+                if stats is not None and not self._is_trusted(stats):
+                    stats = None
+                for event_link in event_links:
+                    link_stats[event_link].append(stats)
+
+        return link_stats
+
+    def _is_trusted(self, stats: KeywordYieldStats) -> bool:
+        return (
+            stats.runs >= MIN_RUNS_FOR_PRUNING and stats.links >= MIN_LINKS_FOR_PRUNING
+        )
+
+    def _prune_keywords(
+        self, keywords: List[str], stats: Dict[str, KeywordYieldStats], source: str
+    ) -> List[str]:
+        """
+        Drop keywords that never produce a surviving event and merge keywords
+        whose links are almost all found by a keyword that is kept anyway.
+        """
+
+        # Consider the most productive keywords first so that redundant
+        # keywords get merged into the better one of the pair
+        def priority(keyword: str) -> float:
+            keyword_stats = stats.get(keyword)
+            if keyword_stats is None or not self._is_trusted(keyword_stats):
+                return float("inf")
+            return keyword_stats.survived_links * (
+                1 + keyword_stats.average_relevance / 100
+            )
+
+        kept: List[str] = []
+        dropped: List[str] = []
+
+        for keyword in sorted(keywords, key=priority, reverse=True):
+            keyword_stats = stats.get(keyword)
+            if keyword_stats is None or not self._is_trusted(keyword_stats):
+                kept.append(keyword)
+                continue
+
+            if keyword_stats.survived_links == 0:
+                logger.info(f"Dropping '{keyword}' on {source}: no surviving events")
+                dropped.append(keyword)
+                continue
+
+            covering_keyword = next(
+                (
+                    kept_keyword
+                    for kept_keyword in kept
+                    if keyword_stats.shared_links.get(kept_keyword.lower(), 0)
+                    >= REDUNDANT_OVERLAP_RATE * keyword_stats.links
+                ),
+                None,
+            )
+            if covering_keyword is not None:
+                logger.info(
+                    f"Merging '{keyword}' into '{covering_keyword}' on {source}: "
+                    "mostly the same events"
+                )
+                dropped.append(keyword)
+                continue
+
+            kept.append(keyword)
+
+        # Put back the best of the dropped keywords if too few are left
+        missing = min(MIN_KEYWORDS_PER_SOURCE, len(keywords)) - len(kept)
+        if missing > 0:
+            kept.extend(dropped[:missing])
+
+        # Keep the original order of the keywords
+        kept_set = set(kept)
+        return [keyword for keyword in keywords if keyword in kept_set]
+
+    def _scale_count(self, base_count: int, stats: Dict[str, KeywordYieldStats]) -> int:
+        trusted_stats = [
+            keyword_stats
+            for keyword_stats in stats.values()
+            if self._is_trusted(keyword_stats)
+        ]
+        links = sum(keyword_stats.links for keyword_stats in trusted_stats)
+        if not links:
+            return base_count
+
+        survived_links = sum(
+            keyword_stats.survived_links for keyword_stats in trusted_stats
+        )
+        survival_rate = survived_links / links
+
+        if survival_rate >= HIGH_SURVIVAL_RATE:
+            return round(base_count * COUNT_INCREASE_FACTOR)
+        if survival_rate < LOW_SURVIVAL_RATE:
+            return max(MIN_COUNT, round(base_count * COUNT_DECREASE_FACTOR))
+        return base_count
+
+    async def record_run(
+        self,
+        city: str,
+        event_links_by_source: Dict[str, Dict[str, List[str]]],
+        outcomes: Dict[str, Optional[float]],
+        unchecked_links: Optional[Collection[str]] = None,
+    ) -> None:
+        """
+        Add the yield of a run to the stored stats.
+
+        Args:
+            city: City the run searched in
+            event_links_by_source: Links found per source and keyword
+            outcomes: Relevance of each link that survived disqualification, or
+                None if the link was disqualified or failed
+            unchecked_links: Links the run stopped before checking or scoring,
+                or that the pre-ranker dropped, left out of the stats so they
+                don't count as misses
+        """
+        if unchecked_links:
+            unchecked = set(unchecked_links)
+            checked_links_by_source: Dict[str, Dict[str, List[str]]] = {}
+            for source, events_by_keyword in event_links_by_source.items():
+                checked_links_by_source[source] = {}
+                for keyword, event_links in events_by_keyword.items():
+                    checked_links = [
+                        link for link in event_links if link not in unchecked
+                    ]
+                    if checked_links:
+                        checked_links_by_source[source][keyword] = checked_links
+            event_links_by_source = checked_links_by_source
+
+        link_origins: Dict[str, Set[Tuple[str, str]]] = defaultdict(set)
+        for source, events_by_keyword in event_links_by_source.items():
+            for keyword, event_links in events_by_keyword.items():
+                for event_link in event_links:
+                    link_origins[event_link].add((source, keyword))
+
+        try:
+            entries: List[CacheEntry] = []
+
+            for source, events_by_keyword in event_links_by_source.items():
+                stored_stats = await self.get_stats(
+                    city, source, list(events_by_keyword)
+                )
+
+                for keyword, event_links in events_by_keyword.items():
+                    stats = stored_stats.get(keyword) or KeywordYieldStats()
+                    relevances = [
+                        relevance
+                        for event_link in event_links
+                        if (relevance := outcomes.get(event_link)) is not None
+                    ]
+
+                    stats.runs += 1
+                    stats.links += len(event_links)
+                    stats.unique_links += sum(
+                        1
+                        for event_link in event_links
+                        if len(link_origins[event_link]) == 1
+                    )
+                    stats.survived_links += len(relevances)
+                    stats.relevance_sum += sum(relevances)
+                    stats.max_relevance = max([stats.max_relevance or 0, *relevances])
+
+                    for other_keyword, other_links in events_by_keyword.items():
+                        if other_keyword == keyword:
+                            continue
+                        shared = len(set(event_links) & set(other_links))
+                        if shared:
+                            other_key = other_keyword.lower()
+                            stats.shared_links[other_key] = (
+                                stats.shared_links.get(other_key, 0) + shared
+                            )
+
+                    entries.append(
+                        CacheEntry(
+                            self._get_key(city, source, keyword),
+                            stats.model_dump_json(),
+                            KEYWORD_YIELD_TTL_SECONDS,
+                        )
+                    )
+
+            await cache.mset(entries)
+            logger.info("Recorded keyword yield stats")
+        except Exception as e:
+            logger.error(f"Error recording keyword yield stats: {e}")
+
+
+keyword_yield_service = KeywordYieldService()
@@ -0,0 +1,65 @@
+from abc import ABC, abstractmethod
+
+from core.config import settings
+from core.logging_config import get_logger
+from schemas.agent_run_model import AgentRun, QueuedRun
+from services.cloud_run_jobs import cloud_run_service
+from services.runs.run_queue import RunQueue, run_queue
+from utils.user_profile_utils import serialize_user_profile
+
+logger = get_logger(__name__)
+
+
+class RunExecutor(ABC):
+    """Starts agent runs requested through the API."""
+
+    @abstractmethod
+    async def submit(self, run: AgentRun) -> str:
+        """
+        Start an agent run.
+
+        Returns:
+            An ID for tracking the run
+
+        Raises:
+            Exception: If the run couldn't be started
+        """
+
+
+class CloudRunJobsExecutor(RunExecutor):
+    """Runs every agent run as its own Cloud Run Jobs execution."""
+
+    async def submit(self, run: AgentRun) -> str:
+        parameters = {
+            "only_highly_relevant": str(run.only_highly_relevant),
+            "user_profile": serialize_user_profile(run.user_profile),
+            "user_id": run.user_id,
+            "run_id": run.run_id,
+        }
+        return await cloud_run_service.execute_job(
+            parameters=parameters, task_count=settings.AGENT_SHARD_TASK_COUNT
+        )
+
+
+class QueueRunExecutor(RunExecutor):
+    """Puts agent runs on the run queue for the long-lived workers."""
+
+    def __init__(self, queue: RunQueue):
+        self.queue = queue
+
+    async def submit(self, run: AgentRun) -> str:
+        queued_run = QueuedRun(**run.model_dump())
+        await self.queue.enqueue(queued_run)
+        logger.info(f"Queued run {queued_run.run_id} for user {run.user_id}")
+        return queued_run.run_id
+
+
+def create_run_executor() -> RunExecutor:
+    """Create the executor selected by the AGENT_EXECUTOR setting"""
+    if settings.AGENT_EXECUTOR == "queue":
+        return QueueRunExecutor(run_queue)
+    return CloudRunJobsExecutor()
+
+
+# Global instance - use this in all services
+run_executor = create_run_executor()
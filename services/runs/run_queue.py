@@ -0,0 +1,217 @@
+import asyncio
+import time
+from abc import ABC, abstractmethod
+from typing import Dict, List, Optional, Set, Tuple
+
+from upstash_redis.asyncio import Redis
+
+from core.config import settings
+from core.logging_config import get_logger
+from schemas.agent_run_model import QueuedRun
+
+logger = get_logger(__name__)
+
+
+class RunQueue(ABC):
+    """
+    Queue of agent runs for the workers to process.
+
+    A dequeued run stays claimed until the worker acks it once it's done, or
+    puts it back with retry if it failed. A run whose worker died without doing
+    either is taken back by another worker with reclaim.
+    """
+
+    @abstractmethod
+    async def enqueue(self, run: QueuedRun) -> None:
+        """Add a run to the back of the queue"""
+
+    @abstractmethod
+    async def dequeue(self) -> Optional[QueuedRun]:
+        """Claim the run at the front of the queue, None if the queue is empty"""
+
+    @abstractmethod
+    async def ack(self, run: QueuedRun) -> None:
+        """Remove a claimed run from the queue for good"""
+
+    @abstractmethod
+    async def retry(self, run: QueuedRun) -> None:
+        """Put a claimed run back at the back of the queue, counting the attempt"""
+
+    @abstractmethod
+    async def reclaim(self, timeout_seconds: float) -> List[QueuedRun]:
+        """
+        Claim again the runs that have been claimed for longer than
+        timeout_seconds, whose worker is taken to have died.
+
+        Returns:
+            The runs taken back, claimed by the caller to retry or ack
+        """
+
+
+class InMemoryRunQueue(RunQueue):
+    """
+    Run queue held in the process, for local use. Runs are lost on restart and
+    only workers running in the same process see them.
+    """
+
+    def __init__(self):
+        self._pending: asyncio.Queue[QueuedRun] = asyncio.Queue()
+        self._claimed: Dict[str, QueuedRun] = {}
+
+    async def enqueue(self, run: QueuedRun) -> None:
+        await self._pending.put(run)
+
+    async def dequeue(self) -> Optional[QueuedRun]:
+        try:
+            run = self._pending.get_nowait()
+        except asyncio.QueueEmpty:
+            return None
+
+        run = run.model_copy(update={"claimed_at": time.time()})
+        self._claimed[run.run_id] = run
+        return run
+
+    async def ack(self, run: QueuedRun) -> None:
+        self._claimed.pop(run.run_id, None)
+
+    async def retry(self, run: QueuedRun) -> None:
+        self._claimed.pop(run.run_id, None)
+        await self._pending.put(
+            run.model_copy(update={"attempts": run.attempts + 1, "claimed_at": None})
+        )
+
+    async def reclaim(self, timeout_seconds: float) -> List[QueuedRun]:
+        now = time.time()
+        reclaimed = []
+        for run_id, run in list(self._claimed.items()):
+            if run.claimed_at is not None and now - run.claimed_at >= timeout_seconds:
+                run = run.model_copy(update={"claimed_at": now})
+                self._claimed[run_id] = run
+                reclaimed.append(run)
+        return reclaimed
+
+
+class UpstashRunQueue(RunQueue):
+    """
+    Run queue kept in two Upstash Redis lists. Claiming a run moves it from the
+    pending list to the processing list in one atomic step, so a run is never
+    handed to two workers, and stamps it with the time it was claimed at. A run
+    whose worker died stays in the processing list until reclaim takes it back.
+    """
+
+    PENDING_KEY = "run_queue:pending"
+    PROCESSING_KEY = "run_queue:processing"
+
+    # Replaces an entry of a list with another, unless it's already gone
+    REPLACE_SCRIPT = """
+    if redis.call('LREM', KEYS[1], 1, ARGV[1]) == 1 then
+        redis.call('LPUSH', KEYS[1], ARGV[2])
+        return 1
+    end
+    return 0
+    """
+
+    def __init__(self, url: str, token: str):
+        self.client = Redis(url=url, token=token)
+        # IDs of the runs this worker is processing, so it never reclaims them
+        self._claimed: Set[str] = set()
+
+    async def _replace(self, value: str, new_value: str) -> bool:
+        replaced = await self.client.eval(
+            self.REPLACE_SCRIPT, keys=[self.PROCESSING_KEY], args=[value, new_value]
+        )
+        return bool(replaced)
+
+    async def _get_processing(self) -> List[Tuple[str, Optional[QueuedRun]]]:
+        """Entries of the processing list, with the run unless it's unreadable"""
+        entries: List[Tuple[str, Optional[QueuedRun]]] = []
+        for value in await self.client.lrange(self.PROCESSING_KEY, 0, -1):
+            try:
+                entries.append((value, QueuedRun.model_validate_json(value)))
+            except ValueError:
+                entries.append((value, None))
+        return entries
+
+    async def enqueue(self, run: QueuedRun) -> None:
+        await self.client.lpush(self.PENDING_KEY, run.model_dump_json())
+
+    async def dequeue(self) -> Optional[QueuedRun]:
+        value = await self.client.lmove(
+            self.PENDING_KEY, self.PROCESSING_KEY, wherefrom="RIGHT", whereto="LEFT"
+        )
+        if value is None:
+            return None
+
+        try:
+            run = QueuedRun.model_validate_json(value)
+        except ValueError as e:
+            logger.error(f"Dropping unreadable queued run: {e}")
+            await self.client.lrem(self.PROCESSING_KEY, 1, value)
+            return None
+
+        # If a reclaim got to the entry first it already stamped it
+        run = run.model_copy(update={"claimed_at": time.time()})
+        await self._replace(value, run.model_dump_json())
+        self._claimed.add(run.run_id)
+        return run
+
+    async def ack(self, run: QueuedRun) -> None:
+        # Entries are found by run ID, so a worker can ack a run it didn't
+        # claim itself, e.g. one it reclaimed
+        self._claimed.discard(run.run_id)
+        for value, processing_run in await self._get_processing():
+            if processing_run is not None and processing_run.run_id == run.run_id:
+                await self.client.lrem(self.PROCESSING_KEY, 1, value)
+
+    async def retry(self, run: QueuedRun) -> None:
+        retried_run = run.model_copy(
+            update={"attempts": run.attempts + 1, "claimed_at": None}
+        )
+        await self.client.lpush(self.PENDING_KEY, retried_run.model_dump_json())
+        await self.ack(run)
+
+    async def reclaim(self, timeout_seconds: float) -> List[QueuedRun]:
+        now = time.time()
+        reclaimed = []
+        for value, run in await self._get_processing():
+            if run is None:
+                logger.error("Dropping unreadable claimed run")
+                await self.client.lrem(self.PROCESSING_KEY, 1, value)
+                continue
+            if run.run_id in self._claimed:
+                continue
+
+            if run.claimed_at is None:
+                # Its worker stopped right after claiming it, time it from now
+                stamped_run = run.model_copy(update={"claimed_at": now})
+                await self._replace(value, stamped_run.model_dump_json())
+                continue
+            if now - run.claimed_at < timeout_seconds:
+                continue
+
+            # Only one of the workers reclaiming at the same time gets the run
+            reclaimed_run = run.model_copy(update={"claimed_at": now})
+            if await self._replace(value, reclaimed_run.model_dump_json()):
+                self._claimed.add(run.run_id)
+                reclaimed.append(reclaimed_run)
+
+        return reclaimed
+
+
+def create_run_queue() -> RunQueue:
+    """Create the run queue selected by the RUN_QUEUE_BACKEND setting"""
+    if settings.RUN_QUEUE_BACKEND == "memory":
+        logger.info("Using in-memory run queue")
+        return InMemoryRunQueue()
+    if not settings.UPSTASH_REDIS_REST_URL or not settings.UPSTASH_REDIS_REST_TOKEN:
+        logger.warning("Upstash Redis credentials not found, using in-memory run queue")
+        return InMemoryRunQueue()
+
+    return UpstashRunQueue(
+        url=settings.UPSTASH_REDIS_REST_URL,
+        token=settings.UPSTASH_REDIS_REST_TOKEN,
+    )
+
+
+# Global instance - use this in all services
+run_queue = create_run_queue()
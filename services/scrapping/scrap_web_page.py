@@ -1,9 +1,99 @@
-from playwright.async_api import Browser, async_playwright
+import asyncio
+from concurrent.futures import ProcessPoolExecutor
+from typing import Literal, Optional
+
+from playwright.async_api import Browser, Page, async_playwright
 
 from core.browser_config import BrowserConfig
+from core.config import settings
+from utils.html_utils import html_to_text
+
+# - "inner_text": rendered text of the whole body (forces a layout pass)
+# - "text_content": textContent of the main content region, no layout needed
+# - "html": raw HTML of the main content region, converted to text in Python
+ExtractionMode = Literal["inner_text", "text_content", "html"]
+
+# Prefer <main>, then a single <article>, and fall back to the whole body
+MAIN_REGION_SCRIPT = """
+() => {
+    const articles = document.querySelectorAll("article");
+    return (
+        document.querySelector("main") ||
+        (articles.length === 1 ? articles[0] : null) ||
+        document.body
+    );
+}
+"""
+
+TEXT_CONTENT_SCRIPT = f"""
+() => {{
+    const region = ({MAIN_REGION_SCRIPT})();
+    if (!region) return "";
+    const clone = region.cloneNode(true);
+    clone
+        .querySelectorAll("script, style, noscript, template, svg, iframe")
+        .forEach((element) => element.remove());
+    return clone.textContent || "";
+}}
+"""
+
+HTML_SCRIPT = f"""
+() => {{
+    const region = ({MAIN_REGION_SCRIPT})();
+    return region ? region.outerHTML : "";
+}}
+"""
+
+_process_pool: Optional[ProcessPoolExecutor] = None
+
+
+def _get_process_pool() -> ProcessPoolExecutor:
+    global _process_pool
+    if _process_pool is None:
+        _process_pool = ProcessPoolExecutor(
+            max_workers=settings.SCRAP_PAGE_WORKER_PROCESSES
+        )
+    return _process_pool
+
+
+def _collapse_whitespace(text: str) -> str:
+    lines = (" ".join(line.split()) for line in text.splitlines())
+    return "\n".join(line for line in lines if line)
+
+
+async def extract_page_text(page: Page, mode: ExtractionMode = "inner_text") -> str:
+    """
+    Extract the text of an already loaded page.
+
+    Args:
+        page: Playwright page that has finished loading
+        mode: How to read the text out of the page (see ExtractionMode)
+
+    Returns:
+        The text content of the page
+    """
+    if mode == "inner_text":
+        return str(await page.inner_text("body"))
+
+    if mode == "text_content":
+        text_content = await page.evaluate(TEXT_CONTENT_SCRIPT)
+        return _collapse_whitespace(str(text_content))
+
+    html = str(await page.evaluate(HTML_SCRIPT))
+    if settings.SCRAP_PAGE_USE_WORKER_PROCESS:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(_get_process_pool(), html_to_text, html)
+
+    return html_to_text(html)
 
 
-async def scrap_page(url, browser: Browser | None = None, max_retries=3):
+async def scrap_page(
+    url,
+    browser: Browser | None = None,
+    max_retries=3,
+    mode: ExtractionMode | None = None,
+):
+    extraction_mode = mode or settings.SCRAP_PAGE_EXTRACTION_MODE
     created_browser = False
     playwright = None
     for attempt in range(max_retries):
@@ -16,10 +106,12 @@ async def scrap_page(url, browser: Browser | None = None, max_retries=3):
                 created_browser = True
 
             page = await browser.new_page()
-            await page.goto(url)
-            await page.wait_for_load_state("domcontentloaded")
+            await page.goto(url, timeout=settings.SCRAP_PAGE_TIMEOUT_MS)
+            await page.wait_for_load_state(
+                "domcontentloaded", timeout=settings.SCRAP_PAGE_TIMEOUT_MS
+            )
             await page.wait_for_timeout(250)
-            content = await page.inner_text("body")
+            content = await extract_page_text(page, extraction_mode)
             await page.close()
             if created_browser:
                 if browser is not None:
@@ -1,11 +1,13 @@
 import asyncio
 import json
 import re
-from typing import List, Optional
+import time
+from typing import Any, Coroutine, Dict, List, Literal, Optional
 
 from playwright.async_api import (
     Browser,
     BrowserContext,
+    ElementHandle,
     Page,
     Playwright,
     async_playwright,
@@ -14,7 +16,23 @@ from playwright.async_api import (
 from core.browser_config import BrowserConfig
 from core.config import settings
 from core.logging_config import get_logger
+from core.run_metrics import get_run_metrics
 from core.scrappey import get_html_from_scrappey
+from schemas.event_candidate_model import EventCandidate
+from schemas.keyword_yield_model import (
+    CITY_LISTING_KEYWORD,
+    EVENTBRITE_SOURCE,
+    LUMA_SOURCE,
+    MEETUP_SOURCE,
+    ScrapePlan,
+)
+from utils.event_card_utils import (
+    parse_card_datetime,
+    parse_card_price,
+    parse_json_ld_datetime,
+    parse_json_ld_price,
+)
+from utils.url_utils import canonicalize_event_url
 
 logger = get_logger(__name__)
 
@@ -22,6 +40,8 @@ logger = get_logger(__name__)
 class BaseEventScraper:
     """Base class for event scrapers with common functionality."""
 
+    source = ""
+
     def __init__(self, base_url: str, browser: Optional[Browser] = None):
         self.base_url = base_url
         self.browser = browser
@@ -55,69 +75,178 @@ class BaseEventScraper:
         if self._owns_browser and self.playwright:
             await self.playwright.stop()
 
-    async def extract_event_urls(self, keyword: str, **kwargs):
+    def canonicalize_candidates(
+        self, candidates: List[EventCandidate]
+    ) -> List[EventCandidate]:
+        """
+        Canonicalize the URLs of the candidates found on the site and remove
+        duplicates and empty links, so the same event is only ever checked and
+        cached once.
+        """
+        canonical_candidates: Dict[str, EventCandidate] = {}
+        for candidate in candidates:
+            if not candidate.url:
+                continue
+            url = canonicalize_event_url(candidate.url, base_url=self.base_url)
+            if url not in canonical_candidates:
+                canonical_candidates[url] = candidate.model_copy(update={"url": url})
+
+        return list(canonical_candidates.values())
+
+    async def get_candidate_from_card(
+        self, card: ElementHandle, event_url: str
+    ) -> EventCandidate:
+        """
+        Build a candidate from whatever a search result card shows: its title,
+        date, start time, price and whether it's online or sold out.
         """
-        Extract URLs of events. To be implemented by subclasses.
+        candidate = EventCandidate(url=event_url, source=self.source)
+
+        try:
+            title_element = await card.query_selector("h2, h3")
+            if title_element:
+                candidate.title = (await title_element.inner_text()).strip() or None
+            card_text = await card.inner_text()
+        except Exception as e:
+            logger.error(f"Error reading event card for {event_url}: {e}")
+            return candidate
+
+        candidate.date_of_event, candidate.start_time = parse_card_datetime(card_text)
+        candidate.price_of_event = parse_card_price(card_text)
+        if re.search(r"\bonline event\b", card_text, re.IGNORECASE):
+            candidate.event_format = ["online"]
+        if re.search(r"\bsold out\b", card_text, re.IGNORECASE):
+            candidate.is_sold_out = True
+
+        return candidate
+
+    async def extract_event_candidates(
+        self, keyword: str, **kwargs
+    ) -> List[EventCandidate]:
+        """
+        Extract events from search results. To be implemented by subclasses.
 
         Args:
-            page: Playwright page instance
             keyword: Search term to find relevant events
             **kwargs: Additional keyword arguments
 
         Returns:
-            List of event URLs
+            List of event candidates
         """
-        raise NotImplementedError("Subclasses must implement extract_event_urls")
+        raise NotImplementedError("Subclasses must implement extract_event_candidates")
 
-    async def scrape_events_by_keywords(self, keywords: List[str], **kwargs):
+    async def scrape_events_by_keywords(
+        self, keywords: List[str], **kwargs
+    ) -> List[EventCandidate]:
         """
-        Scrape event URLs for a single keyword using the browser pool.
+        Scrape events for multiple keywords using the browser pool.
 
         Args:
-            keyword: Single keyword to search for
-            **kwargs: Additional keyword arguments for extract_event_urls
+            keywords: List of keywords to search for
+            **kwargs: Additional keyword arguments for extract_event_candidates
 
         Returns:
-            List of event URLs
+            List of event candidates
+        """
+        events_by_keyword = await self.scrape_events_grouped_by_keyword(
+            keywords, **kwargs
+        )
+        all_events = [
+            event for events in events_by_keyword.values() for event in events
+        ]
+
+        # Remove duplicates while preserving order
+        return self.canonicalize_candidates(all_events)
+
+    async def scrape_events_grouped_by_keyword(
+        self, keywords: List[str], timeout: Optional[float] = None, **kwargs
+    ) -> Dict[str, List[EventCandidate]]:
         """
+        Scrape events for multiple keywords, keeping track of which keyword
+        found which events.
+
+        Args:
+            keywords: List of keywords to search for
+            timeout: Seconds the search gets, the keywords it didn't get to
+                are left out and the ones already searched kept. Unbounded if
+                None.
+            **kwargs: Additional keyword arguments for extract_event_candidates
+
+        Returns:
+            Dictionary of keyword to the event candidates found for it
+        """
+        expires_at = time.monotonic() + timeout if timeout is not None else None
         await self.setup()
-        all_events = []
+        events_by_keyword: Dict[str, List[EventCandidate]] = {}
 
         try:
             for keyword in keywords:
-                events = await self.extract_event_urls(keyword=keyword, **kwargs)
-                all_events.extend(events)
+                remaining_seconds = (
+                    expires_at - time.monotonic() if expires_at is not None else None
+                )
+                try:
+                    if remaining_seconds is not None and remaining_seconds <= 0:
+                        raise asyncio.TimeoutError()
+                    events = await asyncio.wait_for(
+                        self.extract_event_candidates(keyword=keyword, **kwargs),
+                        remaining_seconds,
+                    )
+                except asyncio.TimeoutError:
+                    self._log_search_timeout(keywords, events_by_keyword, timeout)
+                    break
+                events_by_keyword[keyword] = self.canonicalize_candidates(events)
         finally:
             await self.close()
 
-        # Remove duplicates while preserving order
-        unique_events = list(dict.fromkeys(all_events))
-        return unique_events
+        return events_by_keyword
+
+    def _log_search_timeout(
+        self,
+        keywords: List[str],
+        events_by_keyword: Dict[str, List[EventCandidate]],
+        timeout: Optional[float],
+    ) -> None:
+        logger.error(
+            f"Search of {self.source} timed out after {timeout:.0f}s, keeping "
+            f"{len(events_by_keyword)} of {len(keywords)} keywords"
+        )
+        get_run_metrics().increment("search_timeouts")
 
 
 class EventBriteScraper(BaseEventScraper):
+    source = EVENTBRITE_SOURCE
+
     def __init__(self, browser: Optional[Browser] = None):
         super().__init__(base_url="https://www.eventbrite.com", browser=browser)
 
-    async def scrape_events_by_keywords(self, keywords: List[str], **kwargs):
+    async def scrape_events_grouped_by_keyword(
+        self, keywords: List[str], timeout: Optional[float] = None, **kwargs
+    ) -> Dict[str, List[EventCandidate]]:
         """
-        Scrape event URLs for multiple keywords with parallel processing
+        Scrape events for multiple keywords with parallel processing
         when using Scrappey.
 
         Args:
             keywords: List of keywords to search for
-            **kwargs: Additional keyword arguments for extract_event_urls
+            timeout: Seconds the search gets, the keywords not searched by then
+                are left out and the ones already searched kept. Unbounded if
+                None.
+            **kwargs: Additional keyword arguments for extract_event_candidates
 
         Returns:
-            List of event URLs
+            Dictionary of keyword to the event candidates found for it
         """
         # Use parallel processing only in production (when using Scrappey)
         if settings.ENVIRONMENT == "production":
-            return await self._scrape_events_parallel(keywords, **kwargs)
+            return await self._scrape_events_parallel(keywords, timeout, **kwargs)
         else:
-            return await super().scrape_events_by_keywords(keywords, **kwargs)
+            return await super().scrape_events_grouped_by_keyword(
+                keywords, timeout, **kwargs
+            )
 
-    async def _scrape_events_parallel(self, keywords: List[str], **kwargs):
+    async def _scrape_events_parallel(
+        self, keywords: List[str], timeout: Optional[float] = None, **kwargs
+    ) -> Dict[str, List[EventCandidate]]:
         """
         Scrape events in parallel using Scrappey with limited concurrency.
         """
@@ -125,31 +254,41 @@ class EventBriteScraper(BaseEventScraper):
 
         async def scrape_single_keyword(keyword: str):
             async with semaphore:
-                events = await self.extract_event_urls(keyword=keyword, **kwargs)
+                events = await self.extract_event_candidates(keyword=keyword, **kwargs)
                 return events
 
-        tasks = [scrape_single_keyword(keyword) for keyword in keywords]
-        results = await asyncio.gather(*tasks, return_exceptions=True)
+        tasks = [
+            asyncio.create_task(scrape_single_keyword(keyword)) for keyword in keywords
+        ]
+        _, pending = await asyncio.wait(tasks, timeout=timeout)
+        for task in pending:
+            task.cancel()
+        await asyncio.gather(*pending, return_exceptions=True)
 
-        all_events = []
+        events_by_keyword: Dict[str, List[EventCandidate]] = {}
 
-        for i, result in enumerate(results):
+        for i, task in enumerate(tasks):
+            if task.cancelled():
+                continue
+            result = task.exception() or task.result()
             if isinstance(result, Exception):
                 logger.error(f"Error scraping keyword '{keywords[i]}': {result}")
+                get_run_metrics().increment("search_failures")
                 continue
 
             if isinstance(result, list):
-                all_events.extend(result)
+                events_by_keyword[keywords[i]] = self.canonicalize_candidates(result)
             else:
                 logger.error(
                     f"Unexpected result type for keyword '{keywords[i]}': "
                     f"{type(result)}"
                 )
 
-        unique_events = list(dict.fromkeys(all_events))
-        return unique_events
+        if pending:
+            self._log_search_timeout(keywords, events_by_keyword, timeout)
+        return events_by_keyword
 
-    async def extract_event_urls(
+    async def extract_event_candidates(
         self,
         keyword="tech",
         country="United Kingdom",
@@ -157,9 +296,9 @@ class EventBriteScraper(BaseEventScraper):
         promoted_count=0,
         regular_count=5,
         **kwargs,
-    ):
+    ) -> List[EventCandidate]:
         """
-        Extract URLs of events from Eventbrite,
+        Extract events from Eventbrite,
         separately for promoted and non-promoted events.
 
         Args:
@@ -171,7 +310,7 @@ class EventBriteScraper(BaseEventScraper):
             regular_count: Number of regular (non-promoted) events to extract
 
         Returns:
-            List of event URLs
+            List of event candidates
         """
         formatted_country = country.lower().replace(" ", "-")
         formatted_city = city.lower().replace(" ", "-")
@@ -186,25 +325,29 @@ class EventBriteScraper(BaseEventScraper):
         # Use Scrappey to get the HTML content in production
         if settings.ENVIRONMENT == "production":
             logger.info(f"Using Scrappey to get event links for: {search_url}")
-            event_links = await self.extract_event_urls_from_scrappey(search_url)
+            candidates = await self.extract_event_candidates_from_scrappey(search_url)
             total_count = promoted_count + regular_count
-            return event_links[:total_count]
+            return candidates[:total_count]
 
         logger.info(f"Navigating to: {search_url}")
 
         assert self.page is not None, "Page not initialized"
-        await self.page.goto(search_url)
+        run_metrics = get_run_metrics()
+        with run_metrics.timer("eventbrite_page_load"):
+            await self.page.goto(search_url)
 
-        await self.page.wait_for_selector(
-            'ul[class*="SearchResultPanelContentEventCardList-module__eventList"]',
-            timeout=10_000,
-        )
+            await self.page.wait_for_selector(
+                'ul[class*="SearchResultPanelContentEventCardList-module__eventList"]',
+                timeout=10_000,
+            )
+        run_metrics.increment("search_pages_fetched")
 
         await asyncio.sleep(1)
 
-        for _ in range(2):
-            await self.page.evaluate("window.scrollBy(0, 800)")
-            await asyncio.sleep(1)
+        with run_metrics.timer("eventbrite_scroll"):
+            for _ in range(2):
+                await self.page.evaluate("window.scrollBy(0, 800)")
+                await asyncio.sleep(1)
 
         events = []
 
@@ -228,8 +371,10 @@ class EventBriteScraper(BaseEventScraper):
                     continue
 
                 event_url = await link_element.get_attribute("href")
+                if not event_url:
+                    continue
 
-                events.append(event_url)
+                events.append(await self.get_candidate_from_card(card, event_url))
 
                 count += 1
 
@@ -252,8 +397,10 @@ class EventBriteScraper(BaseEventScraper):
                     continue
 
                 event_url = await link_element.get_attribute("href")
+                if not event_url:
+                    continue
 
-                events.append(event_url)
+                events.append(await self.get_candidate_from_card(card, event_url))
 
                 count += 1
 
@@ -262,14 +409,71 @@ class EventBriteScraper(BaseEventScraper):
 
         return events
 
-    async def extract_event_urls_from_scrappey(self, url: str):
+    def _get_candidate_from_json_ld(self, event: dict) -> EventCandidate:
+        """Build a candidate from a schema.org Event in the search results"""
+        date_of_event, start_time = parse_json_ld_datetime(event.get("startDate"))
+        _, end_time = parse_json_ld_datetime(event.get("endDate"))
+
+        location = event.get("location")
+        location_name = None
+        if isinstance(location, dict):
+            address = location.get("address")
+            if isinstance(address, dict):
+                address = ", ".join(
+                    str(address[field])
+                    for field in ("streetAddress", "addressLocality", "postalCode")
+                    if address.get(field)
+                )
+            location_name = (
+                ", ".join(str(part) for part in (location.get("name"), address) if part)
+                or None
+            )
+
+        attendance_mode = str(event.get("eventAttendanceMode", ""))
+        event_format: Optional[List[Literal["offline", "online"]]] = None
+        if "Mixed" in attendance_mode:
+            event_format = ["offline", "online"]
+        elif "Online" in attendance_mode:
+            event_format = ["online"]
+        elif "Offline" in attendance_mode:
+            event_format = ["offline"]
+
+        return EventCandidate(
+            url=event["url"],
+            source=self.source,
+            title=event.get("name"),
+            date_of_event=date_of_event,
+            start_time=start_time,
+            end_time=end_time,
+            location=location_name,
+            price_of_event=parse_json_ld_price(event.get("offers")),
+            event_format=event_format,
+        )
+
+    def _get_candidate_from_json_ld_safe(self, event: dict) -> EventCandidate:
+        """Fall back to a bare link if the event's metadata can't be read"""
+        try:
+            return self._get_candidate_from_json_ld(event)
+        except Exception as e:
+            logger.error(f"Error reading event metadata for {event['url']}: {e}")
+            return EventCandidate(url=event["url"], source=self.source)
+
+    async def extract_event_candidates_from_scrappey(
+        self, url: str
+    ) -> List[EventCandidate]:
         """
-        Extract URLs of events from Eventbrite using Scrappey.
+        Extract events from Eventbrite using Scrappey. The search results embed
+        each event as schema.org JSON-LD, which already has its date, location
+        and price.
         """
+        run_metrics = get_run_metrics()
         try:
-            html_content = await get_html_from_scrappey(url)
+            with run_metrics.timer("scrappey"):
+                html_content = await get_html_from_scrappey(url)
+            run_metrics.increment("search_pages_fetched")
         except Exception as e:
             logger.error(f"Error getting HTML from Scrappey for {url}: {e}")
+            run_metrics.increment("scrappey_failures")
             return []
 
         script_pattern = (
@@ -286,7 +490,7 @@ class EventBriteScraper(BaseEventScraper):
             logger.error(f"No script matches found for URL: {url}")
             return []
 
-        all_links = []
+        all_candidates: Dict[str, EventCandidate] = {}
 
         for script_match in script_matches:
             try:
@@ -300,8 +504,10 @@ class EventBriteScraper(BaseEventScraper):
                             event = item["item"]
 
                             if "url" in event and event["url"]:
-                                if event["url"] and event["url"] not in all_links:
-                                    all_links.append(event["url"])
+                                if event["url"] not in all_candidates:
+                                    all_candidates[
+                                        event["url"]
+                                    ] = self._get_candidate_from_json_ld_safe(event)
                             else:
                                 logger.error(f"No url found in event: {event}")
                         else:
@@ -313,23 +519,25 @@ class EventBriteScraper(BaseEventScraper):
                 print(f"Error parsing JSON-LD script: {e}")
                 continue
 
-        return all_links
+        return list(all_candidates.values())
 
 
 class MeetupScraper(BaseEventScraper):
+    source = MEETUP_SOURCE
+
     def __init__(self, browser: Optional[Browser] = None):
         super().__init__(base_url="https://www.meetup.com", browser=browser)
 
-    async def extract_event_urls(
+    async def extract_event_candidates(
         self,
         keyword="tech",
         location="London",
         country_code="gb",
         max_events=5,
         **kwargs,
-    ):
+    ) -> List[EventCandidate]:
         """
-        Extract URLs of events from Meetup.
+        Extract events from Meetup.
 
         Args:
             page: Playwright page instance
@@ -338,7 +546,7 @@ class MeetupScraper(BaseEventScraper):
             max_events: Maximum number of events to extract
 
         Returns:
-            List of event URLs
+            List of event candidates
         """
         # Build the search URL
         # Transform keywords by replacing spaces with %20 for URL encoding
@@ -352,15 +560,19 @@ class MeetupScraper(BaseEventScraper):
 
         logger.info(f"Navigating to: {search_url}")
         assert self.page is not None, "Page not initialized"
-        await self.page.goto(search_url)
+        run_metrics = get_run_metrics()
+        with run_metrics.timer("meetup_page_load"):
+            await self.page.goto(search_url)
 
-        # Wait for the events to load
-        await self.page.wait_for_selector('a[href*="/events/"]', timeout=10_000)
+            # Wait for the events to load
+            await self.page.wait_for_selector('a[href*="/events/"]', timeout=10_000)
+        run_metrics.increment("search_pages_fetched")
 
         # Scroll to load more events
-        for _ in range(3):
-            await self.page.evaluate("window.scrollBy(0, 1000)")
-            await asyncio.sleep(1)
+        with run_metrics.timer("meetup_scroll"):
+            for _ in range(3):
+                await self.page.evaluate("window.scrollBy(0, 1000)")
+                await asyncio.sleep(1)
 
         # Extract event links
         events = []
@@ -373,12 +585,7 @@ class MeetupScraper(BaseEventScraper):
             try:
                 event_url = await card.get_attribute("href")
                 if event_url and "/events/" in event_url:
-                    full_url = (
-                        event_url
-                        if event_url.startswith("http")
-                        else f"{self.base_url}{event_url}"
-                    )
-                    events.append(full_url)
+                    events.append(await self.get_candidate_from_card(card, event_url))
             except Exception as e:
                 logger.error(f"Error extracting meetup URL: {e}")
 
@@ -386,12 +593,16 @@ class MeetupScraper(BaseEventScraper):
 
 
 class LumaScraper(BaseEventScraper):
+    source = LUMA_SOURCE
+
     def __init__(self, browser: Optional[Browser] = None):
         super().__init__(base_url="https://lu.ma", browser=browser)
 
-    async def extract_event_urls(self, keyword: Optional[str] = None, **kwargs):
+    async def extract_event_candidates(
+        self, keyword: Optional[str] = None, **kwargs
+    ) -> List[EventCandidate]:
         """
-        Extract URLs of events from Luma.
+        Extract events from Luma.
 
         Args:
             page: Playwright page instance
@@ -401,7 +612,7 @@ class LumaScraper(BaseEventScraper):
                 max_events: Maximum number of events to extract
 
         Returns:
-            List of event URLs
+            List of event candidates
         """
         location = kwargs.get("location", "london")
         max_events = kwargs.get("max_events", 25)
@@ -410,15 +621,19 @@ class LumaScraper(BaseEventScraper):
         logger.info(f"Navigating to: {search_url}")
 
         assert self.page is not None, "Page not initialized"
-        await self.page.goto(search_url)
+        run_metrics = get_run_metrics()
+        with run_metrics.timer("luma_page_load"):
+            await self.page.goto(search_url)
 
-        await self.page.wait_for_selector(
-            'a[class*="event-link content-link"]', timeout=10_000
-        )
+            await self.page.wait_for_selector(
+                'a[class*="event-link content-link"]', timeout=10_000
+            )
+        run_metrics.increment("search_pages_fetched")
 
-        for _ in range(3):
-            await self.page.evaluate("window.scrollBy(0, 1000)")
-            await asyncio.sleep(1)
+        with run_metrics.timer("luma_scroll"):
+            for _ in range(3):
+                await self.page.evaluate("window.scrollBy(0, 1000)")
+                await asyncio.sleep(1)
 
         events = []
         event_cards = await self.page.query_selector_all(
@@ -433,11 +648,22 @@ class LumaScraper(BaseEventScraper):
                 break
 
             event_url = await card.get_attribute("href")
-            events.append(f"https://lu.ma/{event_url}")
+            if not event_url:
+                continue
+
+            # The link is an overlay, the details are in the card around it
+            container = (
+                await card.evaluate_handle("element => element.parentElement")
+            ).as_element()
+            events.append(
+                await self.get_candidate_from_card(container or card, event_url)
+            )
 
         return events
 
-    async def scrape_events(self, keywords=None, location="london", max_events=50):
+    async def scrape_events(
+        self, keywords=None, location="london", max_events=50
+    ) -> List[EventCandidate]:
         """
         Override the base class method for Luma since we don't use keywords.
 
@@ -447,21 +673,21 @@ class LumaScraper(BaseEventScraper):
             max_events: Maximum number of events to extract
 
         Returns:
-            List of event URLs
+            List of event candidates
         """
         # Just use location directly - ignore keywords
         await self.setup()
 
         try:
-            events = await self.extract_event_urls(
+            events = await self.extract_event_candidates(
                 location=location, max_events=max_events
             )
-            return events
+            return self.canonicalize_candidates(events)
         finally:
             await self.close()
 
 
-async def get_event_links(
+async def get_event_candidates_by_source(
     search_keywords: List[str],
     eventbrite=True,
     meetup=True,
@@ -470,41 +696,193 @@ async def get_event_links(
     city="London",
     country_code="gb",
     browser: Optional[Browser] = None,
-) -> list[str]:
-    tasks = []
-
-    if eventbrite:
+    scrape_plan: Optional[ScrapePlan] = None,
+    timeout: Optional[float] = None,
+) -> Dict[str, Dict[str, List[EventCandidate]]]:
+    """
+    Scrape event candidates from all enabled sources, keeping track of which
+    source and which keyword found each one.
+
+    Args:
+        search_keywords: Keywords to search Eventbrite and Meetup for
+        eventbrite: Whether to scrape Eventbrite
+        meetup: Whether to scrape Meetup
+        luma: Whether to scrape Luma
+        country: Country to search in
+        city: City to search in
+        country_code: Country code of the country to search in
+        browser: Browser to scrape with, a new one is launched per scraper if None
+        scrape_plan: Per-source keywords and counts, the search keywords and the
+            default counts are used if None
+        timeout: Seconds each source gets. Eventbrite and Meetup keep the
+            keywords searched by then, the Luma listing is left out if it
+            isn't scraped in time. Unbounded if None.
+
+    Returns:
+        Dictionary of source to keyword to the event candidates found for it.
+        Luma doesn't use keywords so its candidates are under
+        CITY_LISTING_KEYWORD.
+    """
+    plan = scrape_plan or ScrapePlan(
+        eventbrite_keywords=search_keywords, meetup_keywords=search_keywords
+    )
+
+    sources = []
+    tasks: List[Coroutine[Any, Any, Any]] = []
+
+    if eventbrite and plan.eventbrite_keywords:
         eventbrite_scraper = EventBriteScraper(browser=browser)
+        sources.append(EVENTBRITE_SOURCE)
         tasks.append(
-            eventbrite_scraper.scrape_events_by_keywords(
-                keywords=search_keywords, country=country, city=city
+            eventbrite_scraper.scrape_events_grouped_by_keyword(
+                keywords=plan.eventbrite_keywords,
+                timeout=timeout,
+                country=country,
+                city=city,
+                regular_count=plan.eventbrite_regular_count,
             )
         )
 
-    if meetup:
+    if meetup and plan.meetup_keywords:
         meetup_scraper = MeetupScraper(browser=browser)
+        sources.append(MEETUP_SOURCE)
         tasks.append(
-            meetup_scraper.scrape_events_by_keywords(
-                keywords=search_keywords, location=city, country_code=country_code
+            meetup_scraper.scrape_events_grouped_by_keyword(
+                keywords=plan.meetup_keywords,
+                timeout=timeout,
+                location=city,
+                country_code=country_code,
+                max_events=plan.meetup_max_events,
             )
         )
 
     if luma:
         luma_scraper = LumaScraper(browser=browser)
-        tasks.append(luma_scraper.scrape_events(location=city, max_events=40))
+        sources.append(LUMA_SOURCE)
+        tasks.append(
+            asyncio.wait_for(
+                luma_scraper.scrape_events(
+                    location=city, max_events=plan.luma_max_events
+                ),
+                timeout,
+            )
+        )
 
     results = await asyncio.gather(*tasks, return_exceptions=True)
 
-    event_links = set()
+    candidates_by_source: Dict[str, Dict[str, List[EventCandidate]]] = {}
+
+    for source, result in zip(sources, results):
+        if isinstance(result, asyncio.TimeoutError):
+            logger.error(f"Scraper of {source} timed out after {timeout:.0f}s")
+            get_run_metrics().increment("search_timeouts")
+            continue
 
-    for result in results:
         if isinstance(result, Exception):
             logger.error(f"Scraper error: {result}")
+            get_run_metrics().increment("search_failures")
             continue
 
-        if isinstance(result, list):
-            event_links.update(result)
+        if isinstance(result, dict):
+            candidates_by_source[source] = result
+        elif isinstance(result, list):
+            candidates_by_source[source] = {CITY_LISTING_KEYWORD: result}
         else:
             logger.error(f"Unexpected result type: {type(result)}")
 
-    return list(event_links)
+    return candidates_by_source
+
+
+def to_event_links_by_source(
+    candidates_by_source: Dict[str, Dict[str, List[EventCandidate]]]
+) -> Dict[str, Dict[str, List[str]]]:
+    """Keep only the links of candidates grouped by source and keyword."""
+    return {
+        source: {
+            keyword: [candidate.url for candidate in candidates]
+            for keyword, candidates in candidates_by_keyword.items()
+        }
+        for source, candidates_by_keyword in candidates_by_source.items()
+    }
+
+
+async def get_event_links_by_source(
+    search_keywords: List[str],
+    eventbrite=True,
+    meetup=True,
+    luma=True,
+    country="United Kingdom",
+    city="London",
+    country_code="gb",
+    browser: Optional[Browser] = None,
+    scrape_plan: Optional[ScrapePlan] = None,
+) -> Dict[str, Dict[str, List[str]]]:
+    """
+    Scrape event links from all enabled sources, keeping track of which source
+    and which keyword found each link. See get_event_candidates_by_source.
+    """
+    candidates_by_source = await get_event_candidates_by_source(
+        search_keywords=search_keywords,
+        eventbrite=eventbrite,
+        meetup=meetup,
+        luma=luma,
+        country=country,
+        city=city,
+        country_code=country_code,
+        browser=browser,
+        scrape_plan=scrape_plan,
+    )
+    return to_event_links_by_source(candidates_by_source)
+
+
+def flatten_event_candidates(
+    candidates_by_source: Dict[str, Dict[str, List[EventCandidate]]]
+) -> List[EventCandidate]:
+    """
+    Flatten event candidates grouped by source and keyword, keeping the first
+    candidate of every link.
+    """
+    candidates: Dict[str, EventCandidate] = {}
+    for candidates_by_keyword in candidates_by_source.values():
+        for keyword_candidates in candidates_by_keyword.values():
+            for candidate in keyword_candidates:
+                candidates.setdefault(candidate.url, candidate)
+
+    return list(candidates.values())
+
+
+def flatten_event_links(
+    event_links_by_source: Dict[str, Dict[str, List[str]]]
+) -> List[str]:
+    """Flatten event links grouped by source and keyword, removing duplicates."""
+    event_links = [
+        event_link
+        for events_by_keyword in event_links_by_source.values()
+        for event_links in events_by_keyword.values()
+        for event_link in event_links
+    ]
+    return list(dict.fromkeys(event_links))
+
+
+async def get_event_links(
+    search_keywords: List[str],
+    eventbrite=True,
+    meetup=True,
+    luma=True,
+    country="United Kingdom",
+    city="London",
+    country_code="gb",
+    browser: Optional[Browser] = None,
+) -> list[str]:
+    event_links_by_source = await get_event_links_by_source(
+        search_keywords=search_keywords,
+        eventbrite=eventbrite,
+        meetup=meetup,
+        luma=luma,
+        country=country,
+        city=city,
+        country_code=country_code,
+        browser=browser,
+    )
+
+    return flatten_event_links(event_links_by_source)
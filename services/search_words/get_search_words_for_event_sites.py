@@ -1,12 +1,23 @@
+import asyncio
+import hashlib
+import json
 from typing import List
 
 from langchain_core.language_models.chat_models import BaseChatModel
 from langchain_core.prompts import ChatPromptTemplate
 
+from core.cache import cache
+from core.logging_config import get_logger
 from schemas.user_profile_model import UserProfile
 from utils.age_utils import get_age_bracket, get_age_from_birth_date
 from utils.request_utils import retry_with_backoff
 
+logger = get_logger(__name__)
+
+# Bump when the prompt changes so that keywords from the old prompt aren't reused
+SEARCH_KEYWORDS_PROMPT_VERSION = 1
+SEARCH_KEYWORDS_CACHE_TTL_SECONDS = 7 * 24 * 60 * 60
+
 
 def remove_prohibited_queries(queries: List[str]) -> List[str]:
     prohibited_queries = [
@@ -30,11 +41,36 @@ def remove_prohibited_queries(queries: List[str]) -> List[str]:
     return [query for query in queries if query not in prohibited_queries]
 
 
-def get_search_keywords_for_event_sites(
+def get_search_keywords_fingerprint(user_profile: UserProfile) -> str:
+    """
+    Fingerprint the parts of the user profile that the keywords prompt uses.
+    Profiles with the same fingerprint produce the same keywords since the model
+    runs with a temperature of 0.
+    """
+    prompt_fields = {
+        "version": SEARCH_KEYWORDS_PROMPT_VERSION,
+        "interests": user_profile.interests,
+        "goals": user_profile.goals,
+        "occupation": user_profile.occupation,
+        "gender": user_profile.gender,
+        "sexual_orientation": user_profile.sexual_orientation,
+        "relationship_status": user_profile.relationship_status,
+        "age_bracket": get_age_bracket(
+            get_age_from_birth_date(user_profile.birth_date)
+        ),
+        "extra_info": user_profile.extra_info,
+    }
+    serialized = json.dumps(prompt_fields, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(serialized.encode("utf-8")).hexdigest()
+
+
+async def get_search_keywords_for_event_sites(
     user_profile: UserProfile, model: BaseChatModel
 ) -> List[str]:
     """
-    Generate search keywords based on user profile and model.
+    Generate search keywords based on user profile and model. Keywords are cached
+    under a fingerprint of the profile fields the prompt uses, so an unchanged
+    profile doesn't need another LLM call.
 
     Args:
         user_profile: UserProfile object containing user information
@@ -43,7 +79,33 @@ def get_search_keywords_for_event_sites(
     Returns:
         List of search keywords
     """
+    cache_key = f"search_keywords:{get_search_keywords_fingerprint(user_profile)}"
+
+    try:
+        cached_keywords = await cache.get(cache_key)
+        if cached_keywords is not None:
+            logger.info("Retrieved search keywords from cache")
+            return list(json.loads(cached_keywords))
+    except Exception as e:
+        logger.error(f"Error reading search keywords from cache: {e}")
+
+    # The LLM call is blocking, keep it off the event loop
+    keywords = await asyncio.to_thread(_generate_search_keywords, user_profile, model)
 
+    if keywords:
+        try:
+            await cache.set(
+                cache_key, json.dumps(keywords), SEARCH_KEYWORDS_CACHE_TTL_SECONDS
+            )
+        except Exception as e:
+            logger.error(f"Error caching search keywords: {e}")
+
+    return keywords
+
+
+def _generate_search_keywords(
+    user_profile: UserProfile, model: BaseChatModel
+) -> List[str]:
     lgbtq_section = (
         """
         4. LGBTQ+ QUERY:
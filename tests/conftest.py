@@ -0,0 +1,29 @@
+import pytest
+
+from schemas.user_profile_model import UserProfile
+
+
+@pytest.fixture
+def user_profile():
+    return UserProfile.model_validate(
+        {
+            "interests": ["technology"],
+            "goals": ["learn new skills"],
+            "occupation": "Software Engineer",
+            "email": "user@example.com",
+            "birth_date": "1990-01-01T00:00:00",
+            "gender": "male",
+            "sexual_orientation": "straight",
+            "relationship_status": "single",
+            "willingness_to_pay": True,
+            "budget": 50,
+            "willingness_for_online": False,
+            "acceptable_times": {
+                "weekdays": {"start": "18:00", "end": "22:00"},
+                "weekends": {"start": "10:00", "end": "23:00"},
+            },
+            "location": {"latitude": 51.5072, "longitude": 0.1276},
+            "distance_threshold": {"distance_threshold": 25, "unit": "miles"},
+            "time_commitment_in_minutes": 240,
+        }
+    )
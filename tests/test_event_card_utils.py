@@ -0,0 +1,59 @@
+from datetime import date
+
+from utils.event_card_utils import parse_card_datetime, parse_card_price
+
+TODAY = date(2026, 10, 18)
+
+
+def test_card_date_ignores_words_starting_with_a_month():
+    card_date, start_time = parse_card_datetime(
+        "Top 5 Marketing Tips\nSat, Nov 21 · 7:00 PM", today=TODAY
+    )
+
+    assert card_date == "21-11-2026"
+    assert start_time == "19:00"
+
+
+def test_card_date_unknown_without_a_month():
+    card_date, _ = parse_card_datetime(
+        "Founders Drinks at 10 Mayfair Place", today=TODAY
+    )
+
+    assert card_date is None
+
+
+def test_card_date_is_the_earliest_shown():
+    card_date, _ = parse_card_datetime(
+        "Thu, Jun 12 · 6:30 PM\nDoors open 12 July", today=TODAY
+    )
+
+    assert card_date == "12-06-2027"
+
+
+def test_card_date_with_full_month_and_year():
+    card_date, start_time = parse_card_datetime(
+        "Sat, 14 September 2027, 19:00", today=TODAY
+    )
+
+    assert card_date == "14-09-2027"
+    assert start_time == "19:00"
+
+
+def test_card_date_unknown_when_ambiguous():
+    card_date, _ = parse_card_datetime("May 5 June", today=TODAY)
+
+    assert card_date is None
+
+
+def test_card_price_from_price_slot():
+    assert parse_card_price("Pitch Night\nWed, Nov 4 · 6:00 PM\nFrom £12.50") == 12.5
+    assert parse_card_price("Pitch Night\n£10 - £20") == 10
+    assert parse_card_price("Pitch Night\nFree") == 0
+
+
+def test_card_price_ignores_amounts_outside_price_slot():
+    assert parse_card_price("Win $500 at our hackathon\nSat, Nov 21") is None
+
+
+def test_card_price_unknown_when_free_and_paid():
+    assert parse_card_price("Big sale 50% off — £1,000 prizes · Free entry") is None
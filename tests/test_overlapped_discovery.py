@@ -0,0 +1,76 @@
+import asyncio
+import time
+
+import services.agent.agent as agent_module
+from core.run_metrics import start_run_metrics
+from schemas.event_model import EventDetails, EventResult, PreparedEvent
+from services.event_processing.near_duplicates import NearDuplicateIndex
+
+
+async def test_keyword_search_goes_on_while_the_listing_is_scored(
+    monkeypatch, user_profile
+):
+    start_run_metrics()
+    search_ticks = []
+    scoring_times = []
+
+    async def get_run_search_keywords(user_profile, checkpoint=None):
+        return ["technology"]
+
+    async def discover_event_links(
+        user_profile, browser, checkpoint=None, sources=None, **kwargs
+    ):
+        source = sources[0]
+        if source != agent_module.LUMA_SOURCE:
+            for _ in range(5):
+                await asyncio.sleep(0.05)
+                search_ticks.append(time.perf_counter())
+        return agent_module.DiscoveredEvents(
+            city="London",
+            event_links_by_source={source: {"technology": [f"https://{source}/1"]}},
+            event_links=[f"https://{source}/1"],
+            duplicate_index=kwargs.get("duplicate_index") or NearDuplicateIndex(),
+            upper_bounds={},
+            disqualification_rates={},
+        )
+
+    async def prepare_event(event_link, *args, **kwargs):
+        return PreparedEvent(
+            event_url=event_link,
+            event_details=EventDetails(title=event_link, price_of_event=0),
+            webpage_content=f"{event_link}, a meetup for software engineers",
+        )
+
+    def score_events(prepared_events, user_profile, model):
+        started_at = time.perf_counter()
+        # A blocking LLM call
+        time.sleep(0.3)
+        scoring_times.append((started_at, time.perf_counter()))
+        return [
+            EventResult(
+                event_details=prepared_event.event_details,
+                event_url=prepared_event.event_url,
+                relevance=50,
+            )
+            for prepared_event in prepared_events
+        ]
+
+    monkeypatch.setattr(
+        agent_module, "get_run_search_keywords", get_run_search_keywords
+    )
+    monkeypatch.setattr(agent_module, "discover_event_links", discover_event_links)
+    monkeypatch.setattr(agent_module, "prepare_event", prepare_event)
+    monkeypatch.setattr(agent_module, "score_events", score_events)
+
+    discovered, evaluated = await agent_module.discover_and_evaluate_overlapped(
+        user_profile, browser=None
+    )
+
+    assert [event.event_url for event in evaluated.events] == [
+        "https://luma/1",
+        "https://eventbrite/1",
+    ]
+    # The listing is scored first, and the keyword search kept making progress
+    # while it was
+    listing_started_at, listing_ended_at = scoring_times[0]
+    assert any(listing_started_at < tick < listing_ended_at for tick in search_ticks)
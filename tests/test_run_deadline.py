@@ -0,0 +1,49 @@
+import pytest
+from google.api_core.exceptions import ResourceExhausted
+from langchain_core.runnables import RunnableLambda
+
+import services.agent.agent as agent_module
+from core.run_deadline import start_run_deadline
+from core.run_metrics import start_run_metrics
+from schemas.event_model import EventDetails, PreparedEvent
+
+
+def rate_limited(_input):
+    raise ResourceExhausted("Quota exceeded")
+
+
+@pytest.fixture
+def rate_limited_model(monkeypatch):
+    llm_calls = []
+
+    def invoke(prompt_value):
+        llm_calls.append(prompt_value)
+        rate_limited(prompt_value)
+
+    monkeypatch.setattr(agent_module, "gemma_3_27b", RunnableLambda(invoke))
+    # Backing off only has to be checked against the deadline, not waited out
+    monkeypatch.setattr("utils.request_utils.time.sleep", lambda seconds: None)
+    return llm_calls
+
+
+def make_prepared_event(number: int) -> PreparedEvent:
+    return PreparedEvent(
+        event_url=f"https://lu.ma/event-{number}",
+        event_details=EventDetails(title=f"Event {number}", price_of_event=0),
+        webpage_content=f"Event {number}, a meetup for software engineers",
+    )
+
+
+def test_scoring_stops_at_the_deadline(rate_limited_model, user_profile):
+    run_metrics = start_run_metrics()
+    start_run_deadline(3)
+    prepared_events = [make_prepared_event(number) for number in range(3)]
+
+    events = agent_module.score_events_until_deadline(prepared_events, user_profile)
+
+    # The events are left unscored instead of getting price-only scores
+    assert events == []
+    assert run_metrics.get_report()["counters"]["events_unscored"] == 3
+    # The first call backs off once and the next wait would outlast the run,
+    # no event is then scored on its own
+    assert len(rate_limited_model) == 2
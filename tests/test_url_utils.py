@@ -0,0 +1,48 @@
+from utils.url_utils import canonicalize_event_url
+
+
+def test_bare_platform_domains_get_www():
+    assert (
+        canonicalize_event_url(
+            "https://eventbrite.co.uk/e/pitch-night-123?aff=ebdssbdestsearch"
+        )
+        == "https://www.eventbrite.co.uk/e/pitch-night-123"
+    )
+    assert (
+        canonicalize_event_url("http://meetup.com/london-python/events/123/")
+        == "https://www.meetup.com/london-python/events/123"
+    )
+
+
+def test_platform_subdomains_are_kept():
+    assert (
+        canonicalize_event_url("https://foo.eventbrite.com/e/pitch-night-123")
+        == "https://foo.eventbrite.com/e/pitch-night-123"
+    )
+    assert (
+        canonicalize_event_url("https://secure.meetup.com/london-python/events/123")
+        == "https://secure.meetup.com/london-python/events/123"
+    )
+
+
+def test_luma_drops_www_and_query():
+    assert (
+        canonicalize_event_url("https://www.lu.ma/abc123?tk=xyz")
+        == "https://lu.ma/abc123"
+    )
+
+
+def test_relative_link_resolved_against_base_url():
+    assert (
+        canonicalize_event_url(
+            "/e/pitch-night-123", base_url="https://www.eventbrite.com"
+        )
+        == "https://www.eventbrite.com/e/pitch-night-123"
+    )
+
+
+def test_other_sites_keep_sorted_query_without_tracking():
+    assert (
+        canonicalize_event_url("https://example.com/event?utm_source=x&b=2&a=1")
+        == "https://example.com/event?a=1&b=2"
+    )
@@ -1,14 +1,21 @@
+import asyncio
 import math
 from urllib.parse import quote
 
 import httpx
 
+from core.cache import cache
 from core.logging_config import get_logger
 from schemas.coordinates_model import Coordinates
 from schemas.user_profile_model import DistanceUnit, Location
 
 logger = get_logger(__name__)
 
+GEOCODE_CACHE_TTL_SECONDS = 30 * 24 * 60 * 60
+# Failed lookups are only remembered briefly, they might have been a hiccup
+GEOCODE_NEGATIVE_CACHE_TTL_SECONDS = 60 * 60
+GEOCODE_NOT_FOUND = "null"
+
 
 def get_location_from_query(query: str | None) -> Location | None:
     """
@@ -50,6 +57,41 @@ def get_location_from_query(query: str | None) -> Location | None:
         return None
 
 
+async def get_location_from_query_cached(query: str | None) -> Location | None:
+    """
+    Same as get_location_from_query, but cached and without blocking the event
+    loop. Queries that return nothing are cached for a shorter time.
+    """
+    if query is None:
+        return None
+
+    cache_key = f"geocode:{' '.join(query.lower().split())}"
+    try:
+        cached_location = await cache.get(cache_key)
+        if cached_location == GEOCODE_NOT_FOUND:
+            return None
+        if cached_location is not None:
+            return Location.model_validate_json(cached_location)
+    except Exception as e:
+        logger.error(f"Error reading geocode from cache: {e}")
+
+    location = await asyncio.to_thread(get_location_from_query, query)
+
+    try:
+        if location is not None:
+            await cache.set(
+                cache_key, location.model_dump_json(), GEOCODE_CACHE_TTL_SECONDS
+            )
+        else:
+            await cache.set(
+                cache_key, GEOCODE_NOT_FOUND, GEOCODE_NEGATIVE_CACHE_TTL_SECONDS
+            )
+    except Exception as e:
+        logger.error(f"Error caching geocode: {e}")
+
+    return location
+
+
 def calculate_distance(
     loc1: Coordinates, loc2: Coordinates, distance_unit: DistanceUnit
 ) -> float:
@@ -0,0 +1,183 @@
+import base64
+import json
+import zlib
+from typing import Any
+
+from schemas.event_model import (
+    AgeRange,
+    EventAudienceProfile,
+    EventDetails,
+    LocationOfEvent,
+)
+
+try:
+    import orjson
+
+    HAS_ORJSON = True
+except ImportError:  # pragma: no cover - orjson is optional
+    HAS_ORJSON = False
+
+# Each format version fixes the order of the fields in the encoded array, so a
+# new field means a new version. Old versions must stay decodable until every
+# value written with them has expired.
+# v2 appends the audience profile to the fields of v1
+EVENT_DETAILS_CODEC_VERSION = "v2"
+DECODABLE_VERSIONS = {"v1": 12, "v2": 13}  # Version to number of fields
+COMPRESSED_SUFFIX = "z"
+
+# Compressing small payloads costs more than it saves
+COMPRESSION_THRESHOLD_BYTES = 512
+
+
+def _dumps(value: Any) -> bytes:
+    if HAS_ORJSON:
+        return orjson.dumps(value)
+    return json.dumps(value, separators=(",", ":"), ensure_ascii=False).encode()
+
+
+def _loads(value: bytes | str) -> Any:
+    if HAS_ORJSON:
+        return orjson.loads(value)
+    return json.loads(value)
+
+
+def _to_array(event_details: EventDetails) -> list:
+    age_range = event_details.age_range
+    location = event_details.location_of_event
+    audience_profile = event_details.audience_profile
+
+    return [
+        event_details.title,
+        [age_range.min_age, age_range.max_age] if age_range else None,
+        event_details.gender_bias,
+        event_details.sexual_orientation_bias,
+        event_details.relationship_status_bias,
+        event_details.date_of_event,
+        event_details.start_time,
+        event_details.end_time,
+        (
+            [location.full_address, location.latitude, location.longitude]
+            if location
+            else None
+        ),
+        event_details.price_of_event,
+        event_details.event_format,
+        event_details.is_sold_out,
+        (
+            [
+                audience_profile.topics,
+                audience_profile.audience,
+                audience_profile.is_professional_networking,
+                audience_profile.industry_focus,
+                audience_profile.nationality_or_ethnic_group,
+            ]
+            if audience_profile
+            else None
+        ),
+    ]
+
+
+def _from_array(values: list) -> EventDetails:
+    # v1 arrays end before the audience profile
+    values = [*values, None] if len(values) == DECODABLE_VERSIONS["v1"] else values
+    (
+        title,
+        age_range,
+        gender_bias,
+        sexual_orientation_bias,
+        relationship_status_bias,
+        date_of_event,
+        start_time,
+        end_time,
+        location,
+        price_of_event,
+        event_format,
+        is_sold_out,
+        audience_profile,
+    ) = values
+
+    # The values were validated when they were encoded, so skip re-validation
+    return EventDetails.model_construct(
+        title=title,
+        age_range=(
+            AgeRange.model_construct(min_age=age_range[0], max_age=age_range[1])
+            if age_range
+            else None
+        ),
+        gender_bias=gender_bias,
+        sexual_orientation_bias=sexual_orientation_bias,
+        relationship_status_bias=relationship_status_bias,
+        date_of_event=date_of_event,
+        start_time=start_time,
+        end_time=end_time,
+        location_of_event=(
+            LocationOfEvent.model_construct(
+                full_address=location[0], latitude=location[1], longitude=location[2]
+            )
+            if location
+            else None
+        ),
+        price_of_event=price_of_event,
+        event_format=event_format,
+        is_sold_out=is_sold_out,
+        audience_profile=(
+            EventAudienceProfile.model_construct(
+                topics=audience_profile[0],
+                audience=audience_profile[1],
+                is_professional_networking=audience_profile[2],
+                industry_focus=audience_profile[3],
+                nationality_or_ethnic_group=audience_profile[4],
+            )
+            if audience_profile
+            else None
+        ),
+    )
+
+
+def encode_event_details(event_details: EventDetails) -> str:
+    """
+    Encode event details for the cache as a versioned, positional JSON array.
+    Larger payloads are zlib compressed and base64 encoded since the cache only
+    stores strings.
+    """
+    payload = _dumps(_to_array(event_details))
+
+    if len(payload) >= COMPRESSION_THRESHOLD_BYTES:
+        compressed = base64.b64encode(zlib.compress(payload)).decode("ascii")
+        return f"{EVENT_DETAILS_CODEC_VERSION}{COMPRESSED_SUFFIX}:{compressed}"
+
+    return f"{EVENT_DETAILS_CODEC_VERSION}:{payload.decode()}"
+
+
+def decode_event_details(value: str) -> EventDetails:
+    """
+    Decode event details written by encode_event_details. Values written before
+    the codec existed (plain JSON objects) are still accepted and validated.
+
+    Raises:
+        ValueError: If the value can't be decoded
+    """
+    if value.startswith("{"):
+        return EventDetails(**_loads(value))
+
+    version, separator, payload = value.partition(":")
+    if not separator:
+        raise ValueError("Cached event details have no codec version")
+
+    compressed = version.endswith(COMPRESSED_SUFFIX)
+    if compressed:
+        version = version[: -len(COMPRESSED_SUFFIX)]
+
+    if version not in DECODABLE_VERSIONS:
+        raise ValueError(f"Unknown event details codec version: {version}")
+
+    try:
+        raw: bytes | str = (
+            zlib.decompress(base64.b64decode(payload)) if compressed else payload
+        )
+        values = _loads(raw)
+        if len(values) != DECODABLE_VERSIONS[version]:
+            raise ValueError(f"Expected {DECODABLE_VERSIONS[version]} fields")
+        return _from_array(values)
+    except Exception as e:
+        raise ValueError(f"Could not decode cached event details: {e}")
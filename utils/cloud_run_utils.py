@@ -0,0 +1,13 @@
+import os
+
+from core.config import settings
+
+
+def is_final_task_attempt() -> bool:
+    """
+    Whether Cloud Run won't retry the task if this attempt fails. Attempts are
+    counted from 0, so a job with N max retries makes its last one at N. Outside
+    Cloud Run there's only one attempt.
+    """
+    attempt = int(os.environ.get("CLOUD_RUN_TASK_ATTEMPT", "0"))
+    return attempt >= settings.CLOUD_RUN_JOB_MAX_RETRIES
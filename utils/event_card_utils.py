@@ -0,0 +1,179 @@
+import re
+from datetime import date, datetime, timedelta
+from typing import Any, Optional
+
+MONTH_NAMES = (
+    "january february march april may june july august september october november"
+    " december"
+).split()
+MONTHS = {month[:3]: number for number, month in enumerate(MONTH_NAMES, start=1)}
+# Full or three letter month names only, so words like "Marketing" or "Mayfair"
+# aren't read as months
+MONTH_PATTERN = rf"({'|'.join(MONTH_NAMES + ['sept'] + list(MONTHS))})\b\.?"
+
+ISO_DATETIME_PATTERN = re.compile(r"(\d{4})-(\d{2})-(\d{2})(?:[T ](\d{2}):(\d{2}))?")
+DAY_MONTH_PATTERN = re.compile(
+    rf"\b(\d{{1,2}})(?:st|nd|rd|th)?\s+{MONTH_PATTERN}(?:,?\s+(\d{{4}}))?\b",
+    re.IGNORECASE,
+)
+MONTH_DAY_PATTERN = re.compile(
+    rf"\b{MONTH_PATTERN}\s+(\d{{1,2}})(?:st|nd|rd|th)?(?:,?\s+(\d{{4}}))?\b",
+    re.IGNORECASE,
+)
+TWELVE_HOUR_PATTERN = re.compile(r"\b(\d{1,2})(?::(\d{2}))?\s*([ap])\.?m\b", re.I)
+TWENTY_FOUR_HOUR_PATTERN = re.compile(r"\b([01]?\d|2[0-3]):([0-5]\d)\b")
+PRICE_PATTERN = re.compile(r"[£$€]\s*(\d[\d,]*(?:\.\d+)?)")
+FREE_PATTERN = re.compile(r"\bfree\b", re.IGNORECASE)
+# The price slot of a card holds nothing but the price, e.g. "Free",
+# "From £12.50" or "£10 - £20"
+PRICE_SLOT_PATTERN = re.compile(
+    r"(?:from\s+)?(?:free|[£$€]\s*\d[\d,]*(?:\.\d+)?"
+    r"(?:\s*[-–]\s*[£$€]\s*\d[\d,]*(?:\.\d+)?)?)",
+    re.IGNORECASE,
+)
+CARD_SLOT_SEPARATOR = re.compile(r"\s*[\n·•|]\s*")
+
+
+def _format_date(year: int, month: int, day: int) -> Optional[str]:
+    try:
+        return date(year, month, day).strftime("%d-%m-%Y")
+    except ValueError:
+        return None
+
+
+def parse_json_ld_datetime(
+    value: Optional[str],
+) -> tuple[Optional[str], Optional[str]]:
+    """
+    Parse a schema.org date or datetime (e.g. "2025-06-12T18:30:00+01:00"),
+    keeping the local time as written.
+
+    Returns:
+        The date in DD-MM-YYYY format and the time in HH:MM format, or None for
+        either if it's missing
+    """
+    match = ISO_DATETIME_PATTERN.search(value or "")
+    if not match:
+        return None, None
+
+    year, month, day, hour, minute = match.groups()
+    start_time = f"{hour}:{minute}" if hour else None
+    return _format_date(int(year), int(month), int(day)), start_time
+
+
+def _resolve_card_date(
+    day: str, month: str, year: Optional[str], today: date
+) -> Optional[str]:
+    month_number = MONTHS[month[:3].lower()]
+    if year:
+        return _format_date(int(year), month_number, int(day))
+
+    # Listings only show upcoming events, so a date without a year that has
+    # already passed this year is next year's
+    formatted = _format_date(today.year, month_number, int(day))
+    if formatted and datetime.strptime(formatted, "%d-%m-%Y").date() < today:
+        formatted = _format_date(today.year + 1, month_number, int(day))
+    return formatted
+
+
+def _parse_card_date(text: str, today: date) -> Optional[str]:
+    lowered = text.lower()
+    if re.search(r"\btoday\b|\btonight\b", lowered):
+        return today.strftime("%d-%m-%Y")
+    if re.search(r"\btomorrow\b", lowered):
+        return (today + timedelta(days=1)).strftime("%d-%m-%Y")
+
+    dates = [
+        (match.span(), _resolve_card_date(day, month, year, today))
+        for match in DAY_MONTH_PATTERN.finditer(text)
+        for day, month, year in [match.groups()]
+    ] + [
+        (match.span(), _resolve_card_date(day, month, year, today))
+        for match in MONTH_DAY_PATTERN.finditer(text)
+        for month, day, year in [match.groups()]
+    ]
+    if not dates:
+        return None
+
+    # The date is the earliest one shown, unless the same words also read as a
+    # different date, e.g. "May 5 June", in which case it's unknown
+    (start, end), card_date = min(dates, key=lambda date_match: date_match[0])
+    for (other_start, other_end), other_date in dates:
+        if other_start < end and start < other_end and other_date != card_date:
+            return None
+    return card_date
+
+
+def _parse_card_time(text: str) -> Optional[str]:
+    twelve_hour = TWELVE_HOUR_PATTERN.search(text)
+    if twelve_hour:
+        hour, minute, period = twelve_hour.groups()
+        hour_number = int(hour) % 12 + (12 if period.lower() == "p" else 0)
+        if hour_number > 23:
+            return None
+        return f"{hour_number:02d}:{minute or '00'}"
+
+    twenty_four_hour = TWENTY_FOUR_HOUR_PATTERN.search(text)
+    if twenty_four_hour:
+        hour, minute = twenty_four_hour.groups()
+        return f"{int(hour):02d}:{minute}"
+
+    return None
+
+
+def parse_card_datetime(
+    text: str, today: Optional[date] = None
+) -> tuple[Optional[str], Optional[str]]:
+    """
+    Parse the date and start time shown on an event card, e.g.
+    "Thu, Jun 12 · 6:30 PM BST", "Sat, 14 June, 19:00" or "Tomorrow at 7pm".
+
+    Returns:
+        The date in DD-MM-YYYY format and the time in HH:MM format, or None for
+        either if it isn't shown
+    """
+    return _parse_card_date(text, today or date.today()), _parse_card_time(text)
+
+
+def parse_card_price(text: str) -> Optional[float]:
+    """
+    Get the lowest price shown in the price slot of an event card, 0 if it's
+    free and None if no price is shown.
+
+    Cards whose text says both free and paid, e.g. "£1,000 prizes · Free entry",
+    are taken as not showing a price, since it can't be told which one the
+    ticket costs.
+    """
+    if FREE_PATTERN.search(text) and PRICE_PATTERN.search(text):
+        return None
+
+    for slot in CARD_SLOT_SEPARATOR.split(text):
+        if not PRICE_SLOT_PATTERN.fullmatch(slot):
+            continue
+        prices = PRICE_PATTERN.findall(slot)
+        if prices:
+            return min(float(price.replace(",", "")) for price in prices)
+        return 0
+
+    return None
+
+
+def parse_json_ld_price(offers: Any) -> Optional[float]:
+    """Get the lowest price of a schema.org offers value (a dict or a list)"""
+    if isinstance(offers, dict):
+        offers = [offers]
+    if not isinstance(offers, list):
+        return None
+
+    prices = []
+    for offer in offers:
+        if not isinstance(offer, dict):
+            continue
+        for field in ("lowPrice", "price"):
+            try:
+                prices.append(float(offer[field]))
+                break
+            except (KeyError, TypeError, ValueError):
+                continue
+
+    return min(prices) if prices else None
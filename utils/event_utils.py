@@ -18,13 +18,21 @@ def remove_duplicates_based_on_title(events: list[EventResult]) -> list[EventRes
     return unique_events
 
 
+# Events have to score above this to be sent to users who only want highly
+# relevant events
+HIGHLY_RELEVANT_THRESHOLD = 40
+
+
+def get_relevance_threshold(only_highly_relevant: bool = False) -> float:
+    """Relevance an event has to score above to be sent to the user"""
+    return HIGHLY_RELEVANT_THRESHOLD if only_highly_relevant else 0
+
+
 def filter_events_by_relevance(
     events: list[EventResult], only_highly_relevant: bool = False
 ) -> list[EventResult]:
-    if only_highly_relevant:
-        return [event for event in events if event.relevance > 40]
-    else:
-        return [event for event in events if event.relevance > 0]
+    threshold = get_relevance_threshold(only_highly_relevant)
+    return [event for event in events if event.relevance > threshold]
 
 
 def get_seconds_until_event(date_of_event: str | None, start_time: str | None) -> int:
@@ -0,0 +1,91 @@
+import re
+from html.parser import HTMLParser
+
+# Elements whose content is never visible text
+SKIPPED_TAGS = {"script", "style", "noscript", "template", "svg", "head", "iframe"}
+
+# Elements that start a new line when rendered
+BLOCK_TAGS = {
+    "address",
+    "article",
+    "aside",
+    "blockquote",
+    "br",
+    "dd",
+    "div",
+    "dl",
+    "dt",
+    "fieldset",
+    "figcaption",
+    "figure",
+    "footer",
+    "form",
+    "h1",
+    "h2",
+    "h3",
+    "h4",
+    "h5",
+    "h6",
+    "header",
+    "hr",
+    "li",
+    "main",
+    "nav",
+    "ol",
+    "p",
+    "pre",
+    "section",
+    "table",
+    "td",
+    "th",
+    "tr",
+    "ul",
+}
+
+# Void elements never get a closing tag so they can't open a skipped section
+VOID_TAGS = {"area", "base", "br", "col", "embed", "hr", "img", "input", "link"}
+
+
+class _TextExtractor(HTMLParser):
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.parts: list[str] = []
+        self.skip_depth = 0
+
+    def handle_starttag(self, tag, attrs):
+        if tag in SKIPPED_TAGS:
+            self.skip_depth += 1
+        elif tag in BLOCK_TAGS:
+            self.parts.append("\n")
+
+    def handle_startendtag(self, tag, attrs):
+        if tag in BLOCK_TAGS:
+            self.parts.append("\n")
+
+    def handle_endtag(self, tag):
+        if tag in SKIPPED_TAGS:
+            self.skip_depth = max(0, self.skip_depth - 1)
+        elif tag in BLOCK_TAGS and tag not in VOID_TAGS:
+            self.parts.append("\n")
+
+    def handle_data(self, data):
+        if not self.skip_depth:
+            self.parts.append(data)
+
+
+def html_to_text(html: str) -> str:
+    """
+    Convert an HTML fragment to plain text roughly the way a browser renders it,
+    without the cost of a layout pass. Scripts, styles and other non-visible
+    elements are dropped, block elements become line breaks and runs of
+    whitespace are collapsed.
+    """
+    extractor = _TextExtractor()
+    extractor.feed(html)
+    extractor.close()
+
+    text = "".join(extractor.parts)
+    lines = (
+        re.sub(r"[ \t\r\f\v\xa0]+", " ", line).strip() for line in text.split("\n")
+    )
+    return "\n".join(line for line in lines if line)
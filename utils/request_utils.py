@@ -5,12 +5,27 @@ from typing import Any, Callable, TypeVar
 from google.api_core.exceptions import ResourceExhausted
 
 from core.logging_config import get_logger
+from core.run_deadline import get_run_deadline
+from core.run_metrics import get_run_metrics
 
 logger = get_logger(__name__)
 
 T = TypeVar("T")
 
 
+def record_llm_usage(result: Any) -> None:
+    """Count an LLM call and the tokens it used, if the response reports them"""
+    run_metrics = get_run_metrics()
+    run_metrics.increment("llm_calls")
+
+    usage_metadata = getattr(result, "usage_metadata", None)
+    if usage_metadata:
+        run_metrics.increment("llm_input_tokens", usage_metadata.get("input_tokens", 0))
+        run_metrics.increment(
+            "llm_output_tokens", usage_metadata.get("output_tokens", 0)
+        )
+
+
 def retry_with_backoff(
     func: Callable[..., T],
     max_retries: int = 5,
@@ -33,13 +48,20 @@ def retry_with_backoff(
 
     Raises:
         ResourceExhausted: If all retries are exhausted
+        RunDeadlineExceeded: If the next retry would start after the run's
+            deadline
         Exception: Any other exception from the function
     """
+    run_metrics = get_run_metrics()
     retry_count = 0
     while True:
         try:
-            return func(*args, **kwargs)
+            with run_metrics.timer("llm_call"):
+                result = func(*args, **kwargs)
+            record_llm_usage(result)
+            return result
         except ResourceExhausted:
+            run_metrics.increment("llm_rate_limited")
             retry_count += 1
             if retry_count >= max_retries:
                 logger.error(f"Max retries ({max_retries}) exceeded.")
@@ -49,6 +71,9 @@ def retry_with_backoff(
             jitter = random.uniform(0, 0.1 * delay)
             total_delay = delay + jitter
 
+            # Don't back off past the end of the run
+            get_run_deadline().check_wait(total_delay)
+
             logger.info(
                 f"Rate limit hit. Retrying in {total_delay:.2f} seconds "
                 f"(attempt {retry_count}/{max_retries})"
@@ -0,0 +1,94 @@
+import re
+from typing import Optional
+from urllib.parse import parse_qsl, urlencode, urljoin, urlsplit, urlunsplit
+
+# Query parameters that only record where a click came from
+TRACKING_PARAMS = {
+    "aff",
+    "fbclid",
+    "gclid",
+    "keep_tld",
+    "mc_cid",
+    "mc_eid",
+    "ref",
+    "referrer",
+}
+TRACKING_PARAM_PREFIXES = ("utm_",)
+
+
+def _is_bare_platform_domain(host: str) -> bool:
+    """Whether a (lowercase, www-less) host is Eventbrite's or Meetup's own domain"""
+    return host.startswith("eventbrite.") or host == "meetup.com"
+
+
+def _get_platform(host: str) -> Optional[str]:
+    """Get the event platform a (lowercase, www-less) host belongs to"""
+    if host.startswith("eventbrite.") or ".eventbrite." in f".{host}":
+        return "eventbrite"
+    if host == "meetup.com" or host.endswith(".meetup.com"):
+        return "meetup"
+    if host in ("lu.ma", "luma.com"):
+        return "luma"
+    return None
+
+
+def get_event_platform(url: str) -> Optional[str]:
+    """Get the platform (eventbrite, meetup or luma) an event URL is on, if any"""
+    host = (urlsplit(url).hostname or "").removeprefix("www.")
+    return _get_platform(host)
+
+
+def _is_tracking_param(name: str) -> bool:
+    name = name.lower()
+    return name in TRACKING_PARAMS or name.startswith(TRACKING_PARAM_PREFIXES)
+
+
+def canonicalize_event_url(url: str, base_url: Optional[str] = None) -> str:
+    """
+    Normalize an event URL so every link to the same event page gives the same
+    string, which makes it safe to dedupe on and to use in cache keys.
+
+    Eventbrite, Meetup and Luma event pages are identified by their path alone,
+    so their query string (?aff=..., ?eventOrigin=..., ...) is dropped. Other
+    URLs only lose their tracking parameters and keep the rest sorted.
+
+    Args:
+        url: Event URL as found on the page, possibly relative
+        base_url: URL to resolve relative links against
+
+    Returns:
+        The canonical URL, or the stripped input if it has no host
+    """
+    url = url.strip()
+    if base_url and not urlsplit(url).netloc:
+        url = urljoin(base_url, url)
+
+    parts = urlsplit(url)
+    if not parts.netloc:
+        return url
+
+    host = parts.hostname or ""
+    bare_host = host.removeprefix("www.")
+    platform = _get_platform(bare_host)
+
+    # Subdomains like secure.meetup.com are left as they are
+    if _is_bare_platform_domain(bare_host):
+        host = f"www.{bare_host}"
+    elif platform == "luma":
+        host = bare_host
+
+    # e.g. "https://lu.ma//abc" when the href already starts with a slash
+    path = re.sub(r"/{2,}", "/", parts.path).rstrip("/") or "/"
+
+    if platform:
+        query = ""
+    else:
+        query = urlencode(
+            sorted(
+                (name, value)
+                for name, value in parse_qsl(parts.query, keep_blank_values=True)
+                if not _is_tracking_param(name)
+            )
+        )
+
+    return urlunsplit(("https", host, path, query, ""))